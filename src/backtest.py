@@ -1,10 +1,15 @@
-import asyncio
-import csv
+import os
 import argparse
 import logging
-from datetime import datetime
-from src.core.models import MarketTick
+import time
+from src.config import settings
+from src.core import checkpoint
+from src.core.models import OHLCV, from_epoch_ns
+from src.core.loader import load_ticks, load_bars
+from src.core.tick_cache import TickCache
 from src.core.broker import BacktestBroker
+from src.core.scores import precompute_scores
+from src.core.strategy import MINUTE_NS
 from src.strategies.reverse_pattern import ReversePatternStrategy
 from src.core.inference import InferenceService
 
@@ -16,80 +21,244 @@ ch.setFormatter(logging.Formatter('%(message)s'))
 logger.addHandler(ch)
 
 class BacktestRunner:
-    def __init__(self, filepath, symbol="PI_XBTUSD"):
+    def __init__(self, filepath, symbol="PI_XBTUSD", bars=False, intrabar_rule=None, cache=False,
+                 strategy_params=None, inference_service=None, verbose=True,
+                 checkpoint_path=None, checkpoint_every=None, precompute_ai=False, score_table=None):
         self.filepath = filepath
         self.symbol = symbol
+        self.bars = bars # CSV holds OHLCV bars instead of ticks
+        self.intrabar_rule = intrabar_rule
+        self.cache = TickCache() if cache else None
+        self.load_seconds = 0.0
+        self.replay_seconds = 0.0
+        self.verbose = verbose
+        # Periodic snapshots of the whole replay state (see run_sync(resume_from=...))
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every or settings.BACKTEST_CHECKPOINT_EVERY
+        self.strategy_params = dict(strategy_params or {})
+        # Score every candle's AI window in batches up front instead of one predict per signal
+        self.precompute_ai = precompute_ai
+        self.precompute_seconds = 0.0
         self.broker = BacktestBroker(initial_balance=10000.0)
         
-        # Initialize AI
-        self.inference = InferenceService()  # Will load models/model.tflite
+        # Initialize AI (can be shared between runs, e.g. by the sweep)
+        self.inference = inference_service or InferenceService()  # Will load models/model.tflite
         
-        # Using default settings (filters off) for basic backtest
-        self.strategy = ReversePatternStrategy(symbol, broker=self.broker, inference_service=self.inference)
+        # Using default settings (filters off) for basic backtest, overridable per run
+        self.strategy = ReversePatternStrategy(symbol, broker=self.broker, inference_service=self.inference,
+                                               **self.strategy_params)
+        if bars and tuple(self.strategy.timeframes) != (1,):
+            # Bar replay hands the strategy the file's 1m bars as they are, nothing is rolled up
+            raise ValueError(f"Bar mode replays 1m bars; timeframes {tuple(self.strategy.timeframes)} "
+                             f"need a tick recording")
+        if score_table is not None and score_table.span != self.strategy.timeframes[0] * MINUTE_NS:
+            # Every 5m candle time is also on a 1m grid: a mismatched table would "hit" with the wrong window
+            logger.warning(f"Score table is for {score_table.span // MINUTE_NS}m candles, strategy trades "
+                           f"{self.strategy.timeframes[0]}m: falling back to predict()")
+            score_table = None
+        self.strategy.score_table = score_table # Shared by runs over the same data (sweep)
         
-    async def run(self):
-        print(f"Starting Backtest on {self.filepath}...")
+    def load(self):
+        """Recording -> typed columns (TickColumns / BarColumns) for this symbol only"""
+        if self.cache:
+            return self.cache.load(self.filepath, bars=self.bars, symbols=[self.symbol])
+        if self.bars:
+            return load_bars(self.filepath, symbols=[self.symbol])
+        return load_ticks(self.filepath, symbols=[self.symbol])
+
+    async def run(self, data=None, resume_from=None, fork=False):
+        """Replay the recording (or already loaded `data` columns). Returns the broker stats."""
+        return self.run_sync(data, resume_from, fork)
+
+    def run_sync(self, data=None, resume_from=None, fork=False):
+        """
+        run() without an event loop. The replay is a plain loop over the columns:
+        strategy.on_price_sync / execute_sync and broker.place_order_sync, no coroutine per tick.
+
+        `resume_from`: checkpoint to continue from (the rows it covers are skipped). It must
+        have been taken with this runner's strategy params unless `fork` is set: then these
+        params apply from there on (the changes are logged), so one warmed-up checkpoint can
+        be forked into runs with different params.
+        """
+        self._print(f"Starting Backtest on {self.filepath}...")
         
-        count = 0
+        if data is None:
+            try:
+                t0 = time.perf_counter()
+                data = self.load()
+                self.load_seconds = time.perf_counter() - t0
+                if self.cache:
+                    state = "warm (memmap)" if self.cache.last_hit else "cold (CSV parsed, cache built)"
+                    self._print(f"Load: {state} in {self.load_seconds:.3f}s")
+            except FileNotFoundError:
+                print(f"Error: File {self.filepath} not found.")
+                return
+        else:
+            self.load_seconds = 0.0 # Caller's data: nothing was loaded here
+            
+        if self.precompute_ai and self.strategy.score_table is None:
+            t0 = time.perf_counter()
+            self.strategy.score_table = precompute_scores(data, self.inference, bars=self.bars,
+                                                          interval_minutes=self.strategy.timeframes[0])
+            self.precompute_seconds = time.perf_counter() - t0
+            self._print(f"AI scores precomputed for {len(self.strategy.score_table)} candles in {self.precompute_seconds:.3f}s")
+            
+        start, pending = 0, None
+        if resume_from:
+            start, pending = self.restore(resume_from, data, fork)
+            self._print(f"Resumed from {resume_from} at row {start}")
+            
+        t0 = time.perf_counter()
         try:
-            with open(self.filepath, 'r') as f:
-                reader = csv.reader(f)
-                header = next(reader)  # Skip Header
+            if self.bars:
+                count = self._replay_bars(data, start, pending)
+            else:
+                count = self._replay_ticks(data, start)
+        except KeyboardInterrupt:
+            if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+                print(f"\nInterrupted. Continue with --resume (checkpoint: {self.checkpoint_path})")
+            raise
+        self.replay_seconds = time.perf_counter() - t0
+        
+        if self.verbose:
+            self.report(count, "Bars" if self.bars else "Ticks", start)
+        return self.broker.get_stats()
+
+    def _print(self, msg, **kwargs):
+        if self.verbose:
+            print(msg, **kwargs)
+
+    def source(self, data) -> dict:
+        """What a checkpoint was taken on; a resume must match it"""
+        try:
+            st = os.stat(self.filepath)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        except OSError:
+            size = mtime_ns = None
+        return {"file": os.path.basename(self.filepath), "size": size, "mtime_ns": mtime_ns,
+                "symbol": self.symbol, "bars": self.bars, "rows": len(data.time)}
+
+    def save_checkpoint(self, data, offset, pending=None, path=None):
+        """Snapshot after `offset` rows (path defaults to checkpoint_path)"""
+        state = checkpoint.capture(self.broker, self.strategy, offset, self.source(data),
+                                   self.strategy_params, pending)
+        checkpoint.save(path or self.checkpoint_path, state)
+
+    def restore(self, path, data, fork=False):
+        """Load a checkpoint into this runner -> (rows already processed, pending bar)"""
+        state = checkpoint.load(path)
+        src, cur = state["source"], self.source(data)
+        for key in ("file", "symbol", "bars"):
+            if src[key] != cur[key]:
+                raise ValueError(f"Checkpoint {path} was taken on {key}={src[key]!r}, not {cur[key]!r}")
+        if state["offset"] > cur["rows"] or (src["size"], src["mtime_ns"]) != (cur["size"], cur["mtime_ns"]):
+            # Recorder files only grow, so the prefix is normally unchanged
+            logger.warning(f"Checkpoint {path}: {self.filepath} changed since it was taken")
+        diff = checkpoint.params_diff(state["params"], self.strategy_params)
+        if diff:
+            changes = ", ".join(f"{k}: {old!r} -> {new!r}" for k, (old, new) in diff.items())
+            if not fork:
+                raise ValueError(f"Checkpoint {path} was taken with other strategy params ({changes}); "
+                                 f"fork it to continue with these")
+            logger.info(f"Forking {path} with changed strategy params: {changes}")
+        checkpoint.restore(state, self.broker, self.strategy)
+        return state["offset"], state["pending"]
+
+    def _replay_ticks(self, data, start=0):
+        symbol = self.symbol
+        count = start
+        # Bound methods hoisted out of the hot loop
+        update_market_state = self.broker.update_market_state
+        on_price = self.strategy.on_price_sync
+        every = self.checkpoint_every if self.checkpoint_path else 0
+        columns = (data.time[start:].tolist(), data.price[start:].tolist(), data.volume[start:].tolist())
+        for ts, price, volume in zip(*columns):
+            # Update Broker, then Feed Strategy (ts = epoch ns)
+            update_market_state(price, ts, symbol)
+            on_price(ts, price, volume)
+            count += 1
+            
+            if count % 100000 == 0:
+                self._print(f"Processed {count} ticks...", end='\r')
+            if every and count % every == 0:
+                self.save_checkpoint(data, count)
+        return count
+
+    def _replay_bars(self, data, start=0, prev=None):
+        """
+        Bar mode: rows are timestamp,symbol,open,high,low,close,volume (1m bars, so the
+        strategy must trade 1m only; checked in __init__).
+        Same event order as replaying the synthetic O/H/L/C ticks: a bar is handed to the
+        strategy when the next one opens, so its orders fill at that open and can then be
+        triggered by the rest of the bar.
+        """
+        count = start
+        symbol = self.symbol
+        every = self.checkpoint_every if self.checkpoint_path else 0
+        rows = zip(*(col[start:].tolist() for col in (data.time, data.open, data.high, data.low, data.close, data.volume)))
+        for ts, o, h, l, c, v in rows:
+            # Bar opens: previous bar is closed
+            self.broker.update_market_state(o, ts, symbol)
+            if prev is not None:
+                self.strategy.on_candle_sync(prev)
                 
-                for row in reader:
-                    if not row: continue
-                    try:
-                        ts = datetime.fromisoformat(row[0])
-                        # Filter by symbol if mixed?
-                        row_symbol = row[1]
-                        if row_symbol != self.symbol:
-                            continue
-                            
-                        price = float(row[2])
-                        volume = float(row[3])
-                        
-                        # Update Broker
-                        self.broker.update_market_state(price, ts)
-                        
-                        tick = MarketTick(
-                            symbol=self.symbol,
-                            price=price,
-                            volume=volume,
-                            timestamp=ts
-                        )
-                        
-                        # Feed Strategy
-                        await self.strategy.on_tick(tick)
-                        count += 1
-                        
-                        if count % 10000 == 0:
-                            print(f"Processed {count} ticks...", end='\r')
-                            
-                    except ValueError as e:
-                        # Skip malformed lines
-                        continue
-                        
-        except FileNotFoundError:
-            print(f"Error: File {self.filepath} not found.")
-            return
+            # Rest of the bar: SL/TP resolved from high/low
+            self.broker.process_bar(symbol, o, h, l, c, ts, self.intrabar_rule, opened=True)
+            prev = OHLCV(symbol=symbol, time=from_epoch_ns(ts), open=o, high=h, low=l, close=c, volume=v, interval=1)
+            count += 1
+            
+            if count % 100000 == 0:
+                self._print(f"Processed {count} bars...", end='\r')
+            if every and count % every == 0:
+                self.save_checkpoint(data, count, pending=prev)
+        return count
 
-        # Final Report
+    def report(self, count, unit="Ticks", start=0):
+        """`count`: rows covered (the whole file was loaded); `start`: rows a resume skipped"""
         stats = self.broker.get_stats()
+        replayed = count - start
         print("\n\n=== Backtest Report ===")
         print(f"File: {self.filepath}")
-        print(f"Ticks Processed: {count}")
+        print(f"{unit} Processed: {replayed}" + (f" (resumed at row {start})" if start else ""))
+        if self.load_seconds:
+            print(f"Ingest: {count / self.load_seconds:,.0f} {unit.lower()}/sec ({self.load_seconds:.2f}s)")
+        print(f"Replay: {replayed / max(self.replay_seconds, 1e-9):,.0f} {unit.lower()}/sec ({self.replay_seconds:.2f}s)")
+        table = self.strategy.score_table
+        if table is not None:
+            print(f"AI Scores: {table.hits} precomputed lookups, {table.misses} fallbacks to predict()")
+        ai = self.inference.stats()
+        if ai["cache_hits"] or ai["cache_misses"]:
+            print(f"AI Cache: {ai['cache_hits']} hits, {ai['cache_misses']} misses")
         print(f"Trades Executed: {stats['trades_count']}")
         print(f"Final PnL: ${stats['pnl']:.2f}")
         print(f"Final Equity: ${stats['equity']:.2f}")
-        print(f"Open Position: {stats['position']}")
+        print(f"Max Drawdown: {stats['max_drawdown'] * 100:.2f}%")
+        print(f"Sharpe: {stats['sharpe']:.2f}")
+        print(f"Open Position: {stats['positions'].get(self.symbol, 0.0)}")
         print("=======================")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gaia Backtest Tool")
     parser.add_argument("--file", required=True, help="Path to CSV recording")
     parser.add_argument("--symbol", default="PI_XBTUSD", help="Symbol to backtest")
+    parser.add_argument("--bars", action="store_true", help="File holds OHLCV bars (download_data.py --bars)")
+    parser.add_argument("--no-cache", action="store_true", help="Always parse the CSV (skip the binary tick cache)")
+    parser.add_argument("--intrabar", default=None, choices=["ohlc", "stop_first", "limit_first", "nearest"],
+                        help="Which bar extreme is hit first in bar mode (default: settings)")
+    parser.add_argument("--no-precompute-ai", action="store_true", help="Call predict() per signal instead of batch-scoring all candles first")
+    parser.add_argument("--checkpoint", default=None, help="Snapshot the replay state to this file periodically")
+    parser.add_argument("--checkpoint-every", type=int, default=None, help="Rows between snapshots (default: settings)")
+    parser.add_argument("--resume", action="store_true", help="Continue from --checkpoint instead of the start")
+    parser.add_argument("--fork-from", default=None, help="Start from this snapshot (e.g. a warm-up) without overwriting it")
     
     args = parser.parse_args()
     
-    runner = BacktestRunner(args.file, args.symbol)
-    asyncio.run(runner.run())
+    runner = BacktestRunner(args.file, args.symbol, bars=args.bars, intrabar_rule=args.intrabar, cache=not args.no_cache,
+                            checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                            precompute_ai=not args.no_precompute_ai)
+    resume_from = args.fork_from
+    if args.resume:
+        if not args.checkpoint or not os.path.exists(args.checkpoint):
+            parser.error("--resume needs an existing --checkpoint file")
+        resume_from = args.checkpoint
+    runner.run_sync(resume_from=resume_from, fork=not args.resume)
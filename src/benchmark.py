@@ -0,0 +1,340 @@
+import gc
+import os
+import json
+import time
+import platform
+import argparse
+import logging
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+from src.config import settings
+from src.core.logger import logger as core_logger
+from src.core.strategy import CandleBuffer, CandleStore, TickAggregator, MINUTE_NS
+from src.core.indicators import SMA
+from src.core.broker import BacktestBroker
+from src.core.risk import RiskManager, SafeBroker
+from src.core.paper import build_paper_stack
+from src.core.inference import InferenceService
+from src.strategies.reverse_pattern import ReversePatternStrategy
+
+logger = logging.getLogger("Gaia")
+
+# Production shape: every Kraken symbol, full candle buffers
+SYMBOLS = len(settings.KRAKEN_SYMBOLS)
+BUFFER_SIZE = 1000
+
+# Compared against the baseline: metric -> True if higher is better
+METRICS = {"per_sec": True, "p50_us": False, "p99_us": False, "peak_mb": False}
+
+class SyntheticTicks(NamedTuple):
+    time: np.ndarray # epoch ns
+    symbol: np.ndarray # index into symbols
+    price: np.ndarray
+    volume: np.ndarray
+    closes: np.ndarray # True where the tick closes its symbol's previous 1m candle
+    symbols: List[str]
+
+def synthetic_ticks(symbols: int = SYMBOLS, minutes: int = 2000, ticks_per_minute: int = 4, seed: int = 7) -> SyntheticTicks:
+    """
+    Deterministic round-robin ticks (one random walk per symbol): the same arguments
+    always give the same data, so runs are comparable.
+    """
+    rng = np.random.default_rng(seed)
+    steps = minutes * ticks_per_minute
+    t0 = 1_735_689_600 * 1_000_000_000 # 2025-01-01 UTC
+    step_times = t0 + np.arange(steps, dtype=np.int64) * (MINUTE_NS // ticks_per_minute)
+    walks = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, (steps, symbols)), axis=0))
+
+    # Every symbol ticks once per step, in symbol order
+    closes = np.zeros(steps, dtype=bool)
+    closes[ticks_per_minute::ticks_per_minute] = True
+    names = [settings.KRAKEN_SYMBOLS[i] if i < len(settings.KRAKEN_SYMBOLS) else f"SYM{i}" for i in range(symbols)]
+    return SyntheticTicks(
+        np.repeat(step_times, symbols),
+        np.tile(np.arange(symbols, dtype=np.int16), steps),
+        np.round(walks, 2).reshape(-1),
+        np.round(rng.uniform(0.1, 2.0, steps * symbols), 3),
+        np.repeat(closes, symbols),
+        names,
+    )
+
+def _rows(ticks: SyntheticTicks):
+    return zip(ticks.time.tolist(), ticks.symbol.tolist(), ticks.price.tolist(),
+               ticks.volume.tolist(), ticks.closes.tolist())
+
+def _aggregators(ticks: SyntheticTicks) -> List[TickAggregator]:
+    aggs = [TickAggregator() for _ in ticks.symbols]
+    for agg, name in zip(aggs, ticks.symbols):
+        agg.symbol = name
+    return aggs
+
+def synthetic_candles(ticks: SyntheticTicks) -> List[list]:
+    """The closed 1m candles, grouped by minute: [[symbol 0, symbol 1, ...], ...]"""
+    aggs = _aggregators(ticks)
+    per_symbol = [[] for _ in ticks.symbols]
+    for ts, s, p, v, _ in _rows(ticks):
+        per_symbol[s].extend(aggs[s].update(ts, p, v))
+    return [list(minute) for minute in zip(*per_symbol)]
+
+# --- Benchmarks ---
+# setup() builds fresh state; run(state) processes every event and returns the latencies (ns)
+# of the "close" events: ticks that close a candle, candle appends / batch evaluations,
+# order placements.
+
+class Bench(NamedTuple):
+    unit: str
+    events: int
+    setup: Callable
+    run: Callable
+
+def _aggregator(ticks):
+    def run(aggs):
+        lat = []
+        clock = time.perf_counter_ns
+        for ts, s, p, v, close in _rows(ticks):
+            t0 = clock()
+            aggs[s].update(ts, p, v)
+            if close:
+                lat.append(clock() - t0)
+        return lat
+    return Bench("ticks", len(ticks.time), lambda: _aggregators(ticks), run)
+
+def _candle_buffer(candles):
+    def setup():
+        buffers = [CandleBuffer(BUFFER_SIZE) for _ in candles[0]]
+        for b in buffers:
+            b.register_indicator("ma", SMA(50))
+        return buffers
+
+    def run(buffers):
+        lat = []
+        clock = time.perf_counter_ns
+        for minute in candles:
+            for b, c in zip(buffers, minute):
+                t0 = clock()
+                b.add_candle(c)
+                lat.append(clock() - t0)
+        return lat
+    return Bench("candles", len(candles) * len(candles[0]), setup, run)
+
+def _signals(candles):
+    names = [c.symbol for c in candles[0]]
+
+    def setup():
+        store = CandleStore(names, BUFFER_SIZE)
+        return [ReversePatternStrategy(n, candle_store=store, filter_bearish=True, filter_bullish=True) for n in names]
+
+    def run(strategies):
+        lat = []
+        clock = time.perf_counter_ns
+        for i, minute in enumerate(candles):
+            for s, c in zip(strategies, minute):
+                s.candles.add_candle(c)
+            if i < 5:
+                continue # Not enough context yet
+            # One batched evaluation per minute close, as CandleScheduler does
+            t0 = clock()
+            ReversePatternStrategy.detect_batch(strategies)
+            lat.append(clock() - t0)
+        return lat
+    return Bench("candles", len(candles) * len(names), setup, run)
+
+def _safe_broker(ticks, orders: int = 20_000):
+    rng = np.random.default_rng(11)
+    sides = rng.choice(["buy", "sell"], orders).tolist()
+    sizes = np.round(rng.uniform(0.01, 0.5, orders), 3).tolist()
+    syms = [ticks.symbols[i] for i in rng.integers(0, len(ticks.symbols), orders).tolist()]
+
+    def setup():
+        broker = BacktestBroker()
+        for name in ticks.symbols:
+            broker.update_market_state(100.0, int(ticks.time[0]), name)
+        return SafeBroker(broker, RiskManager(min_confidence=0.5, max_position_size=1e9))
+
+    def run(safe):
+        lat = []
+        clock = time.perf_counter_ns
+        for side, size, sym in zip(sides, sizes, syms):
+            params = {"sl": 95.0, "tp": 110.0} if side == "buy" else {"sl": 105.0, "tp": 90.0}
+            t0 = clock()
+            safe.place_order_sync(sym, side, "mkt", size, params=params)
+            lat.append(clock() - t0)
+        return lat
+    return Bench("orders", orders, setup, run)
+
+def _broker(ticks, resting: int = 200):
+    """Mark-to-market + trigger checks with `resting` bracket pairs per symbol"""
+    def setup():
+        rng = np.random.default_rng(13)
+        broker = BacktestBroker()
+        for s, name in enumerate(ticks.symbols):
+            price = float(ticks.price[s])
+            broker.update_market_state(price, int(ticks.time[0]), name)
+            for width in rng.uniform(0.02, 0.5, resting).tolist():
+                broker.place_order_sync(name, "buy", "mkt", 0.01,
+                                        params={"sl": price * (1 - width), "tp": price * (1 + width)})
+        return broker
+
+    def run(broker):
+        lat = []
+        clock = time.perf_counter_ns
+        names = ticks.symbols
+        for ts, s, p, _, close in _rows(ticks):
+            t0 = clock()
+            broker.update_market_state(p, ts, names[s])
+            if close:
+                lat.append(clock() - t0)
+        return lat
+    return Bench("ticks", len(ticks.time), setup, run)
+
+def _pipeline(ticks):
+    """Whole PAPER stack on the synchronous path: mark, aggregate, signal, AI check, risk, fill"""
+    def setup():
+        stack = build_paper_stack(ticks.symbols, inference_service=InferenceService())
+        return stack.broker, [stack.strategies[n] for n in ticks.symbols]
+
+    def run(state):
+        broker, strategies = state
+        names = ticks.symbols
+        lat = []
+        clock = time.perf_counter_ns
+        for ts, s, p, v, close in _rows(ticks):
+            t0 = clock()
+            broker.update_market_state(p, ts, names[s])
+            strategies[s].on_price_sync(ts, p, v)
+            if close:
+                lat.append(clock() - t0)
+        return lat
+    return Bench("ticks", len(ticks.time), setup, run)
+
+def build_benchmarks(ticks: SyntheticTicks, only: Optional[List[str]] = None) -> Dict[str, Bench]:
+    factories = {
+        "aggregator": lambda: _aggregator(ticks),
+        "candle_buffer": lambda: _candle_buffer(synthetic_candles(ticks)),
+        "signals": lambda: _signals(synthetic_candles(ticks)),
+        "safe_broker": lambda: _safe_broker(ticks),
+        "broker": lambda: _broker(ticks),
+        "pipeline": lambda: _pipeline(ticks),
+    }
+    return {name: make() for name, make in factories.items() if not only or name in only}
+
+def measure(bench: Bench, memory: bool = True) -> dict:
+    """Throughput and close latency percentiles from a timed pass, peak memory from a traced one"""
+    state = bench.setup()
+    gc.collect()
+    t0 = time.perf_counter()
+    lat = bench.run(state)
+    elapsed = time.perf_counter() - t0
+    del state
+
+    lat_us = np.asarray(lat, dtype=np.float64) / 1000.0
+    result = {
+        "unit": bench.unit,
+        "events": bench.events,
+        "seconds": round(elapsed, 4),
+        "per_sec": round(bench.events / max(elapsed, 1e-9), 1),
+        "closes": len(lat),
+        "p50_us": round(float(np.percentile(lat_us, 50)), 2),
+        "p99_us": round(float(np.percentile(lat_us, 99)), 2),
+        "max_us": round(float(lat_us.max()), 2),
+    }
+    if memory:
+        # Tracing slows everything down, so it gets its own (untimed) pass incl. setup
+        gc.collect()
+        tracemalloc.start()
+        try:
+            bench.run(bench.setup())
+            result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    return result
+
+def run_benchmarks(ticks: SyntheticTicks, only: Optional[List[str]] = None, memory: bool = True) -> dict:
+    """-> {"meta": {...}, "results": {name: metrics}} (the baseline file format)"""
+    # Per-candle / per-fill logs would dominate every number
+    quiet = (logger, core_logger)
+    levels = [log.level for log in quiet]
+    for log in quiet:
+        log.setLevel(logging.ERROR) # Incl. risk rejection warnings of the pipeline
+    try:
+        results = {name: measure(bench, memory) for name, bench in build_benchmarks(ticks, only).items()}
+    finally:
+        for log, level in zip(quiet, levels):
+            log.setLevel(level)
+    meta = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "symbols": len(ticks.symbols),
+        "ticks": len(ticks.time),
+        "buffer_size": BUFFER_SIZE,
+    }
+    return {"meta": meta, "results": results}
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> List[str]:
+    """Regressions of more than `threshold` (fraction) vs the baseline, as readable lines"""
+    regressions = []
+    for name, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            new, old = metrics.get(metric), base.get(metric)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+def save_baseline(report: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    meta = report["meta"]
+    print(f"\n=== Hot Path Benchmark ({meta['symbols']} symbols, {meta['ticks']} ticks, {meta['buffer_size']}-candle buffers) ===")
+    print(f"{'component':<14}{'throughput':>22}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'peak MB':>10}{'vs base':>10}")
+    for name, m in report["results"].items():
+        base = (baseline or {}).get("results", {}).get(name)
+        delta = f"{m['per_sec'] / base['per_sec'] - 1:+.1%}" if base else "-"
+        print(f"{name:<14}{m['per_sec']:>14,.0f} {m['unit'] + '/s':>8}{m['p50_us']:>10.2f}{m['p99_us']:>10.2f}"
+              f"{m['max_us']:>10.1f}{m.get('peak_mb', float('nan')):>10.2f}{delta:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gaia hot path benchmark (tick -> candle -> signal -> order)")
+    parser.add_argument("--symbols", type=int, default=SYMBOLS, help="Symbols ticking round-robin")
+    parser.add_argument("--minutes", type=int, default=2000, help="Minutes of synthetic data (> buffer size to wrap the rings)")
+    parser.add_argument("--ticks-per-minute", type=int, default=4, help="Ticks per symbol per minute")
+    parser.add_argument("--only", default=None, help="Comma-separated components to run")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slow) tracemalloc pass")
+    parser.add_argument("--baseline", default="data/benchmarks/baseline.json", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed regression vs baseline (fraction)")
+    parser.add_argument("--save", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    ticks = synthetic_ticks(args.symbols, args.minutes, args.ticks_per_minute)
+    report = run_benchmarks(ticks, args.only.split(",") if args.only else None, memory=not args.no_memory)
+    baseline = load_baseline(args.baseline)
+    print_report(report, baseline)
+
+    regressions = compare(report, baseline, args.threshold) if baseline else []
+    if regressions:
+        print(f"\nRegressions (> {args.threshold:.0%} vs {args.baseline}):")
+        for line in regressions:
+            print(f"  {line}")
+    elif baseline:
+        print(f"\nNo regression > {args.threshold:.0%} vs {args.baseline}")
+    if args.save:
+        save_baseline(report, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    raise SystemExit(1 if regressions else 0)
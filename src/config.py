@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -26,6 +26,25 @@ class Settings(BaseSettings):
         "PI_LTCUSD", "PI_LINKUSD", "PI_AAVEUSD", "PI_AVAXUSD", "PI_CHZUSD"
     ], description="Symbols to subscribe to")
 
+    # Candle Close (Live)
+    CANDLE_TIMER_ENABLED: bool = Field(default=True, description="Close candles on a wall-clock timer instead of on the next tick")
+    CANDLE_CLOSE_GRACE_SECONDS: float = Field(default=2.0, description="Wait for late ticks this long after a candle boundary")
+
+    # AI Inference
+    INFERENCE_BACKEND: str = Field(default="auto", description="auto (TFLite, else the NumPy export), tflite or numpy")
+    INFERENCE_BATCH_WINDOW_MS: float = Field(default=2.0, description="Collect concurrent predict() calls this long into one batched invoke (0 = off)")
+    INFERENCE_POOL_SIZE: int = Field(default=0, description="TFLite interpreters (one thread each), 0 = one per CPU core")
+    INFERENCE_MAX_BATCH: int = Field(default=32, description="Flush a micro-batch early once it holds this many requests")
+    INFERENCE_CACHE_SIZE: int = Field(default=4096, description="Scores of recent feature vectors kept (LRU), 0 = off")
+    INFERENCE_MODELS: Dict[str, str] = Field(default={}, description='Per-symbol models, e.g. {"PI_XBTUSD": "models/xbt.tflite", "PI_ETHUSD:5": "models/eth_5m.tflite"}; others use models/model.tflite')
+    INFERENCE_MEMORY_BUDGET_MB: float = Field(default=64.0, description="Loaded per-symbol models are evicted (LRU) above this estimated size")
+
+    # Paper / Backtest Reporting
+    EQUITY_SAMPLE_SECONDS: float = Field(default=60.0, description="Cadence of the recorded equity curve")
+    TICK_CACHE_DIR: str = Field(default="data/cache", description="Binary (memmap) cache of backtest recordings")
+    BACKTEST_CHECKPOINT_EVERY: int = Field(default=1_000_000, description="Rows replayed between backtest checkpoints (--checkpoint)")
+    BACKTEST_INTRABAR_RULE: str = Field(default="ohlc", description="Bar mode fill order when a bar touches both SL and TP: ohlc, stop_first, limit_first, nearest")
+
     from pydantic import field_validator
 
     @field_validator("TELEGRAM_ALLOWED_IDS", mode="before")
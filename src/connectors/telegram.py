@@ -4,6 +4,7 @@ from telegram import Update
 from telegram.ext import Application, ApplicationBuilder, ContextTypes, CommandHandler
 from src.config import settings
 from src.core.logger import logger
+from src.core.model_registry import ModelRegistry
 
 def authorized_only(func):
     """Decorator to check if user is in ALLOWED_IDS"""
@@ -31,7 +32,7 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if telegram_service.broker:
         try:
             stats = telegram_service.broker.get_stats()
-            # Stats: equity, pnl, trades_count, positions
+            # Stats: equity, pnl, trades_count, turnover, positions
             equity = stats.get('equity', 0.0)
             pnl = stats.get('pnl', 0.0)
             trades = stats.get('trades_count', 0)
@@ -41,6 +42,10 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             msg.append(f"{icon} PnL: ${pnl:.2f}")
             msg.append(f"💰 Equity: ${equity:.2f}")
             msg.append(f"🔢 Trades: {trades}")
+            if 'turnover' in stats:
+                msg.append(f"🔁 Turnover: ${stats['turnover']:.2f}")
+            if 'max_drawdown' in stats:
+                msg.append(f"🕳 Max DD: {stats['max_drawdown'] * 100:.2f}% | Sharpe: {stats['sharpe']:.2f}")
             
             if positions:
                 pos_list = [f"{sym}: {amt:.4f}" for sym, amt in positions.items()]
@@ -50,6 +55,13 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 
         except Exception as e:
             msg.append(f"⚠️ Data Error: {e}")
+
+    if isinstance(telegram_service.inference, ModelRegistry):
+        ai = telegram_service.inference.stats()
+        msg.append(f"🤖 AI Models: {len(ai['loaded'])} loaded ({ai['memory_bytes'] / 1024 / 1024:.1f}/{ai['budget_bytes'] / 1024 / 1024:.0f} MB), {ai['loads']} loads, {ai['evictions']} evictions")
+    elif telegram_service.inference and not telegram_service.inference.mock_mode:
+        ai = telegram_service.inference.stats()
+        msg.append(f"🤖 AI ({ai['backend']}) Batches: {ai['batches']} (avg {ai['avg_batch']:.1f}, max {ai['max_batch']}, window {ai['batch_window_ms']:.0f}ms, cache {ai['cache_hits']} hits)")
             
     await update.message.reply_text("\n".join(msg))
 
@@ -67,9 +79,13 @@ class TelegramService:
     def __init__(self):
         self.app: Application | None = None
         self.broker = None
+        self.inference = None
         
     def set_broker(self, broker):
         self.broker = broker
+
+    def set_inference(self, inference_service):
+        self.inference = inference_service
     
     async def start(self):
         if not settings.TELEGRAM_TOKEN:
@@ -2,6 +2,13 @@ from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any, List
 from src.core.logger import logger
 import uuid
+import heapq
+import numpy as np
+import asyncio
+from src.core.ledger import TradeLedger
+from src.core.equity import EquityCurve
+from src.core.models import timestamp_ns
+from src.config import settings
 
 class IBroker(ABC):
     @abstractmethod
@@ -12,70 +19,190 @@ class IBroker(ABC):
     def get_position(self, symbol: str) -> float:
         pass
 
+    def place_order_sync(self, symbol: str, side: str, order_type: str, size: float, price: Optional[float] = None, params: Optional[Dict[str, Any]] = None):
+        """Blocking variant for offline drivers (backtests). Only simulated brokers implement it."""
+        raise NotImplementedError(f"{type(self).__name__} has no synchronous execution path")
+
+class TriggerBook:
+    """
+    Price-indexed book of resting stop/limit orders.
+
+    Per symbol, orders are split by trigger direction into two heaps:
+    - "down" (sell stop, buy limit): fire when price <= trigger -> max-heap on trigger
+    - "up" (sell limit, buy stop): fire when price >= trigger -> min-heap on trigger
+    so a tick only pops the orders it actually fills: O(log n + fills) instead of a scan
+    over every open order. Cancelled orders (OCO siblings) are dropped lazily when they
+    reach the top of a heap; `siblings` maps bracket_id -> order seqs.
+    """
+    def __init__(self):
+        self.orders = {} # {seq: order} - insertion ordered
+        self.siblings = {} # {bracket_id: [seq, ...]}
+        self._down = {} # {symbol: [(-trigger, seq)]}
+        self._up = {} # {symbol: [(trigger, seq)]}
+        self._seq = 0
+        self._stale = 0
+
+    def __len__(self):
+        return len(self.orders)
+
+    def add(self, order: dict) -> int:
+        seq = self._seq
+        self._seq += 1
+        self.orders[seq] = order
+        if 'bracket_id' in order:
+            self.siblings.setdefault(order['bracket_id'], []).append(seq)
+
+        trigger = order['price']
+        if trigger != trigger:
+            return seq # NaN never triggers
+        fires_down = (order['side'] == 'sell') == (order['type'] == 'stop')
+        if fires_down:
+            heapq.heappush(self._down.setdefault(order['symbol'], []), (-trigger, seq))
+        else:
+            heapq.heappush(self._up.setdefault(order['symbol'], []), (trigger, seq))
+        return seq
+
+    def pop_triggered(self, symbol: str, price: float) -> List[dict]:
+        """Remove and return the orders filled at `price`, in placement order"""
+        fired = []
+        heap = self._down.get(symbol)
+        while heap and -heap[0][0] >= price:
+            self._take(heapq.heappop(heap)[1], fired)
+        heap = self._up.get(symbol)
+        while heap and heap[0][0] <= price:
+            self._take(heapq.heappop(heap)[1], fired)
+        fired.sort()
+        return [order for _, order in fired]
+
+    def _take(self, seq, fired):
+        order = self.orders.pop(seq, None)
+        if order is None:
+            self._stale -= 1 # Cancelled earlier
+        else:
+            fired.append((seq, order))
+
+    def cancel_bracket(self, bracket_id):
+        for seq in self.siblings.pop(bracket_id, ()):
+            order = self.orders.pop(seq, None)
+            if order is not None and order['price'] == order['price']:
+                self._stale += 1 # Still sitting in a heap
+        # Rebuild once dead entries dominate so memory stays bounded by open orders
+        if self._stale > len(self.orders) + 64:
+            self._compact()
+
+    def _compact(self):
+        for book in (self._down, self._up):
+            for symbol, heap in book.items():
+                live = [entry for entry in heap if entry[1] in self.orders]
+                heapq.heapify(live)
+                book[symbol] = live
+        self._stale = 0
+
 class BacktestBroker(IBroker):
-    def __init__(self, initial_balance=10000.0):
+    def __init__(self, initial_balance=10000.0, equity_sample_seconds: Optional[float] = None):
         self.initial_balance = initial_balance
         self.balance = initial_balance
-        self.trades = []
+        self.equity = initial_balance # Balance + sum(position * last price), kept incrementally
+        self.trades = TradeLedger() # Columnar fills
         self.positions = {} # {symbol: size} - Multi-symbol support
         self.last_prices = {}
         self.notifier = None # {symbol: price}
+        self._notify_tasks = set() # In-flight notifications (the loop only keeps weak references)
         self.current_time = None
         
-        # Bracket Management
-        self.active_orders = [] # List of dicts representing open Limit/Stop orders
+        # Bracket Management: open Limit/Stop orders indexed by trigger price
+        self.trigger_book = TriggerBook()
+
+        if equity_sample_seconds is None:
+            equity_sample_seconds = settings.EQUITY_SAMPLE_SECONDS
+        self.equity_curve = EquityCurve(int(equity_sample_seconds * 1e9))
+
+    @property
+    def active_orders(self) -> List[dict]:
+        """Open Limit/Stop orders (dicts), in placement order"""
+        return list(self.trigger_book.orders.values())
 
     def update_market_state(self, price: float, timestamp, symbol: str):
-        self.last_prices[symbol] = price
         self.current_time = timestamp
+        self._on_price(price, timestamp, timestamp_ns(timestamp), symbol)
+
+    def _on_price(self, price: float, timestamp, time_ns: int, symbol: str):
+        # Mark to market: only this symbol's price moved
+        pos = self.positions.get(symbol, 0.0)
+        if pos != 0:
+            self.equity += pos * (price - self.last_prices.get(symbol, price))
+        self.last_prices[symbol] = price
         self._check_triggers(price, timestamp, symbol)
+        self.equity_curve.update(time_ns, self.equity)
+
+    def process_bar(self, symbol: str, open: float, high: float, low: float, close: float, timestamp,
+                    rule: Optional[str] = None, opened: bool = False):
+        """
+        Bar mode: replay one OHLC bar as a short price path so stop/limit triggers
+        resolve from its high/low with the usual tick semantics (fills at the path price).
+        `rule` decides which extreme is visited first (see bar_path). `opened=True` skips
+        the open if it was already sent through update_market_state.
+        """
+        self.current_time = timestamp
+        time_ns = timestamp_ns(timestamp)
+        path = self.bar_path(symbol, open, high, low, close, rule)
+        for price in (path[1:] if opened else path):
+            self._on_price(price, timestamp, time_ns, symbol)
+
+    def bar_path(self, symbol: str, open: float, high: float, low: float, close: float,
+                 rule: Optional[str] = None):
+        """
+        Intra-bar price path for `rule`:
+        - "ohlc": open -> high -> low -> close (same order as the synthetic 4-tick history)
+        - "stop_first": visit the extreme against the open position first (pessimistic)
+        - "limit_first": visit the extreme in favour of the open position first (optimistic)
+        - "nearest": visit the extreme closer to the open first
+        stop_first/limit_first fall back to "ohlc" when flat.
+        """
+        rule = rule or settings.BACKTEST_INTRABAR_RULE
+        high_first = True
+        if rule in ("stop_first", "limit_first"):
+            pos = self.positions.get(symbol, 0.0)
+            if pos != 0:
+                # Long: stops sit below (low first when pessimistic)
+                high_first = (pos < 0) == (rule == "stop_first")
+        elif rule == "nearest":
+            high_first = (high - open) <= (open - low)
+        elif rule != "ohlc":
+            raise ValueError(f"Unknown intra-bar rule: {rule}")
+
+        if high_first:
+            return (open, high, low, close)
+        return (open, low, high, close)
 
     def _check_triggers(self, price: float, timestamp, symbol: str):
         """Check if any active orders are triggered by current price"""
+        # Sell Stop (SL for Long) / Buy Limit (TP for Short): price drops to trigger
+        # Sell Limit (TP for Long) / Buy Stop (SL for Short): price rises to trigger
+        triggered = self.trigger_book.pop_triggered(symbol, price)
+        if not triggered:
+            return
+
         filled_bracket_ids = []
-        
-        # Iterate copy to allow modification. Only check orders for THIS symbol.
-        for order in self.active_orders[:]:
-            if order.get('symbol') != symbol:
-                continue
-                
-            trigger = False
-            side = order['side']
-            trigger_price = order['price']
-            o_type = order['type']
-            
-            # Logic for STOP and LIMIT fills
-            if side == 'sell':
-                # Sell Stop (SL for Long): Price drops below trigger
-                if o_type == 'stop' and price <= trigger_price:
-                    trigger = True
-                # Sell Limit (TP for Long): Price rises above trigger
-                elif o_type == 'limit' and price >= trigger_price:
-                    trigger = True
-            elif side == 'buy':
-                # Buy Stop (SL for Short): Price rises above trigger
-                if o_type == 'stop' and price >= trigger_price:
-                    trigger = True
-                # Buy Limit (TP for Short): Price drops below trigger
-                elif o_type == 'limit' and price <= trigger_price:
-                    trigger = True
-                    
-            if trigger:
-                self._execute_trade(order['symbol'], side, order['size'], price, timestamp, o_type)
-                self.active_orders.remove(order)
-                if 'bracket_id' in order:
-                    filled_bracket_ids.append(order['bracket_id'])
+        for order in triggered:
+            self._execute_trade(order['symbol'], order['side'], order['size'], price, timestamp, order['type'])
+            if 'bracket_id' in order:
+                filled_bracket_ids.append(order['bracket_id'])
 
         # OCO Logic: Cancel siblings
-        if filled_bracket_ids:
-            self.active_orders = [o for o in self.active_orders if o.get('bracket_id') not in filled_bracket_ids]
+        for bracket_id in filled_bracket_ids:
+            self.trigger_book.cancel_bracket(bracket_id)
 
     def set_notifier(self, callback):
         self.notifier = callback
 
-    async def _execute_trade(self, symbol: str, side: str, qty: float, price: float, type_: str):
+    def _execute_trade(self, symbol: str, side: str, qty: float, price: float, timestamp, type_: str):
         cost = qty * price
         
+        # Fill vs mark difference is the only instant equity change
+        signed_qty = qty if side == "buy" else -qty
+        self.equity += signed_qty * (self.last_prices.get(symbol, price) - price)
+        
         # Simple execution logic
         if side == "buy":
             self.positions[symbol] = self.positions.get(symbol, 0.0) + qty
@@ -85,30 +212,34 @@ class BacktestBroker(IBroker):
             self.positions[symbol] = prev_pos - qty
             self.balance += cost
             
-        trade_id = str(uuid.uuid4())
-        self.trades.append({
-            "id": trade_id,
-            "symbol": symbol,
-            "side": side,
-            "qty": qty,
-            "price": price,
-            "timestamp": datetime.utcnow()
-        })
+        self.trades.append(symbol, side, qty, price, timestamp, type_)
         
         entry = f"[BACKTEST] FILLED-TRIGGER {side.upper()} {qty} {symbol} @ {price} ({type_})"
         logger.info(entry)
         
-        # Notify
+        # Notify (fire and forget, fills happen inside the sync tick path)
         if self.notifier:
             try:
-                # Format a nice message
-                icon = "🟢" if side == "buy" else "🔴"
-                msg = f"{icon} Executed: {side.upper()} {qty:.4f} {symbol} @ ${price:.2f}"
-                await self.notifier(msg)
-            except Exception as e:
-                logger.error(f"Notification failed: {e}")
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return # Offline replay: no loop to deliver on
+            # Format a nice message
+            icon = "🟢" if side == "buy" else "🔴"
+            msg = f"{icon} Executed: {side.upper()} {qty:.4f} {symbol} @ ${price:.2f}"
+            task = loop.create_task(self.notifier(msg))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_done)
+
+    def _notify_done(self, task):
+        self._notify_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Notification failed: {task.exception()}")
 
     async def place_order(self, symbol: str, side: str, order_type: str, size: float, price: Optional[float] = None, params: Optional[Dict[str, Any]] = None):
+        self.place_order_sync(symbol, side, order_type, size, price, params)
+
+    def place_order_sync(self, symbol: str, side: str, order_type: str, size: float, price: Optional[float] = None, params: Optional[Dict[str, Any]] = None):
+        # Fills are immediate: nothing here needs the event loop
         last_price = self.last_prices.get(symbol, 0.0)
         if last_price <= 0:
             logger.warning(f"Cannot place order for {symbol}: No price data yet.")
@@ -128,14 +259,14 @@ class BacktestBroker(IBroker):
                 exit_side = "sell" if side == "buy" else "buy"
                 
                 if sl_price:
-                    self.active_orders.append({
+                    self.trigger_book.add({
                         "symbol": symbol, "side": exit_side, "size": size,
                         "price": sl_price, "type": "stop", "bracket_id": bracket_id
                     })
                     logger.info(f"[BACKTEST] PLACED STOP {exit_side} {symbol} @ {sl_price}")
                     
                 if tp_price:
-                    self.active_orders.append({
+                    self.trigger_book.add({
                         "symbol": symbol, "side": exit_side, "size": size,
                         "price": tp_price, "type": "limit", "bracket_id": bracket_id
                     })
@@ -145,18 +276,32 @@ class BacktestBroker(IBroker):
         return self.positions.get(symbol, 0.0)
 
     def get_stats(self):
-        # Calculate Equity: Balance + Sum(Position * LastPrice)
-        equity = self.balance
-        for sym, pos in self.positions.items():
-            if pos != 0:
-                price = self.last_prices.get(sym, 0.0)
-                equity += (pos * price)
-                
+        equity = self.equity
         pnl = equity - self.initial_balance
         return {
             "equity": equity,
             "balance": self.balance,
             "pnl": pnl,
             "trades_count": len(self.trades),
+            "turnover": self.trades.turnover,
+            "max_drawdown": self.equity_curve.max_drawdown,
+            "sharpe": self.equity_curve.sharpe,
             "positions": {k:v for k,v in self.positions.items() if v != 0}
         }
+
+    def pnl_by_symbol(self) -> Dict[str, float]:
+        """Realized + unrealized PnL per traded symbol (vectorized over the ledger)"""
+        t = self.trades
+        cash = np.bincount(t.symbol_ids, weights=-(t.side * t.qty * t.price), minlength=len(t.symbols))
+        return {
+            sym: float(cash[i]) + self.positions.get(sym, 0.0) * self.last_prices.get(sym, 0.0)
+            for i, sym in enumerate(t.symbols)
+        }
+
+    def mark_equity(self) -> float:
+        """Full recomputation of equity (reference for the incremental value)"""
+        equity = self.balance
+        for sym, pos in self.positions.items():
+            if pos != 0:
+                equity += pos * self.last_prices.get(sym, 0.0)
+        return equity
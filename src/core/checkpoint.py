@@ -0,0 +1,62 @@
+import os
+import gzip
+import pickle
+from typing import Dict, Optional
+
+# Bumped whenever the captured state changes shape
+VERSION = 1
+
+# BacktestBroker attributes that make up the account (notifier / config are not state)
+BROKER_STATE = ("initial_balance", "balance", "equity", "positions", "last_prices", "current_time",
+                "trigger_book", "trades", "equity_curve")
+
+DEFAULT = "<default>" # Param not passed: the strategy's own default
+
+def capture(broker, strategy, offset: int, source: dict, params: Optional[dict] = None, pending=None) -> dict:
+    """
+    Full replay state after `offset` rows of `source` were processed: account (balance,
+    positions, resting orders, ledger, equity curve), the aggregator's partial candle,
+    the candle buffers with their streaming indicators, and the strategy parameters.
+    `pending` is the bar mode's not yet delivered candle.
+    """
+    return {
+        "version": VERSION,
+        "offset": offset,
+        "source": source,
+        "params": dict(params or {}),
+        "broker": {name: getattr(broker, name) for name in BROKER_STATE},
+        "aggregator": strategy.aggregator,
+        "timeframe_candles": strategy.timeframe_candles, # Primary buffer included
+        "pending": pending,
+    }
+
+def restore(state: dict, broker, strategy):
+    """Load a captured state into a fresh broker / strategy pair (the strategy trades on `broker`)"""
+    for name, value in state["broker"].items():
+        setattr(broker, name, value)
+    strategy.aggregator = state["aggregator"]
+    strategy.timeframe_candles = state["timeframe_candles"]
+    strategy.candles = strategy.timeframe_candles[strategy.timeframes[0]]
+    strategy.on_restore()
+
+def params_diff(saved: dict, current: dict) -> Dict[str, tuple]:
+    """{param: (at capture, now)} for every strategy param that changed ("<default>" = not set)"""
+    keys = sorted(set(saved) | set(current))
+    return {k: (saved.get(k, DEFAULT), current.get(k, DEFAULT)) for k in keys
+            if saved.get(k, DEFAULT) != current.get(k, DEFAULT)}
+
+def save(path: str, state: dict):
+    """Compressed pickle, written atomically (a crash mid-write keeps the previous checkpoint)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wb", compresslevel=3) as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def load(path: str) -> dict:
+    """Only load checkpoints you wrote: this unpickles"""
+    with gzip.open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != VERSION:
+        raise ValueError(f"Checkpoint {path} has version {state.get('version')}, expected {VERSION}")
+    return state
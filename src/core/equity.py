@@ -0,0 +1,76 @@
+import math
+import numpy as np
+
+YEAR_NS = 365 * 24 * 3600 * 1_000_000_000 # Crypto trades 24/7
+
+class EquityCurve:
+    """
+    Equity sampled at a fixed cadence into a compact growable array, plus O(1) running
+    risk figures: peak, max drawdown (fraction of peak, checked on every update) and
+    the mean/variance of per-sample returns (Welford) for an annualised Sharpe ratio.
+    """
+    def __init__(self, interval_ns: int, capacity: int = 4096):
+        self.interval_ns = max(1, int(interval_ns))
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self._len = 0
+        self._next_ns = None
+
+        self.peak = None
+        self.max_drawdown = 0.0
+        self._n_returns = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self):
+        return self._len
+
+    def update(self, time_ns: int, equity: float):
+        if self.peak is None or equity > self.peak:
+            self.peak = equity
+        elif self.peak > 0:
+            dd = (self.peak - equity) / self.peak
+            if dd > self.max_drawdown:
+                self.max_drawdown = dd
+
+        if self._next_ns is None or time_ns >= self._next_ns:
+            self._sample(time_ns, equity)
+            # Snap to the cadence grid so gaps do not shift the schedule
+            self._next_ns = (time_ns // self.interval_ns + 1) * self.interval_ns
+
+    def _sample(self, time_ns: int, equity: float):
+        if self._len == len(self.values):
+            self.times = np.concatenate([self.times, np.zeros_like(self.times)])
+            self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+        if self._len > 0:
+            prev = self.values[self._len - 1]
+            if prev != 0:
+                r = equity / prev - 1.0
+                self._n_returns += 1
+                delta = r - self._mean
+                self._mean += delta / self._n_returns
+                self._m2 += delta * (r - self._mean)
+        self.times[self._len] = time_ns
+        self.values[self._len] = equity
+        self._len += 1
+
+    @property
+    def sharpe(self) -> float:
+        """Annualised Sharpe of the sampled returns (risk free = 0), NaN until defined"""
+        if self._n_returns < 2:
+            return math.nan
+        std = math.sqrt(self._m2 / (self._n_returns - 1))
+        if std == 0:
+            return math.nan
+        return self._mean / std * math.sqrt(YEAR_NS / self.interval_ns)
+
+    def series(self):
+        """(times, values) views of the samples so far"""
+        return self.times[:self._len], self.values[:self._len]
+
+    def drawdowns(self) -> np.ndarray:
+        """Drawdown (fraction of running peak) at every sample"""
+        values = self.values[:self._len]
+        peaks = np.maximum.accumulate(values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(peaks > 0, (peaks - values) / peaks, 0.0)
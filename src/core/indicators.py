@@ -0,0 +1,254 @@
+import math
+from collections import deque
+import numpy as np
+
+NaN = float("nan")
+
+class _History:
+    """Fixed-size float64 ring (mirrored writes so the history is one contiguous view)"""
+    def __init__(self, size: int):
+        self.size = size
+        self._data = np.full(2 * size, np.nan, dtype=np.float64)
+        self._start = 0
+        self._len = 0
+
+    def append(self, value: float):
+        n = self.size
+        if self._len < n:
+            slot = self._len
+            self._len += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % n
+        self._data[slot] = value
+        self._data[slot + n] = value
+
+    def replace_last(self, value: float):
+        slot = (self._start + self._len - 1) % self.size
+        self._data[slot] = value
+        self._data[slot + self.size] = value
+
+    def view(self) -> np.ndarray:
+        return self._data[self._start:self._start + self._len]
+
+class Indicator:
+    """
+    Base class for streaming indicators.
+
+    Each indicator keeps running state and is updated in O(1) per appended candle.
+    `value` is the latest output; `history` (optional, last `history` outputs) is a
+    zero-copy view, oldest -> newest.
+
+    Outputs match the pandas formulas in CandleBuffer bit-for-bit for the same input
+    sequence. Note that the pandas versions only see the candles still in the buffer,
+    while a streaming indicator has seen every candle since it was registered.
+    """
+    field = 3 # Column of the OHLCV row the indicator consumes (close)
+
+    def __init__(self, history: int = 0):
+        self.value = NaN
+        self._history = _History(history) if history > 0 else None
+        self._undo = None
+
+    @property
+    def history(self) -> np.ndarray:
+        if self._history is None:
+            return np.empty(0, dtype=np.float64)
+        return self._history.view()
+
+    def update(self, x: float) -> float:
+        self._undo = self._snapshot()
+        self.value = self._step(x)
+        if self._history is not None:
+            self._history.append(self.value)
+        return self.value
+
+    def replace_last(self, x: float) -> float:
+        """Re-apply the last update with a new input (same candle received twice)"""
+        if self._undo is None:
+            return self.update(x)
+        self._restore(self._undo)
+        self.value = self._step(x)
+        if self._history is not None:
+            self._history.replace_last(self.value)
+        return self.value
+
+    # --- Subclass hooks ---
+
+    def _step(self, x: float) -> float:
+        raise NotImplementedError
+
+    def _snapshot(self):
+        raise NotImplementedError
+
+    def _restore(self, state):
+        raise NotImplementedError
+
+class SMA(Indicator):
+    """
+    Simple Moving Average, same as close.rolling(window=period).mean().
+
+    Replicates pandas' roll_mean: Kahan-compensated running sum with separate add/remove
+    compensation, sign counters and the constant-window shortcut.
+    """
+    def __init__(self, period: int = 20, history: int = 0):
+        super().__init__(history)
+        self.period = period
+        self._window = deque()
+        self._nobs = 0
+        self._neg_ct = 0
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same_count = 0
+        self._prev_value = NaN
+
+    def _add(self, val: float):
+        if val == val:
+            self._nobs += 1
+            y = val - self._comp_add
+            t = self._sum + y
+            self._comp_add = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, val) < 0:
+                self._neg_ct += 1
+            if val == self._prev_value:
+                self._same_count += 1
+            else:
+                self._same_count = 1
+            self._prev_value = val
+
+    def _remove(self, val: float):
+        if val == val:
+            self._nobs -= 1
+            y = -val - self._comp_remove
+            t = self._sum + y
+            self._comp_remove = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, val) < 0:
+                self._neg_ct -= 1
+
+    def _step(self, x: float) -> float:
+        self._window.append(x)
+        if len(self._window) == 1 or self.period == 1:
+            # pandas re-initialises the window sum (first row, or windows that do not overlap)
+            if self.period == 1 and len(self._window) > 1:
+                self._window.popleft()
+            self._nobs = self._neg_ct = 0
+            self._sum = self._comp_add = self._comp_remove = 0.0
+            self._same_count = 0
+            self._prev_value = x
+        elif len(self._window) > self.period:
+            self._remove(self._window.popleft())
+        self._add(x)
+
+        if self._nobs >= self.period and self._nobs > 0:
+            result = self._sum / self._nobs
+            if self._same_count >= self._nobs:
+                result = self._prev_value
+            elif self._neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self._neg_ct == self._nobs and result > 0:
+                result = 0.0
+            return result
+        return NaN
+
+    def _snapshot(self):
+        dropped = self._window[0] if len(self._window) >= self.period else None
+        return (dropped, self._nobs, self._neg_ct, self._sum, self._comp_add,
+                self._comp_remove, self._same_count, self._prev_value, self.value)
+
+    def _restore(self, state):
+        dropped, self._nobs, self._neg_ct, self._sum, self._comp_add, \
+            self._comp_remove, self._same_count, self._prev_value, self.value = state
+        self._window.pop()
+        if dropped is not None and len(self._window) < self.period:
+            self._window.appendleft(dropped)
+
+class _EWMean:
+    """
+    Streaming equivalent of Series.ewm(com=com, adjust=False).mean()
+    (pandas' normalised ewm kernel, ignore_na=False, min_periods=1).
+    """
+    __slots__ = ("alpha", "old_wt_factor", "weighted", "old_wt", "nobs")
+
+    def __init__(self, com: float):
+        self.alpha = 1.0 / (1.0 + com)
+        self.old_wt_factor = 1.0 - self.alpha
+        self.weighted = None # No input yet
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, cur: float) -> float:
+        is_observation = cur == cur
+        self.nobs += is_observation
+        if self.weighted is None:
+            self.weighted = cur
+            self.old_wt = 1.0
+        elif self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                if self.weighted != cur:
+                    self.weighted = self.old_wt * self.weighted + self.alpha * cur
+                    self.weighted /= (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = cur
+        return self.weighted if self.nobs >= 1 else NaN
+
+    def state(self):
+        return (self.weighted, self.old_wt, self.nobs)
+
+    def restore(self, state):
+        self.weighted, self.old_wt, self.nobs = state
+
+class EMA(Indicator):
+    """Exponential Moving Average, same as close.ewm(span=period, adjust=False).mean()"""
+    def __init__(self, period: int = 20, history: int = 0):
+        super().__init__(history)
+        self.period = period
+        self._ewm = _EWMean(com=(period - 1) / 2)
+
+    def _step(self, x: float) -> float:
+        return self._ewm.update(x)
+
+    def _snapshot(self):
+        return (self._ewm.state(), self.value)
+
+    def _restore(self, state):
+        ewm_state, self.value = state
+        self._ewm.restore(ewm_state)
+
+class RSI(Indicator):
+    """Relative Strength Index (Wilder's Method), same as CandleBuffer.rsi()"""
+    def __init__(self, period: int = 14, history: int = 0):
+        super().__init__(history)
+        self.period = period
+        alpha = 1 / period
+        self._up = _EWMean(com=(1 - alpha) / alpha)
+        self._down = _EWMean(com=(1 - alpha) / alpha)
+        self._prev_close = NaN
+
+    def _step(self, x: float) -> float:
+        delta = x - self._prev_close
+        self._prev_close = x
+
+        up = 0.0 if delta < 0 else delta
+        down = 0.0 if delta > 0 else abs(delta)
+        roll_up = self._up.update(up)
+        roll_down = self._down.update(down)
+
+        if roll_down == 0:
+            # Mirror pandas float division: x/0 -> inf, 0/0 -> NaN
+            rs = math.inf if roll_up > 0 else NaN
+        else:
+            rs = roll_up / roll_down
+        return 100.0 - (100.0 / (1.0 + rs))
+
+    def _snapshot(self):
+        return (self._up.state(), self._down.state(), self._prev_close, self.value)
+
+    def _restore(self, state):
+        up_state, down_state, self._prev_close, self.value = state
+        self._up.restore(up_state)
+        self._down.restore(down_state)
@@ -1,49 +1,296 @@
+import os
+import hashlib
+import threading
 import numpy as np
 import logging
-from typing import Optional, List
+from collections import Counter, OrderedDict
+from typing import Optional, List, Sequence
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from src.config import settings
 
 logger = logging.getLogger("Gaia")
 
+def load_interpreter(model_path: str):
+    """TFLite interpreter for `model_path` from whichever runtime is installed (ImportError if none)"""
+    # specific import sequence to support all TFLite runtimes
+    try:
+        # 1. New Google AI Edge Runtime
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter(model_path=model_path)
+    except ImportError:
+        try:
+            # 2. Classic TFLite Runtime
+            import tflite_runtime.interpreter as tflite
+            return tflite.Interpreter(model_path=model_path)
+        except ImportError:
+            # 3. Full TensorFlow
+            import tensorflow.lite as tflite
+            return tflite.Interpreter(model_path=model_path)
+
+def quantization(details: dict):
+    """(scale, zero_point) of an integer tensor, None for float tensors (nothing to convert)"""
+    scale, zero_point = details.get('quantization', (0.0, 0))
+    if not np.issubdtype(details['dtype'], np.integer) or not scale:
+        return None
+    return float(scale), int(zero_point)
+
+class PooledInterpreter:
+    """
+    One interpreter of the pool and the thread that runs it (interpreters are not
+    thread-safe). Inputs are written straight into the interpreter's own input tensor,
+    quantized on the way in (and scores dequantized) for full-integer models.
+    """
+    def __init__(self, interpreter, capacity: int = 1):
+        self.interpreter = interpreter
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        details = interpreter.get_input_details()[0]
+        self.input_index = details['index']
+        self.n_features = int(details['shape'][-1])
+        self.input_dtype = np.dtype(details['dtype'])
+        self.input_quant = quantization(details)
+        output = interpreter.get_output_details()[0]
+        self.output_index = output['index']
+        self.output_quant = quantization(output)
+        self.invokes = 0
+        self.allocations = 0
+        # Sized once for the largest micro-batch: smaller batches use the first rows
+        self.rows = 0 # Allocated batch dimension
+        self._allocate(max(capacity, 1))
+
+    def _allocate(self, rows: int):
+        self.interpreter.resize_tensor_input(self.input_index, [rows, self.n_features])
+        self.interpreter.allocate_tensors()
+        self.rows = rows
+        self.allocations += 1
+
+    def run(self, rows: Sequence) -> np.ndarray:
+        """Score `rows` (an (n, n_features) array or n feature vectors) -> (n,) float64"""
+        n = len(rows)
+        if n > self.rows:
+            # Only offline chunks outgrow the live capacity; the buffer then stays at that size
+            self._allocate(n)
+
+        # Zero-copy view of the input buffer: the dtype cast happens in the copy itself
+        buf = self.interpreter.tensor(self.input_index)()
+        if self.input_quant:
+            scale, zero_point = self.input_quant
+            info = np.iinfo(self.input_dtype)
+            q = np.rint(np.asarray(rows, dtype=np.float32) / scale + zero_point)
+            buf[:n] = np.clip(q, info.min, info.max)
+        elif isinstance(rows, np.ndarray):
+            buf[:n] = rows
+        else:
+            for i, row in enumerate(rows):
+                buf[i] = row
+        del buf # The runtime refuses to invoke while views on its buffers are alive
+        self.interpreter.invoke()
+        self.invokes += 1
+
+        # Assume output is a single float score per row (Sigmoid/Probability)
+        output_data = self.interpreter.get_tensor(self.output_index)
+        # Rows past n hold whatever an earlier, larger batch left there: ignored
+        scores = output_data.reshape(self.rows, -1)[:n, 0].astype(np.float64)
+        if self.output_quant:
+            scale, zero_point = self.output_quant
+            scores = (scores - zero_point) * scale
+        return scores
+
+def model_identity(path: str, fallback: object) -> bytes:
+    """Digest of the model file's contents (`fallback`'s id for models not loaded from a file)"""
+    h = hashlib.blake2b(digest_size=16)
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    else:
+        h.update(f"{type(fallback).__name__}:{id(fallback)}".encode())
+    return h.digest()
+
+class FeatureCache:
+    """
+    Bounded LRU of scores keyed by model identity + the exact float32 feature bytes
+    (what the model sees), so identical windows are only ever scored once per model.
+    Shared by the event loop and the inference threads, hence the lock.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(model_id: bytes, features) -> bytes:
+        return model_id + np.ascontiguousarray(features, dtype=np.float32).tobytes()
+
+    def get(self, key: bytes) -> Optional[float]:
+        with self.lock:
+            score = self.entries.get(key)
+            if score is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return score
+
+    def put(self, key: bytes, score: float):
+        with self.lock:
+            self.entries[key] = score
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+# Dense activations train_ai's models use
+ACTIVATIONS = {
+    "relu": lambda z: np.maximum(z, 0, out=z),
+    "sigmoid": lambda z: 0.5 * (1.0 + np.tanh(0.5 * z)), # Logistic without exp overflow
+    "linear": lambda z: z,
+}
+
+class NumpyMLP:
+    """
+    Dense stack exported by train_ai as .npz (w0, b0, w1, b1, ... + activations), run as a
+    few float32 matmuls. No runtime to load and stateless, so single rows and large
+    batches go through the same vectorized forward pass.
+    """
+    def __init__(self, layers: Sequence):
+        # [(weights (n_in, n_out), bias (n_out,), activation name)]
+        self.layers = [(np.asarray(w, dtype=np.float32), np.asarray(b, dtype=np.float32), str(act))
+                       for w, b, act in layers]
+        for _, _, act in self.layers:
+            if act not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {act}")
+        self.n_features = self.layers[0][0].shape[0]
+        self.executor = ThreadPoolExecutor(max_workers=1) # Keeps live predicts off the event loop
+        self.invokes = 0
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyMLP":
+        with np.load(path) as f:
+            activations = f["activations"].tolist()
+            return cls([(f[f"w{i}"], f[f"b{i}"], act) for i, act in enumerate(activations)])
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"activations": np.array([act for _, _, act in self.layers])}
+        for i, (w, b, _) in enumerate(self.layers):
+            arrays[f"w{i}"], arrays[f"b{i}"] = w, b
+        np.savez_compressed(path, **arrays)
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """(n, n_features) -> (n, n_outputs) float32"""
+        for w, b, act in self.layers:
+            x = ACTIVATIONS[act](x @ w + b)
+        return x
+
+    def run(self, rows: Sequence) -> np.ndarray:
+        """Same contract as PooledInterpreter.run"""
+        self.invokes += 1
+        return self.forward(np.asarray(rows, dtype=np.float32))[:, 0].astype(np.float64)
+
 class InferenceService:
-    def __init__(self, model_path: str = "models/model.tflite"):
+    def __init__(self, model_path: str = "models/model.tflite", batch_window_ms: Optional[float] = None,
+                 max_batch: Optional[int] = None, pool_size: Optional[int] = None,
+                 backend: Optional[str] = None, weights_path: Optional[str] = None,
+                 cache_size: Optional[int] = None):
         self.model_path = model_path
+        # NumPy export written by train_ai next to the .tflite
+        self.weights_path = weights_path or os.path.splitext(model_path)[0] + ".npz"
+        self.backend = "mock"
         self.interpreter = None
         self.input_details = None
         self.output_details = None
-        # Run inference in a dedicated thread to avoid blocking the async loop
-        self._executor = ThreadPoolExecutor(max_workers=1)
+        # Run inference on dedicated threads (one per interpreter) to avoid blocking the async loop
+        self.pool = [] # PooledInterpreters, or the NumpyMLP
+        self._next = 0
         self.mock_mode = False
+        self.model_id = b""
+
+        # Scores of recently seen feature vectors (both AI branches of a candle, repeated runs)
+        if cache_size is None:
+            cache_size = settings.INFERENCE_CACHE_SIZE
+        self.cache = FeatureCache(cache_size) if cache_size > 0 else None
 
+        # Micro-batching: predict() calls arriving within the window share one invoke
+        if batch_window_ms is None:
+            batch_window_ms = settings.INFERENCE_BATCH_WINDOW_MS
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch or settings.INFERENCE_MAX_BATCH
+        self._pending = [] # (features, future, cache key)
+        self._flush_handle = None
+        self.batches = 0
+        self.batched_requests = 0
+        self.batch_sizes = Counter()
+
+        # One interpreter per core by default: concurrent signals do not queue behind each other
+        if pool_size is None:
+            pool_size = settings.INFERENCE_POOL_SIZE or os.cpu_count() or 1
+
+        backend = backend or settings.INFERENCE_BACKEND
         try:
-            # specific import sequence to support all TFLite runtimes
-            try:
-                # 1. New Google AI Edge Runtime
-                from ai_edge_litert.interpreter import Interpreter
-                self.interpreter = Interpreter(model_path=self.model_path)
-            except ImportError:
+            if backend == "numpy":
+                self.use_numpy(NumpyMLP.load(self.weights_path))
+            else:
                 try:
-                    # 2. Classic TFLite Runtime
-                    import tflite_runtime.interpreter as tflite
-                    self.interpreter = tflite.Interpreter(model_path=self.model_path)
+                    self.use_interpreters([load_interpreter(self.model_path) for _ in range(pool_size)])
+                    logger.info(f"TFLite Model loaded from {self.model_path} ({pool_size} interpreters)")
                 except ImportError:
-                    # 3. Full TensorFlow
-                    import tensorflow.lite as tflite
-                    self.interpreter = tflite.Interpreter(model_path=self.model_path)
-            self.interpreter.allocate_tensors()
-            self.input_details = self.interpreter.get_input_details()
-            self.output_details = self.interpreter.get_output_details()
-            logger.info(f"TFLite Model loaded from {self.model_path}")
+                    if backend == "tflite" or not os.path.exists(self.weights_path):
+                        raise
+                    logger.info("TFLite runtime not found, falling back to the NumPy backend.")
+                    self.use_numpy(NumpyMLP.load(self.weights_path))
 
         except ImportError:
-            logger.warning("TFLite runtime not found (install 'tflite-runtime'). InferenceService running in MOCK mode.")
+            logger.warning(f"TFLite runtime not found (install 'tflite-runtime') and no NumPy export at {self.weights_path}. InferenceService running in MOCK mode.")
             self.mock_mode = True
         except Exception as e:
             # Also catch file not found or bad model format
             logger.warning(f"Failed to load model from {self.model_path}: {e}. Running in MOCK mode.")
             self.mock_mode = True
 
+    def use_interpreters(self, interpreters: Sequence):
+        """Serve predictions from these (already created) interpreters"""
+        self.pool = [PooledInterpreter(i, self.max_batch) for i in interpreters]
+        self.interpreter = self.pool[0].interpreter
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        self.model_id = model_identity(self.model_path, self.interpreter)
+        self.backend = "tflite"
+        self.mock_mode = False
+
+    def use_numpy(self, model: NumpyMLP):
+        """Serve predictions from the NumPy forward pass (one member: it is fully vectorized)"""
+        self.pool = [model]
+        self.interpreter = None
+        self.input_details = self.output_details = None
+        self.model_id = model_identity(self.weights_path, model)
+        self.backend = "numpy"
+        self.mock_mode = False
+        logger.info(f"NumPy MLP loaded from {self.weights_path} ({len(model.layers)} layers)")
+
+    def memory_bytes(self) -> int:
+        """Estimated resident size of the loaded model (weights held by each interpreter + input buffers)"""
+        if self.mock_mode:
+            return 0
+        if self.backend == "numpy":
+            return sum(w.nbytes + b.nbytes for w, b, _ in self.pool[0].layers)
+        size = os.path.getsize(self.model_path) if os.path.isfile(self.model_path) else 0
+        return sum(size + m.rows * m.n_features * m.input_dtype.itemsize for m in self.pool)
+
+    def close(self):
+        """Release the inference threads (already submitted work still completes)"""
+        for member in self.pool:
+            member.executor.shutdown(wait=False)
+
+    def _pick(self):
+        # Round robin: equal-cost requests spread evenly over the pool
+        member = self.pool[self._next % len(self.pool)]
+        self._next += 1
+        return member
+
     async def predict(self, features: List[float]) -> float:
         """
         Run inference asynchronously.
@@ -52,32 +299,130 @@ class InferenceService:
         if self.mock_mode:
             # Mock Logic: Return a safe high score to allow signals to pass during testing
             return 0.95
+
+        key = self._cache_key(features)
+        if key is not None:
+            score = self.cache.get(key)
+            if score is not None:
+                return score
             
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(self._executor, self._predict_sync, features)
+        if self.batch_window <= 0:
+            member = self._pick()
+            return await loop.run_in_executor(member.executor, self._predict_on, member, features, key)
+
+        future = loop.create_future()
+        self._pending.append((features, future, key))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        """Window elapsed (or batch full): score every pending request with one invoke"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.batch_sizes[len(batch)] += 1
+
+        member = self._pick()
+        done = asyncio.get_running_loop().run_in_executor(
+            member.executor, self._score_batch, member, [f for f, _, _ in batch], [k for _, _, k in batch])
+
+        def resolve(done):
+            scores = done.result() # _score_batch does not raise
+            for (_, future, _), score in zip(batch, scores.tolist()):
+                if not future.done(): # Caller may have been cancelled
+                    future.set_result(score)
+        done.add_done_callback(resolve)
+
+    def _score_batch(self, member, rows: Sequence, keys: Sequence) -> np.ndarray:
+        try:
+            scores = member.run(rows)
+        except Exception as e:
+            logger.error(f"Inference Error: {e}")
+            return np.zeros(len(rows)) # Same fallback as _predict_on (not cached)
+        if self.cache is not None:
+            for key, score in zip(keys, scores.tolist()):
+                self.cache.put(key, score)
+        return scores
+
+    def _cache_key(self, features) -> Optional[bytes]:
+        return FeatureCache.key(self.model_id, features) if self.cache is not None else None
 
-    def _predict_sync(self, features: List[float]) -> float:
+    def stats(self) -> dict:
+        """Micro-batching / pool / cache metrics"""
+        return {
+            "backend": self.backend,
+            "batch_window_ms": self.batch_window * 1000.0,
+            "batches": self.batches,
+            "requests": self.batched_requests,
+            "avg_batch": self.batched_requests / self.batches if self.batches else 0.0,
+            "max_batch": max(self.batch_sizes, default=0),
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "pool_size": len(self.pool),
+            "invokes": [m.invokes for m in self.pool],
+            "cache_size": len(self.cache) if self.cache is not None else 0,
+            "cache_hits": self.cache.hits if self.cache is not None else 0,
+            "cache_misses": self.cache.misses if self.cache is not None else 0,
+        }
+
+    def predict_sync(self, features: List[float]) -> float:
+        """Same as predict() but inline on the caller's thread (offline runs, no event loop)"""
+        if self.mock_mode:
+            return 0.95
+        key = self._cache_key(features)
+        if key is not None:
+            score = self.cache.get(key)
+            if score is not None:
+                return score
+        # Offline callers own the service: the first interpreter, on the caller's thread
+        return self._predict_on(self.pool[0], features, key)
+
+    def predict_batch(self, features: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        """
+        Score many feature vectors (n, n_features) -> (n,) float64, for offline precomputation.
+        Each invoke scores a chunk of up to `batch_size` rows. Not to be mixed with
+        concurrent predict() calls on the same service. Batches that fit in the cache
+        only score the rows it does not hold (larger ones would just flush it).
+        """
+        features = np.asarray(features)
+        if self.mock_mode:
+            return np.full(len(features), 0.95)
+        if self.cache is None or len(features) > self.cache.capacity:
+            return self._run_chunks(features, batch_size)
+
+        keys = [FeatureCache.key(self.model_id, row) for row in features]
+        cached = [self.cache.get(key) for key in keys]
+        scores = np.array([np.nan if score is None else score for score in cached], dtype=np.float64)
+        missing = [i for i, score in enumerate(cached) if score is None]
+        if missing:
+            fresh = self._run_chunks(features[missing], batch_size)
+            scores[missing] = fresh
+            for i, score in zip(missing, fresh.tolist()):
+                self.cache.put(keys[i], score)
+        return scores
+
+    def _run_chunks(self, features: np.ndarray, batch_size: int) -> np.ndarray:
+        member = self.pool[0]
+        scores = np.empty(len(features), dtype=np.float64)
+        for start in range(0, len(features), batch_size):
+            scores[start:start + batch_size] = member.run(features[start:start + batch_size])
+        return scores
+
+    def _predict_on(self, member, features: List[float], key: Optional[bytes] = None) -> float:
         try:
-            # Prepare input: convert list to numpy array with shape [1, N]
             # We assume features match the model's required input size
-            input_data = np.array([features], dtype=np.float32)
-            
-            # Check input shape compatibility (basic check)
-            required_shape = self.input_details[0]['shape']
-            # input_data.shape should match required_shape (usually [1, n_features])
-            
-            self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-            self.interpreter.invoke()
-            
-            # Get output
-            output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
-            
-            # Assume output is a single float score (Sigmoid/Probability)
-            result = float(output_data[0]) 
-            if isinstance(output_data[0], (np.ndarray, list)):
-                 result = float(output_data[0][0])
-                 
-            return result
+            score = float(member.run((features,))[0])
         except Exception as e:
             logger.error(f"Inference Error: {e}")
             return 0.0
+        if key is not None:
+            self.cache.put(key, score)
+        return score
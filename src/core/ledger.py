@@ -0,0 +1,165 @@
+from typing import Dict
+import numpy as np
+import pandas as pd
+from src.core.models import timestamp_ns
+
+SIDES = {"buy": 1, "sell": -1}
+ORDER_TYPES = ("market", "stop", "limit")
+
+class TradeLedger:
+    """
+    Append-only columnar record of fills.
+
+    Columns are preallocated typed arrays that double in capacity when full:
+    symbol id (int32, see `symbols`), side (int8, +1 buy / -1 sell), qty, price (float64),
+    time (int64 epoch ns) and order type (int8, index into ORDER_TYPES).
+    Column properties and `to_frame()` are zero-copy views of the filled part, and a few
+    running aggregates are kept so stats never have to walk the fills.
+    """
+    def __init__(self, capacity: int = 1024):
+        self.symbols = [] # id -> symbol
+        self._symbol_ids: Dict[str, int] = {}
+        self._len = 0
+        self._alloc(max(1, capacity))
+
+        # Running aggregates
+        self.buy_count = 0
+        self.sell_count = 0
+        self.turnover = 0.0 # Sum of |qty * price|
+
+    def _alloc(self, capacity: int):
+        old = getattr(self, "_cols", None)
+        self._cols = {
+            "symbol_id": np.zeros(capacity, dtype=np.int32),
+            "side": np.zeros(capacity, dtype=np.int8),
+            "qty": np.zeros(capacity, dtype=np.float64),
+            "price": np.zeros(capacity, dtype=np.float64),
+            "time": np.zeros(capacity, dtype=np.int64),
+            "order_type": np.zeros(capacity, dtype=np.int8),
+        }
+        if old is not None:
+            for name, col in old.items():
+                self._cols[name][:self._len] = col[:self._len]
+        self.capacity = capacity
+
+    def __len__(self):
+        return self._len
+
+    def symbol_id(self, symbol: str) -> int:
+        sid = self._symbol_ids.get(symbol)
+        if sid is None:
+            sid = self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return sid
+
+    def append(self, symbol: str, side: str, qty: float, price: float, timestamp=None, order_type: str = "market") -> int:
+        """Record one fill, returns its row (the trade id)"""
+        if self._len == self.capacity:
+            self._alloc(self.capacity * 2)
+        i = self._len
+        cols = self._cols
+        cols["symbol_id"][i] = self.symbol_id(symbol)
+        cols["side"][i] = SIDES[side]
+        cols["qty"][i] = qty
+        cols["price"][i] = price
+        cols["time"][i] = timestamp_ns(timestamp)
+        cols["order_type"][i] = ORDER_TYPES.index(order_type)
+        self._len += 1
+
+        if side == "buy":
+            self.buy_count += 1
+        else:
+            self.sell_count += 1
+        self.turnover += abs(qty * price)
+        return i
+
+    # --- Zero-copy views ---
+
+    def column(self, name: str) -> np.ndarray:
+        return self._cols[name][:self._len]
+
+    @property
+    def symbol_ids(self) -> np.ndarray:
+        return self.column("symbol_id")
+
+    @property
+    def side(self) -> np.ndarray:
+        return self.column("side")
+
+    @property
+    def qty(self) -> np.ndarray:
+        return self.column("qty")
+
+    @property
+    def price(self) -> np.ndarray:
+        return self.column("price")
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.column("time")
+
+    @property
+    def order_type(self) -> np.ndarray:
+        return self.column("order_type")
+
+    def to_frame(self) -> pd.DataFrame:
+        """Columns as a DataFrame (no copy of the numeric columns)"""
+        return pd.DataFrame({name: self.column(name) for name in self._cols}, copy=False)
+
+    def record(self, i: int) -> dict:
+        """One fill as a dict (debugging / notifications)"""
+        cols = self._cols
+        return {
+            "id": i,
+            "symbol": self.symbols[cols["symbol_id"][i]],
+            "side": "buy" if cols["side"][i] > 0 else "sell",
+            "qty": float(cols["qty"][i]),
+            "price": float(cols["price"][i]),
+            "time": int(cols["time"][i]),
+            "type": ORDER_TYPES[cols["order_type"][i]],
+        }
+
+    # --- Aggregates ---
+
+    def net_qty(self) -> np.ndarray:
+        """Signed filled quantity per symbol id"""
+        return np.bincount(self.symbol_ids, weights=self.side * self.qty, minlength=len(self.symbols))
+
+    def summary(self) -> dict:
+        return {
+            "trades_count": self._len,
+            "buys": self.buy_count,
+            "sells": self.sell_count,
+            "turnover": self.turnover,
+        }
+
+    # --- Export ---
+
+    def save(self, path: str):
+        """
+        Bulk export. `.parquet` goes through pandas (needs pyarrow or fastparquet),
+        anything else is written as a compressed .npz.
+        """
+        if str(path).endswith(".parquet"):
+            df = self.to_frame()
+            df.insert(1, "symbol", pd.Categorical.from_codes(df.pop("symbol_id"), self.symbols))
+            df.to_parquet(path, compression="zstd", index=False)
+        else:
+            np.savez_compressed(path, symbols=np.array(self.symbols, dtype=str),
+                                **{name: self.column(name) for name in self._cols})
+
+    @classmethod
+    def load(cls, path: str) -> "TradeLedger":
+        """Read back a ledger saved as .npz"""
+        with np.load(path) as f:
+            ledger = cls(capacity=len(f["price"]))
+            for sym in f["symbols"]:
+                ledger.symbol_id(str(sym))
+            n = len(f["price"])
+            for name in ledger._cols:
+                ledger._cols[name][:n] = f[name]
+        ledger._len = n
+        ledger.buy_count = int((ledger.side > 0).sum())
+        ledger.sell_count = n - ledger.buy_count
+        ledger.turnover = float(np.abs(ledger.qty * ledger.price).sum())
+        return ledger
@@ -0,0 +1,85 @@
+from typing import Iterator, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# Column layouts of the CSV recordings (header names vary, positions do not)
+TICK_FIELDS = ("price", "volume") # DataRecorder / download_data.py: time,symbol,price,volume
+BAR_FIELDS = ("open", "high", "low", "close", "volume") # download_data.py --bars
+
+class TickColumns(NamedTuple):
+    """Tick recording as typed arrays (row i = one tick)"""
+    time: np.ndarray # int64 epoch ns (UTC)
+    symbol: np.ndarray # int16 code into `symbols`
+    price: np.ndarray # float64
+    volume: np.ndarray # float64
+    symbols: Tuple[str, ...]
+
+class BarColumns(NamedTuple):
+    """OHLCV bar recording as typed arrays (row i = one bar)"""
+    time: np.ndarray
+    symbol: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    symbols: Tuple[str, ...]
+
+def load_ticks(path: str, symbols: Optional[Sequence[str]] = None, chunksize: int = 1_000_000) -> TickColumns:
+    """Read a tick CSV into TickColumns, keeping only `symbols` (all if None)"""
+    return TickColumns(*_load(path, TICK_FIELDS, symbols, chunksize))
+
+def load_bars(path: str, symbols: Optional[Sequence[str]] = None, chunksize: int = 1_000_000) -> BarColumns:
+    """Read a bar CSV into BarColumns, keeping only `symbols` (all if None)"""
+    return BarColumns(*_load(path, BAR_FIELDS, symbols, chunksize))
+
+def iter_ticks(path: str, symbols: Optional[Sequence[str]] = None, chunksize: int = 200_000) -> Iterator[TickColumns]:
+    """Stream a tick CSV as TickColumns chunks (bounded memory). Codes are stable across chunks."""
+    codes = {}
+    for part in _iter_chunks(path, TICK_FIELDS, symbols, chunksize, codes):
+        yield TickColumns(*part, tuple(codes))
+
+def _load(path, fields, symbols, chunksize):
+    codes = {}
+    parts = list(_iter_chunks(path, fields, symbols, chunksize, codes))
+    if parts:
+        columns = [np.concatenate(col) for col in zip(*parts)]
+    else:
+        columns = [np.empty(0, np.int64), np.empty(0, np.int16)] + [np.empty(0, np.float64) for _ in fields]
+    return (*columns, tuple(codes))
+
+def _iter_chunks(path, fields, symbols, chunksize, codes):
+    """
+    Chunked pandas read: C parser with fixed dtypes, symbol as a categorical, symbol
+    filter applied on the category codes before timestamps are parsed. Malformed rows
+    (bad field count, unparsable time, missing symbol / price / volume) are dropped. `codes` (symbol -> global code, in
+    order of first appearance) is filled in as symbols are met.
+    """
+    names = ("time", "symbol") + fields
+    wanted = set(symbols) if symbols is not None else None
+
+    reader = pd.read_csv(
+        path, header=0, names=names, usecols=range(len(names)), chunksize=chunksize,
+        dtype={"time": str, "symbol": "category", **{f: np.float64 for f in fields}},
+        on_bad_lines="skip"
+    )
+    for chunk in reader:
+        sym = chunk["symbol"].cat
+        if wanted is not None:
+            keep_cats = [c for c in sym.categories if c in wanted]
+            if len(keep_cats) < len(sym.categories):
+                chunk = chunk[chunk["symbol"].isin(keep_cats)]
+                sym = chunk["symbol"].cat.remove_unused_categories().cat
+        if chunk.empty:
+            continue
+
+        # Chunk-local category codes -> global codes
+        lut = np.array([codes.setdefault(c, len(codes)) for c in sym.categories] or [0], dtype=np.int16)
+        times = pd.to_datetime(chunk["time"], utc=True, format="ISO8601", errors="coerce")
+        # Truncated rows parse with NaN fields (or no symbol): drop them with the bad timestamps
+        valid = (times.notna() & chunk["symbol"].notna() & chunk[list(fields)].notna().all(axis=1)).to_numpy()
+
+        part = [times.dt.tz_convert(None).dt.as_unit("ns").to_numpy()[valid].view(np.int64),
+                lut[sym.codes.to_numpy()[valid]]]
+        part += [chunk[f].to_numpy()[valid] for f in fields]
+        yield part
@@ -0,0 +1,129 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from src.core.inference import InferenceService
+from src.core.logger import logger
+from src.config import settings
+
+class ModelRegistry:
+    """
+    Per-symbol (optionally per-timeframe) AI models, loaded on first use.
+
+    `models` maps "SYMBOL" or "SYMBOL:MINUTES" to a model path; anything unmapped uses
+    `default_path`. Symbols mapped to the same path share one loaded model. Loaded models
+    are kept in LRU order and the least recently used ones are closed once the estimated
+    total exceeds the memory budget (the model being used is never evicted).
+    """
+    def __init__(self, models: Optional[Dict[str, str]] = None, default_path: str = "models/model.tflite",
+                 memory_budget_mb: Optional[float] = None, **service_kwargs):
+        self.models = dict(settings.INFERENCE_MODELS if models is None else models)
+        self.default_path = default_path
+        if memory_budget_mb is None:
+            memory_budget_mb = settings.INFERENCE_MEMORY_BUDGET_MB
+        self.budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        # Many models on a small box: one interpreter each unless told otherwise
+        self.service_kwargs = {"pool_size": 1, **service_kwargs}
+        self.loaded = OrderedDict() # path -> InferenceService, least recently used first
+        self.loads = 0
+        self.evictions = 0
+        self.hits = 0
+        self.load_seconds = 0.0
+
+    def resolve(self, symbol: str, timeframe: Optional[int] = None) -> str:
+        """Model path for a symbol: SYMBOL:MINUTES, then SYMBOL, then the default"""
+        if timeframe is not None and f"{symbol}:{timeframe}" in self.models:
+            return self.models[f"{symbol}:{timeframe}"]
+        return self.models.get(symbol, self.default_path)
+
+    def service(self, symbol: str, timeframe: Optional[int] = None) -> InferenceService:
+        """The loaded model for a symbol (loading it, and evicting others, if needed)"""
+        path = self.resolve(symbol, timeframe)
+        service = self.loaded.get(path)
+        if service is not None:
+            self.hits += 1
+            self.loaded.move_to_end(path)
+            return service
+
+        start = time.perf_counter()
+        service = self._load(path)
+        self.load_seconds += time.perf_counter() - start
+        self.loads += 1
+        self.loaded[path] = service
+        self._evict(keep=path)
+        return service
+
+    def _load(self, path: str) -> InferenceService:
+        return InferenceService(model_path=path, **self.service_kwargs)
+
+    def is_mock(self, symbol: str, timeframe: Optional[int] = None) -> bool:
+        """
+        Whether the symbol's model serves mock scores, without loading it: loaded models
+        answer themselves; otherwise it is mock when neither the model nor its NumPy export exists.
+        """
+        path = self.resolve(symbol, timeframe)
+        service = self.loaded.get(path)
+        if service is not None:
+            return service.mock_mode
+        return not (os.path.isfile(path) or os.path.isfile(os.path.splitext(path)[0] + ".npz"))
+
+    def memory_bytes(self) -> int:
+        return sum(s.memory_bytes() for s in self.loaded.values())
+
+    def _evict(self, keep: str):
+        for path in list(self.loaded):
+            if self.memory_bytes() <= self.budget_bytes:
+                return
+            service = self.loaded[path]
+            if path == keep or service._pending:
+                continue # In use (or a micro-batch still waiting on it)
+            del self.loaded[path]
+            service.close()
+            self.evictions += 1
+            logger.info(f"Evicted AI model {path} (memory budget {self.budget_bytes / 1024 / 1024:.0f} MB)")
+
+    def for_symbol(self, symbol: str, timeframe: Optional[int] = None) -> "SymbolModel":
+        """What a strategy holds as its inference service (nothing is loaded until it predicts)"""
+        return SymbolModel(self, symbol, timeframe)
+
+    async def predict(self, symbol: str, features: List[float], timeframe: Optional[int] = None) -> float:
+        return await self.service(symbol, timeframe).predict(features)
+
+    def predict_sync(self, symbol: str, features: List[float], timeframe: Optional[int] = None) -> float:
+        return self.service(symbol, timeframe).predict_sync(features)
+
+    def stats(self) -> dict:
+        """Load / eviction metrics"""
+        return {
+            "loaded": list(self.loaded),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "load_seconds": self.load_seconds,
+            "memory_bytes": self.memory_bytes(),
+            "budget_bytes": self.budget_bytes,
+        }
+
+class SymbolModel:
+    """InferenceService stand-in bound to one symbol (/ timeframe) of a ModelRegistry"""
+    def __init__(self, registry: ModelRegistry, symbol: str, timeframe: Optional[int] = None):
+        self.registry = registry
+        self.symbol = symbol
+        self.timeframe = timeframe
+
+    @property
+    def mock_mode(self) -> bool:
+        return self.registry.is_mock(self.symbol, self.timeframe)
+
+    async def predict(self, features: List[float]) -> float:
+        return await self.registry.predict(self.symbol, features, self.timeframe)
+
+    def predict_sync(self, features: List[float]) -> float:
+        return self.registry.predict_sync(self.symbol, features, self.timeframe)
+
+    def predict_batch(self, features: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        return self.registry.service(self.symbol, self.timeframe).predict_batch(features, batch_size)
+
+    def stats(self) -> dict:
+        return self.registry.service(self.symbol, self.timeframe).stats()
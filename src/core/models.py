@@ -1,6 +1,12 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import time
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
 
 class MarketTick(BaseModel):
     """Represents a standardized market data update (Ticker/Trade)"""
@@ -20,3 +26,23 @@ class OHLCV(BaseModel):
     close: float
     volume: float
     interval: int # in minutes
+
+def to_epoch_ns(dt: datetime) -> int:
+    """datetime -> int64 nanoseconds since epoch (naive datetimes are treated as UTC)"""
+    epoch = _EPOCH if dt.tzinfo is None else _EPOCH_UTC
+    return ((dt - epoch) // _ONE_US) * 1000
+
+def timestamp_ns(timestamp) -> int:
+    """Loose timestamp (datetime / epoch ns / anything else -> now) -> epoch ns"""
+    if isinstance(timestamp, datetime):
+        return to_epoch_ns(timestamp)
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return time.time_ns()
+
+def from_epoch_ns(ns: int, tz=None) -> datetime:
+    """Inverse of to_epoch_ns. Returns a naive datetime unless tz is given."""
+    dt = _EPOCH + timedelta(microseconds=int(ns) // 1000)
+    if tz is not None:
+        dt = dt.replace(tzinfo=timezone.utc).astimezone(tz)
+    return dt
@@ -0,0 +1,45 @@
+from typing import Dict, NamedTuple, Optional, Sequence
+from src.core.broker import BacktestBroker
+from src.core.model_registry import ModelRegistry
+from src.core.risk import RiskManager, SafeBroker
+from src.core.strategy import CandleStore
+from src.strategies.reverse_pattern import ReversePatternStrategy
+
+class PaperStack(NamedTuple):
+    broker: BacktestBroker # Virtual account (fills, equity)
+    safe_broker: SafeBroker # What strategies trade through (risk checks)
+    risk_manager: RiskManager
+    candle_store: CandleStore
+    strategies: Dict[str, ReversePatternStrategy]
+
+def build_paper_stack(symbols: Sequence[str], inference_service=None, initial_balance: float = 10000.0,
+                      strategy_params: Optional[dict] = None) -> PaperStack:
+    """
+    PAPER trading wiring, shared by main.lifespan and the portfolio backtest so both run
+    exactly the same setup: one BacktestBroker behind one SafeBroker/RiskManager, one
+    ReversePatternStrategy per symbol over a shared candle store.
+    `inference_service` may be a ModelRegistry (each symbol then gets its own model).
+    """
+    broker = BacktestBroker(initial_balance=initial_balance)
+
+    # We increase max_position_size because Strategies now manage risk sizing dynamically.
+    # Set to 1000.0 as a sanity limit.
+    risk_manager = RiskManager(min_confidence=0.5, max_position_size=1000.0)
+    safe_broker = SafeBroker(inner=broker, risk_manager=risk_manager)
+
+    # All symbols share one candle store so each minute close is evaluated in one batch
+    candle_store = CandleStore(symbols)
+    params = {"filter_bearish": True, "filter_bullish": True, **(strategy_params or {})}
+    strategies = {}
+    for sym in symbols:
+        ai = inference_service
+        if isinstance(ai, ModelRegistry):
+            ai = ai.for_symbol(sym, params.get("timeframes", (1,))[0])
+        strategies[sym] = ReversePatternStrategy(
+            symbol=sym,
+            broker=safe_broker,
+            inference_service=ai,
+            candle_store=candle_store,
+            **params
+        )
+    return PaperStack(broker, safe_broker, risk_manager, candle_store, strategies)
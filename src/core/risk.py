@@ -58,17 +58,27 @@ class SafeBroker(IBroker):
     def get_position(self, symbol: str):
         return self.inner.get_position(symbol)
 
+    def get_stats(self):
+        return self.inner.get_stats()
+
     async def place_order(self, symbol: str, side: str, order_type: str, size: float, price: Optional[float] = None, params: Optional[Dict[str, Any]] = None):
+        if self._allowed(symbol, side, size, params):
+            # Pass through to Inner Broker
+            await self.inner.place_order(symbol, side, order_type, size, price, params)
+
+    def place_order_sync(self, symbol: str, side: str, order_type: str, size: float, price: Optional[float] = None, params: Optional[Dict[str, Any]] = None):
+        if self._allowed(symbol, side, size, params):
+            self.inner.place_order_sync(symbol, side, order_type, size, price, params)
+
+    def _allowed(self, symbol: str, side: str, size: float, params: Optional[Dict[str, Any]]) -> bool:
         # 1. Get Current State
         current_pos = self.inner.get_position(symbol)
         
         # 2. Validate General Rules (Confidence)
         if not self.risk_manager.validate_order(current_pos, size, params):
-            return # Blocked
+            return False # Blocked
             
         # 3. Validate Execution Limits (Exposure)
         if not self.risk_manager.validate_execution(symbol, current_pos, size, side):
-            return # Blocked
-
-        # 4. Pass through to Inner Broker
-        await self.inner.place_order(symbol, side, order_type, size, price, params)
+            return False # Blocked
+        return True
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from typing import Callable, Iterable, List, Optional
+from src.core.logger import logger
+from src.core.strategy import Strategy, MINUTE_NS
+from src.config import settings
+
+class CandleScheduler:
+    """
+    Single wall-clock timer for the live path.
+
+    At every candle boundary + grace period it closes the current candle of every
+    registered strategy (their aggregators switch to timer-driven mode) and fans the
+    closed candles out as one batch (Strategy.execute_batch, once per strategy type). Signal latency is then bounded by
+    the grace period instead of by the arrival of the next tick, which matters on quiet
+    symbols or when the feed stalls.
+    """
+    def __init__(self, strategies: Iterable[Strategy] = (), interval_minutes: int = 1,
+                 grace_seconds: Optional[float] = None, clock: Callable[[], int] = time.time_ns):
+        self.interval = interval_minutes * MINUTE_NS
+        if grace_seconds is None:
+            grace_seconds = settings.CANDLE_CLOSE_GRACE_SECONDS
+        self.grace = int(grace_seconds * 1e9)
+        self.clock = clock
+        self.strategies: List[Strategy] = []
+        self.running = False
+        self._task = None
+        self.batches = 0
+        for strategy in strategies:
+            self.add(strategy)
+
+    def add(self, strategy: Strategy):
+        strategy.aggregator.timer_driven = True
+        self.strategies.append(strategy)
+
+    async def start(self):
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Candle Scheduler Started ({len(self.strategies)} strategies, grace {self.grace / 1e9:.1f}s)")
+
+    async def stop(self):
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def next_deadline(self, now: int) -> int:
+        """Next boundary + grace strictly after `now` (epoch ns)"""
+        return now - (now - self.grace) % self.interval + self.interval
+
+    async def _run(self):
+        while self.running:
+            now = self.clock()
+            await asyncio.sleep((self.next_deadline(now) - now) / 1e9)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Candle Scheduler Error: {e}", exc_info=True)
+
+    async def flush(self, now: Optional[int] = None) -> int:
+        """Close every due candle and dispatch them as one batch. Returns the number of candles."""
+        if now is None:
+            now = self.clock()
+
+        batch = []
+        for strategy in self.strategies:
+            closed = strategy.aggregator.close_due(now, self.grace)
+            if closed:
+                batch.append((strategy, closed))
+        if not batch:
+            return 0
+
+        self.batches += 1
+
+        # A strategy that missed timer runs closes several primary candles at once:
+        # one round per candle time, oldest first, so every close gets evaluated
+        rounds = {}
+        for strategy, closed in batch:
+            for group in strategy.split_closes(closed):
+                rounds.setdefault(group[0].time, []).append((strategy, group))
+
+        for candle_time in sorted(rounds):
+            closes = rounds[candle_time]
+            # 1. Store every candle first, 2. evaluate per strategy class in one batch
+            groups = {}
+            for strategy, closed in closes:
+                if strategy.ingest_candles(closed):
+                    groups.setdefault(type(strategy), []).append(strategy)
+
+            results = await asyncio.gather(
+                *(cls.execute_batch(group) for cls, group in groups.items()),
+                return_exceptions=True
+            )
+            for cls, result in zip(groups, results):
+                if isinstance(result, Exception):
+                    logger.error(f"{cls.__name__} batch failed on candle close: {result}", exc_info=result)
+        return sum(len(closed) for _, closed in batch)
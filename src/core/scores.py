@@ -0,0 +1,97 @@
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.core.strategy import MINUTE_NS
+
+# Candles per AI feature window ([Open, High, Low, Close, Volume] * 5 = 25 features)
+AI_LOOKBACK = 5
+
+def candles_from_ticks(time: np.ndarray, price: np.ndarray, volume: np.ndarray, interval_minutes: int = 1):
+    """
+    Vectorized TickAggregator: time-sorted ticks (epoch ns) -> (candle open times, (n, 5) OHLCV).
+    Only buckets with ticks produce a candle, and the reductions run in tick order, so the
+    values are bit-identical to the live aggregation. The last (still open) bucket is included.
+    """
+    span = interval_minutes * MINUTE_NS
+    buckets = time - time % span
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]]) if len(time) else np.empty(0, dtype=np.intp)
+    ends = np.r_[starts[1:], len(time)] - 1
+    ohlcv = np.empty((len(starts), 5), dtype=np.float64)
+    if len(starts):
+        ohlcv[:, 0] = price[starts]
+        ohlcv[:, 1] = np.maximum.reduceat(price, starts)
+        ohlcv[:, 2] = np.minimum.reduceat(price, starts)
+        ohlcv[:, 3] = price[ends]
+        # Running sum per bucket in tick order (same additions as _Bar.merge)
+        csum = np.empty(len(volume), dtype=np.float64)
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            np.cumsum(volume[s:e + 1], out=csum[s:e + 1])
+        ohlcv[:, 4] = csum[ends]
+    return buckets[starts], ohlcv
+
+def feature_windows(ohlcv: np.ndarray, lookback: int = AI_LOOKBACK) -> np.ndarray:
+    """
+    (n, 5) candles -> (n - lookback + 1, lookback * 5) zero-copy rows: row j is the
+    flattened window ending at candle j + lookback - 1, exactly what the strategy
+    passes to predict() after that candle closed.
+    """
+    ohlcv = np.ascontiguousarray(ohlcv)
+    if len(ohlcv) < lookback:
+        return np.empty((0, lookback * ohlcv.shape[1]), dtype=ohlcv.dtype)
+    return sliding_window_view(ohlcv, (lookback, ohlcv.shape[1]))[:, 0].reshape(-1, lookback * ohlcv.shape[1])
+
+class ScoreTable:
+    """
+    Precomputed AI scores keyed by candle open time, on a dense time grid so a lookup is
+    one subtraction + index. Candles without a score (gaps, first lookback - 1) -> NaN.
+    """
+    def __init__(self, times: np.ndarray, scores: np.ndarray, interval_minutes: int = 1):
+        self.span = interval_minutes * MINUTE_NS
+        self.start = int(times[0]) if len(times) else 0
+        size = int((times[-1] - self.start) // self.span) + 1 if len(times) else 0
+        self.scores = np.full(size, np.nan)
+        self.scores[(times - self.start) // self.span] = scores
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_grid(cls, scores: np.ndarray, start: int, span: int) -> "ScoreTable":
+        """Table over an existing dense grid (e.g. a memmap shared between processes)"""
+        table = cls.__new__(cls)
+        table.span, table.start, table.scores = span, start, scores
+        table.hits = 0
+        table.misses = 0
+        return table
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self.scores)))
+
+    def lookup(self, time_ns: int) -> float:
+        """Score of the candle opened at `time_ns`, NaN if not precomputed"""
+        offset = time_ns - self.start
+        i = offset // self.span
+        if offset % self.span == 0 and 0 <= i < len(self.scores):
+            score = self.scores[i]
+            if score == score:
+                self.hits += 1
+                return score
+        self.misses += 1
+        return math.nan
+
+def precompute_scores(data, inference_service, bars: bool = False, interval_minutes: int = 1,
+                      batch_size: int = 4096) -> ScoreTable:
+    """
+    Score the AI feature window of every candle of a loaded recording (TickColumns, or
+    BarColumns with bars=True) in large batches. `interval_minutes` must be the primary
+    timeframe of the strategy the table is for.
+    """
+    if bars:
+        if interval_minutes != 1:
+            raise ValueError(f"Bar recordings hold 1m candles, cannot score {interval_minutes}m windows")
+        times = data.time
+        ohlcv = np.column_stack([data.open, data.high, data.low, data.close, data.volume])
+    else:
+        times, ohlcv = candles_from_ticks(data.time, data.price, data.volume, interval_minutes)
+    windows = feature_windows(ohlcv)
+    scores = inference_service.predict_batch(windows, batch_size) if len(windows) else np.empty(0)
+    return ScoreTable(times[AI_LOOKBACK - 1:], scores, interval_minutes)
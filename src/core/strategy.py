@@ -1,52 +1,141 @@
+import asyncio
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Optional
-from src.core.models import MarketTick, OHLCV
+from typing import Optional, Dict, List, Sequence
+from src.core.models import MarketTick, OHLCV, to_epoch_ns, from_epoch_ns
 from src.core.logger import logger
+from src.core.indicators import Indicator
 
 class CandleBuffer:
-    def __init__(self, max_size=1000):
+    """
+    Fixed-capacity ring buffer of closed candles.
+
+    OHLCV lives in one preallocated float64 block (columns: open, high, low, close, volume)
+    and candle open times in an int64 column (epoch ns). Every row is written twice
+    (slot and slot + max_size), so the buffered candles are always one contiguous slice:
+    appends are O(1) and all window accessors below are zero-copy views.
+    """
+    COLUMNS = ["open", "high", "low", "close", "volume"]
+
+    def __init__(self, max_size=1000, data: Optional[np.ndarray] = None, times: Optional[np.ndarray] = None):
         self.max_size = max_size
-        # Initialize empty DataFrame with float columns provided to avoid dtype issues later
-        self.df = pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
-        self.df.index.name = "time"
+        # Storage can be provided by a CandleStore (views into its shared block)
+        self._data = data if data is not None else np.full((2 * max_size, 5), np.nan, dtype=np.float64)
+        self._time = times if times is not None else np.zeros(2 * max_size, dtype=np.int64)
+        self._start = 0 # Oldest row
+        self._len = 0
+        self._tz = None # tzinfo of incoming candles, only used to rebuild a DataFrame
+        self.indicators: Dict[str, Indicator] = {} # Streaming indicators, updated on append
+
+    def __len__(self):
+        return self._len
 
     def add_candle(self, candle: OHLCV):
-        # Create single row DataFrame
-        new_row = pd.DataFrame({
-            "open": [float(candle.open)],
-            "high": [float(candle.high)],
-            "low": [float(candle.low)],
-            "close": [float(candle.close)],
-            "volume": [float(candle.volume)]
-        }, index=[candle.time])
-        
-        # Concat is standard for appending in Pandas (though slightly expensive)
-        # For high-freq, dictionary buffer + occasional DF construction is faster.
-        # But for 1m candles (low freq), concat is fine.
-        if self.df.empty:
-            self.df = new_row
+        t = to_epoch_ns(candle.time)
+        n = self.max_size
+
+        replace = bool(self._len) and self._time[self._start + self._len - 1] == t
+        if replace:
+            # Update for the same candle (not expected with Aggregator logic): keep last
+            slot = (self._start + self._len - 1) % n
+        elif self._len < n:
+            slot = self._start + self._len
+            self._len += 1
         else:
-            self.df = pd.concat([self.df, new_row])
-            # Drop duplicates if receiving update for same candle (not expected with Aggregator logic)
-            self.df = self.df[~self.df.index.duplicated(keep='last')]
-        
-        # Trim
-        if len(self.df) > self.max_size:
-            self.df = self.df.iloc[-self.max_size:]
+            # Full: overwrite the oldest row
+            slot = self._start
+            self._start = (self._start + 1) % n
+
+        if self._tz is None:
+            self._tz = candle.time.tzinfo
+
+        row = (candle.open, candle.high, candle.low, candle.close, candle.volume)
+        self._data[slot] = row
+        self._data[slot + n] = row
+        self._time[slot] = t
+        self._time[slot + n] = t
+
+        for ind in self.indicators.values():
+            x = row[ind.field]
+            if replace:
+                ind.replace_last(x)
+            else:
+                ind.update(x)
+
+    def register_indicator(self, name: str, indicator: Indicator) -> Indicator:
+        """Attach a streaming indicator; it is warmed up on the candles already buffered"""
+        for x in self.ohlcv[:, indicator.field]:
+            indicator.update(float(x))
+        self.indicators[name] = indicator
+        return indicator
+
+    # --- Zero-copy views (oldest -> newest) ---
+
+    @property
+    def ohlcv(self) -> np.ndarray:
+        """(len, 5) float64 view"""
+        return self._data[self._start:self._start + self._len]
+
+    @property
+    def times(self) -> np.ndarray:
+        """Candle open times as int64 epoch ns"""
+        return self._time[self._start:self._start + self._len]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.ohlcv[:, 0]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.ohlcv[:, 1]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.ohlcv[:, 2]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.ohlcv[:, 3]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.ohlcv[:, 4]
+
+    def window(self, size: int) -> np.ndarray:
+        """Last `size` candles (fewer if the buffer is not warm yet)"""
+        end = self._start + self._len
+        return self._data[max(self._start, end - size):end]
+
+    # --- Pandas (built on demand, copies) ---
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        idx = pd.to_datetime(self.times, unit="ns", utc=self._tz is not None)
+        if self._tz is not None:
+            idx = idx.tz_convert(self._tz)
+        return idx.rename("time")
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return pd.DataFrame(self.ohlcv.copy(), columns=self.COLUMNS, index=self.index)
 
-    # --- Indicators ---
+    def _close_series(self) -> pd.Series:
+        return pd.Series(self.close.copy(), index=self.index, name="close")
+
+    # --- Indicators (full pandas series over the buffer; see src/core/indicators.py for O(1) streaming) ---
+    # Once the buffer has wrapped these start at its oldest candle, so EMA/RSI differ from the
+    # streaming indicators (which have seen every candle); SMA agrees once the window is buffered.
     
     def sma(self, period=20) -> pd.Series:
-        return self.df["close"].rolling(window=period).mean()
+        return self._close_series().rolling(window=period).mean()
 
     def ema(self, period=20) -> pd.Series:
-        return self.df["close"].ewm(span=period, adjust=False).mean()
+        return self._close_series().ewm(span=period, adjust=False).mean()
 
     def rsi(self, period=14) -> pd.Series:
         """Relative Strength Index (Wilder's Method)"""
-        delta = self.df["close"].diff()
+        delta = self._close_series().diff()
         
         up = delta.copy()
         down = delta.copy()
@@ -62,77 +151,377 @@ class CandleBuffer:
         rsi = 100.0 - (100.0 / (1.0 + rs))
         return rsi
 
+class CandleStore:
+    """
+    Cross-sectional candle storage: one symbols x time x OHLCV float64 block (plus an
+    int64 time block) shared by the CandleBuffers of many strategies.
+
+    Each symbol keeps its own ring (a CandleBuffer over its row of the block), so symbols
+    do not need to close in lockstep, and the latest windows of every symbol can be
+    gathered with a single fancy-indexing operation for batched evaluation.
+    """
+    def __init__(self, symbols: Sequence[str], max_size=1000):
+        self.symbols = list(symbols)
+        self.max_size = max_size
+        self.slots = {sym: i for i, sym in enumerate(self.symbols)}
+        self.data = np.full((len(self.symbols), 2 * max_size, 5), np.nan, dtype=np.float64)
+        self.times = np.zeros((len(self.symbols), 2 * max_size), dtype=np.int64)
+        self.buffers = [CandleBuffer(max_size, self.data[i], self.times[i]) for i in range(len(self.symbols))]
+
+    def buffer(self, symbol: str) -> CandleBuffer:
+        return self.buffers[self.slots[symbol]]
+
+    def windows(self, slots: Sequence[int], size: int) -> np.ndarray:
+        """
+        Last `size` candles of each slot -> (len(slots), size, 5).
+        Every slot must hold at least `size` candles.
+        """
+        slots = np.asarray(slots, dtype=np.intp)
+        ends = np.array([self.buffers[i]._start + self.buffers[i]._len for i in slots], dtype=np.intp)
+        rows = ends[:, None] + np.arange(-size, 0, dtype=np.intp)
+        return self.data[slots[:, None], rows]
+
+MINUTE_NS = 60_000_000_000
+
+# Timeframes (minutes) the aggregator can roll up to
+TIMEFRAMES = (1, 5, 15, 60, 240)
+
+class _Bar:
+    """Mutable partial candle (times as epoch ns)"""
+    __slots__ = ("start", "open", "high", "low", "close", "volume")
+
+    def __init__(self, start, open, high, low, close, volume):
+        self.start = start
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def merge(self, high, low, close, volume):
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.close = close
+        self.volume += volume
+
+class _Rollup:
+    """Builds one higher timeframe out of closed candles of the next lower one"""
+    def __init__(self, minutes: int):
+        self.minutes = minutes
+        self.span = minutes * MINUTE_NS
+        self.bar: Optional[_Bar] = None
+
+    def add(self, child: _Bar, child_span: int) -> List[_Bar]:
+        closed = []
+        bucket = child.start - child.start % self.span
+        bar = self.bar
+
+        if bar is not None and bucket != bar.start:
+            # Lower timeframe skipped ahead (no ticks for a while): close the partial bar
+            closed.append(bar)
+            bar = None
+
+        if bar is None:
+            bar = _Bar(bucket, child.open, child.high, child.low, child.close, child.volume)
+        else:
+            bar.merge(child.high, child.low, child.close, child.volume)
+
+        if child.start + child_span >= bucket + self.span:
+            # Last child of the bucket: complete
+            closed.append(bar)
+            bar = None
+
+        self.bar = bar
+        return closed
+
 class TickAggregator:
-    def __init__(self, interval_minutes=1):
+    """
+    Builds candles from ticks.
+
+    The base candle (`interval_minutes`, or the smallest of `timeframes`) is built from ticks;
+    every higher timeframe is rolled up from closed candles of the next lower one, so one
+    pass over the ticks produces e.g. 1m, 5m, 15m, 1h and 4h candles. Buckets are aligned on
+    the epoch (UTC), which also aligns 4h candles on midnight.
+
+    By default a candle closes when the first tick of the next bucket arrives. In
+    `timer_driven` mode (set by CandleScheduler) ticks never close candles: the scheduler
+    calls close_due() at the wall-clock boundary + grace period. Ticks for the previous
+    bucket are still accepted during the grace period; later ones are dropped and counted
+    in `late_ticks`.
+    """
+    def __init__(self, interval_minutes=1, timeframes: Optional[Sequence[int]] = None):
+        if timeframes:
+            timeframes = tuple(sorted(set(timeframes)))
+            interval_minutes = timeframes[0]
+        else:
+            timeframes = (interval_minutes,)
+        for lower, higher in zip(timeframes, timeframes[1:]):
+            if higher % lower:
+                raise ValueError(f"Timeframe {higher}m is not a multiple of {lower}m")
+
         self.interval = interval_minutes
-        self.current_candle: Optional[OHLCV] = None
-        self.last_bucket: Optional[datetime] = None
+        self.timeframes = timeframes
+        self.span = interval_minutes * MINUTE_NS
+        self.symbol: Optional[str] = None
+        self._bar: Optional[_Bar] = None
+        self._rollups = [_Rollup(tf) for tf in timeframes[1:]]
+        self._tz = None
+
+        # Timer-driven mode
+        self.timer_driven = False
+        self.late_ticks = 0
+        self._pending: Optional[_Bar] = None # Previous bucket, waiting for the grace period
+        self._ready: List[OHLCV] = [] # Closed early (bucket skipped), delivered by close_due()
+        self._closed_until = 0 # End of the last closed bucket (ns)
+
+    @property
+    def current_candle(self) -> Optional[OHLCV]:
+        """Snapshot of the candle being built (base timeframe)"""
+        if self._bar is None:
+            return None
+        return self._to_candle(self._bar, self.interval)
+
+    @property
+    def last_bucket(self) -> Optional[datetime]:
+        if self._bar is None:
+            return None
+        return from_epoch_ns(self._bar.start, self._tz)
 
     def on_tick(self, tick: MarketTick) -> Optional[OHLCV]:
         """
         Accepts a tick. Returns a COMPLETED candle if the bucket has rolled over.
         Returns None otherwise.
         """
-        t = tick.timestamp
-        # Round down to start of minute
-        bucket = t.replace(second=0, microsecond=0)
-        
-        closed_candle = None
-        
-        if self.last_bucket and bucket > self.last_bucket:
-             # Bucket change: Close previous
-             closed_candle = self.current_candle
-             # Start new
-             self.current_candle = self._new_candle(tick, bucket)
-             self.last_bucket = bucket
-        elif self.current_candle is None:
-             # First tick ever
-             self.current_candle = self._new_candle(tick, bucket)
-             self.last_bucket = bucket
+        for candle in self.on_tick_all(tick):
+            if candle.interval == self.interval:
+                return candle
+        return None
+
+    def on_tick_all(self, tick: MarketTick) -> List[OHLCV]:
+        """Accepts a tick. Returns every candle it completed, lowest timeframe first."""
+        if self.symbol is None:
+            self.symbol = tick.symbol
+            self._tz = tick.timestamp.tzinfo
+        return self.update(to_epoch_ns(tick.timestamp), tick.price, tick.volume)
+
+    def update(self, ts: int, price: float, volume: float) -> List[OHLCV]:
+        """Tick as plain values (epoch ns). Same contract as on_tick_all."""
+        bucket = ts - ts % self.span
+        bar = self._bar
+
+        if self.timer_driven:
+            return self._update_timed(bucket, price, volume)
+
+        if bar is None:
+            # First tick ever
+            self._bar = _Bar(bucket, price, price, price, price, volume)
+            return []
+
+        if bucket > bar.start:
+            # Bucket change: Close previous, start new
+            self._bar = _Bar(bucket, price, price, price, price, volume)
+            return self._close(bar)
+
+        # Update current candle (time remains bucket start)
+        bar.merge(price, price, price, volume)
+        return []
+
+    def _update_timed(self, bucket: int, price: float, volume: float) -> List[OHLCV]:
+        bar = self._bar
+        if bar is not None and bucket == bar.start:
+            bar.merge(price, price, price, volume)
+        elif self._pending is not None and bucket == self._pending.start:
+            # Late tick for the previous bucket, within the grace period
+            self._pending.merge(price, price, price, volume)
+        elif bucket < self._closed_until or (bar is not None and bucket < bar.start):
+            self.late_ticks += 1
         else:
-             # Update current candle
-             c = self.current_candle
-             c.high = max(c.high, tick.price)
-             c.low = min(c.low, tick.price)
-             c.close = tick.price
-             c.volume += tick.volume
-             # Time remains bucket start
-             
-        return closed_candle
-
-    def _new_candle(self, tick, bucket):
+            if bar is not None:
+                if self._pending is not None:
+                    # Two boundaries passed without a timer run: close the oldest now
+                    self._ready.extend(self._close_timed(self._pending))
+                self._pending = bar
+            self._bar = _Bar(bucket, price, price, price, price, volume)
+        return []
+
+    def close_due(self, now: int, grace: int = 0) -> List[OHLCV]:
+        """
+        Timer-driven close: returns every candle whose bucket ended at least `grace` ns
+        before `now` (epoch ns), lowest timeframe first.
+        """
+        closed, self._ready = self._ready, []
+        if self._pending is not None and self._pending.start + self.span + grace <= now:
+            closed.extend(self._close_timed(self._pending))
+            self._pending = None
+        if self._bar is not None and self._bar.start + self.span + grace <= now:
+            closed.extend(self._close_timed(self._bar))
+            self._bar = None
+        return closed
+
+    def _close_timed(self, bar: _Bar) -> List[OHLCV]:
+        self._closed_until = bar.start + self.span
+        return self._close(bar)
+
+    def _close(self, bar: _Bar) -> List[OHLCV]:
+        closed = [self._to_candle(bar, self.interval)]
+        children, child_span = [bar], self.span
+        for rollup in self._rollups:
+            parents = []
+            for child in children:
+                parents.extend(rollup.add(child, child_span))
+            closed.extend(self._to_candle(b, rollup.minutes) for b in parents)
+            children, child_span = parents, rollup.span
+        return closed
+
+    def _to_candle(self, bar: _Bar, interval: int) -> OHLCV:
         return OHLCV(
-            symbol=tick.symbol,
-            time=bucket,
-            open=tick.price,
-            high=tick.price,
-            low=tick.price,
-            close=tick.price,
-            volume=tick.volume,
-            interval=self.interval
+            symbol=self.symbol,
+            time=from_epoch_ns(bar.start, self._tz),
+            open=bar.open,
+            high=bar.high,
+            low=bar.low,
+            close=bar.close,
+            volume=bar.volume,
+            interval=interval
         )
 
 from src.core.broker import IBroker
 
 class Strategy:
-    """Base Strategy Class"""
-    def __init__(self, symbol: str, broker: Optional[IBroker] = None):
+    """
+    Base Strategy Class
+
+    `timeframes` are the candle intervals (minutes) the strategy subscribes to. The smallest
+    one is the primary timeframe: its candles go to `self.candles` and trigger `execute()`.
+    Higher timeframes are kept in `self.timeframe_candles[tf]` and are updated before the
+    primary candle that closes at the same time is executed.
+    """
+    def __init__(self, symbol: str, broker: Optional[IBroker] = None, timeframes: Sequence[int] = (1,),
+                 candle_store: Optional[CandleStore] = None):
         self.symbol = symbol
-        self.candles = CandleBuffer()
-        self.aggregator = TickAggregator()
+        self.aggregator = TickAggregator(timeframes=timeframes)
+        self.timeframes = self.aggregator.timeframes
+        # Primary candles live in the shared store when one is given (batched evaluation)
+        self.candle_store = candle_store
+        self.candles = candle_store.buffer(symbol) if candle_store else CandleBuffer()
+        self.timeframe_candles: Dict[int, CandleBuffer] = {self.timeframes[0]: self.candles}
+        for tf in self.timeframes[1:]:
+            self.timeframe_candles[tf] = CandleBuffer()
         self.broker = broker
+
+    @property
+    def indicators(self) -> Dict[str, Indicator]:
+        return self.candles.indicators
+
+    def register_indicator(self, name: str, indicator: Indicator) -> Indicator:
+        """Register a streaming indicator for this strategy (latest: .value, history: .history)"""
+        return self.candles.register_indicator(name, indicator)
+
+    def on_restore(self):
+        """
+        Called after candles / aggregator were loaded from a checkpoint. The restored buffers
+        carry the indicators of the run that was snapshotted: re-register the ones this
+        instance's parameters configure differently.
+        """
+        pass
         
     async def on_tick(self, tick: MarketTick):
-        # Aggregate tick -> candle
-        closed_candle = self.aggregator.on_tick(tick)
-        if closed_candle:
-            logger.info(f"Candle Closed: {closed_candle.time} C={closed_candle.close}")
-            await self.on_candle(closed_candle)
+        # Aggregate tick -> candle(s)
+        closed = self.aggregator.on_tick_all(tick)
+        if closed:
+            await self.on_candles(closed)
+
+    async def on_price(self, ts: int, price: float, volume: float):
+        """Tick as plain values (epoch ns), for replays that never build MarketTick objects"""
+        if self.aggregator.symbol is None:
+            self.aggregator.symbol = self.symbol
+        closed = self.aggregator.update(ts, price, volume)
+        if closed:
+            await self.on_candles(closed)
+
+    def on_price_sync(self, ts: int, price: float, volume: float):
+        """on_price for synchronous drivers (backtests): no coroutine per tick, execute_sync() on close"""
+        if self.aggregator.symbol is None:
+            self.aggregator.symbol = self.symbol
+        closed = self.aggregator.update(ts, price, volume)
+        if closed:
+            for group in self.split_closes(closed):
+                if self.ingest_candles(group):
+                    self.execute_sync()
+
+    def warm_up(self, times: Sequence[int], prices: Sequence[float], volumes: Sequence[float]):
+        """Build candles / indicators from preceding ticks (epoch ns) without trading"""
+        if self.aggregator.symbol is None:
+            self.aggregator.symbol = self.symbol
+        for ts, price, volume in zip(times, prices, volumes):
+            closed = self.aggregator.update(ts, price, volume)
+            if closed:
+                self.ingest_candles(closed)
+
+    async def on_candles(self, candles: List[OHLCV]):
+        for group in self.split_closes(candles):
+            if self.ingest_candles(group):
+                await self.execute()
+
+    def split_closes(self, candles: List[OHLCV]) -> List[List[OHLCV]]:
+        """
+        Closed candles (lowest timeframe first per close) -> one group per primary candle with
+        the higher timeframe candles that closed along with it, in time order. Timer-driven
+        closes can deliver several primary candles at once; each one gets its execute().
+        """
+        groups = []
+        for candle in candles:
+            if candle.interval == self.timeframes[0] or not groups:
+                groups.append([])
+            groups[-1].append(candle)
+        return groups
+
+    def ingest_candles(self, candles: List[OHLCV]) -> bool:
+        """Store closed candles without executing. Returns True if a primary candle closed."""
+        primary_closed = False
+        # Higher timeframes first so execute() sees them up to date; the sort is stable, so
+        # each timeframe keeps its time order (a gap can close two bars of one timeframe)
+        for candle in sorted(candles, key=lambda c: c.interval, reverse=True):
+            if candle.interval == self.timeframes[0]:
+                logger.info(f"Candle Closed: {candle.time} C={candle.close}")
+                self.candles.add_candle(candle)
+                primary_closed = True
+            else:
+                self.timeframe_candles[candle.interval].add_candle(candle)
+        return primary_closed
 
     async def on_candle(self, candle: OHLCV):
-        self.candles.add_candle(candle)
-        await self.execute()
+        if self.ingest_candles([candle]):
+            await self.execute()
+
+    def on_candle_sync(self, candle: OHLCV):
+        if self.ingest_candles([candle]):
+            self.execute_sync()
 
     async def execute(self):
         """Override in subclass"""
         pass
+
+    def execute_sync(self):
+        """
+        Synchronous execute() for offline drivers, trading through broker.place_order_sync.
+        Override alongside execute() (ideally both on the same core logic); the default
+        runs execute() to completion, which only works for strategies that never await I/O.
+        """
+        coro = self.execute()
+        try:
+            coro.send(None)
+        except StopIteration:
+            return
+        coro.close()
+        raise RuntimeError(f"{type(self).__name__}.execute() awaits; implement execute_sync()")
+
+    @classmethod
+    async def execute_batch(cls, strategies: List["Strategy"]):
+        """
+        Execute many strategies of this class after the same candle close.
+        Subclasses can override with a vectorized evaluation; default runs them concurrently.
+        """
+        await asyncio.gather(*(s.execute() for s in strategies))
@@ -0,0 +1,101 @@
+import os
+import json
+import glob
+import shutil
+import hashlib
+from typing import Optional, Sequence
+import numpy as np
+from src.core.loader import TickColumns, BarColumns, load_ticks, load_bars
+from src.core.logger import logger
+from src.config import settings
+
+# Part of the entry key: bump when the loader's output changes so old entries are rebuilt
+FORMAT = 2
+
+class TickCache:
+    """
+    Columnar binary cache of CSV recordings.
+
+    The first load of a recording parses the CSV (all symbols) and writes one .npy file per
+    column into `<cache_dir>/<name>-<key>/`, where key = hash(abs path, size, mtime, kind).
+    Later loads np.load(mmap_mode="r") those files: no parsing, pages are read on demand
+    and shared by every process mapping the same files. A changed source gets a new key;
+    stale entries of the same source are removed when the new one is written.
+    """
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or settings.TICK_CACHE_DIR
+        self.last_hit = False # Whether the last load() came from the cache
+
+    def entry_dir(self, path: str, bars: bool = False) -> str:
+        src = os.path.abspath(path)
+        st = os.stat(src)
+        key = hashlib.sha1(f"{src}|{st.st_size}|{st.st_mtime_ns}|{self._kind(bars)}|{FORMAT}".encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{self._name(src)}-{key}")
+
+    def load(self, path: str, bars: bool = False, symbols: Optional[Sequence[str]] = None):
+        """Same result as load_ticks / load_bars (but columns are read-only memmaps)"""
+        entry = self.entry_dir(path, bars)
+        self.last_hit = os.path.exists(os.path.join(entry, "meta.json"))
+        if not self.last_hit:
+            self._build(path, bars, entry)
+        return self._open(entry, bars, symbols)
+
+    def _build(self, path, bars, entry):
+        data = load_bars(path) if bars else load_ticks(path)
+        tmp = f"{entry}.tmp{os.getpid()}"
+        os.makedirs(tmp, exist_ok=True)
+        for name in data._fields[:-1]:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(data, name))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"source": os.path.abspath(path), "kind": self._kind(bars),
+                       "symbols": list(data.symbols), "rows": len(data.time)}, f)
+
+        # Drop older entries of the same source, then publish atomically
+        for old in glob.glob(os.path.join(self.cache_dir, f"{self._name(path)}-*")):
+            if old in (entry, tmp) or ".tmp" in os.path.basename(old):
+                continue # Being written (by us or another process)
+            if self._source(old) == (os.path.abspath(path), self._kind(bars)):
+                shutil.rmtree(old, ignore_errors=True)
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True) # Another process published it first
+        logger.info(f"Tick cache built for {path} -> {entry}")
+
+    def _open(self, entry, bars, symbols):
+        with open(os.path.join(entry, "meta.json")) as f:
+            meta = json.load(f)
+        cls = BarColumns if bars else TickColumns
+        columns = [np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r") for name in cls._fields[:-1]]
+        all_symbols = tuple(meta["symbols"])
+
+        if symbols is None or set(all_symbols) <= set(symbols):
+            return cls(*columns, all_symbols)
+
+        # Subset: gather the rows (a copy), codes renumbered in first-appearance order
+        wanted = [all_symbols.index(s) for s in symbols if s in all_symbols]
+        mask = np.isin(columns[1], wanted)
+        codes = columns[1][mask]
+        kept = tuple(all_symbols[c] for c in dict.fromkeys(codes.tolist()))
+        lut = np.zeros(len(all_symbols), dtype=np.int16)
+        for i, sym in enumerate(kept):
+            lut[all_symbols.index(sym)] = i
+        return cls(columns[0][mask], lut[codes], *(col[mask] for col in columns[2:]), kept)
+
+    @staticmethod
+    def _name(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    @staticmethod
+    def _kind(bars):
+        return "bars" if bars else "ticks"
+
+    @staticmethod
+    def _source(entry):
+        """(source path, kind) of an entry, None if broken"""
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                meta = json.load(f)
+            return meta["source"], meta["kind"]
+        except (OSError, ValueError, KeyError):
+            return None
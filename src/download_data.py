@@ -30,7 +30,7 @@ async def fetch_candles(client, symbol, start_ts, end_ts):
         print(f"Request failed: {e}")
         return []
 
-async def main():
+async def main(bars=False):
     print(f"Starting bulk download: {DAYS_HISTORY} days of 1m data for {BINANCE_SYMBOL}...")
     
     end_date = datetime.now(timezone.utc)
@@ -40,14 +40,21 @@ async def main():
     final_end = end_date.timestamp()
     
     os.makedirs("data/raw", exist_ok=True)
-    filename = f"data/raw/history_synth_{TARGET_SYMBOL}_3Y.csv"
+    if bars:
+        # Raw 1m bars for the backtest bar mode (4x smaller than synthetic ticks)
+        filename = f"data/raw/history_bars_{TARGET_SYMBOL}_3Y.csv"
+    else:
+        filename = f"data/raw/history_synth_{TARGET_SYMBOL}_3Y.csv"
     
     total_candles = 0
     
     async with httpx.AsyncClient() as client:
         with open(filename, "w", newline="") as f:
             writer = csv.writer(f)
-            writer.writerow(["timestamp", "symbol", "price", "volume"])
+            if bars:
+                writer.writerow(["timestamp", "symbol", "open", "high", "low", "close", "volume"])
+            else:
+                writer.writerow(["timestamp", "symbol", "price", "volume"])
             
             print(f"Fetching data from {start_date.isoformat()} to {end_date.isoformat()}")
             
@@ -70,9 +77,13 @@ async def main():
                         cl = float(c[4])
                         v = float(c[5])
                         
-                        # Generate 4 synthetic ticks
                         dt = datetime.fromtimestamp(ts_ms/1000, timezone.utc)
                         
+                        if bars:
+                            writer.writerow([dt.isoformat(), TARGET_SYMBOL, o, h, l, cl, v])
+                            continue
+                            
+                        # Generate 4 synthetic ticks
                         # 1. Open
                         writer.writerow([dt.isoformat(), TARGET_SYMBOL, o, v/4])
                         # 2. High
@@ -104,8 +115,15 @@ async def main():
                 # Rate limit safety
                 await asyncio.sleep(0.1)
 
-    print(f"\nSuccess! Saved {total_candles} candles ({total_candles*4} ticks) to: {filename}")
+    if bars:
+        print(f"\nSuccess! Saved {total_candles} bars to: {filename}")
+    else:
+        print(f"\nSuccess! Saved {total_candles} candles ({total_candles*4} ticks) to: {filename}")
     print(f"You can now use this file for training or huge backtests.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    import argparse
+    parser = argparse.ArgumentParser(description="Download Binance 1m history")
+    parser.add_argument("--bars", action="store_true", help="Save OHLCV bars instead of 4 synthetic ticks per bar")
+    args = parser.parse_args()
+    asyncio.run(main(bars=args.bars))
@@ -15,13 +15,14 @@ from src.core.persistence import persistence
 from src.core.recovery import recovery
 from src.core.watchdog import watchdog
 from src.core.inference import InferenceService
-from src.core.risk import RiskManager
-from src.core.broker import BacktestBroker, IBroker
-from src.strategies.reverse_pattern import ReversePatternStrategy
+from src.core.model_registry import ModelRegistry
+from src.core.scheduler import CandleScheduler
+from src.core.paper import build_paper_stack
 
 # Global Strategy Instance (to reference inside listeners)
 bot_strategies = {}
 paper_broker = None
+candle_scheduler = None
 
 async def on_tick_processor(tick: MarketTick):
     """
@@ -41,7 +42,7 @@ async def on_tick_processor(tick: MarketTick):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global bot_strategies, paper_broker
+    global bot_strategies, paper_broker, candle_scheduler
     
     # Startup
     logger.info("Gaia System Initialized", extra={"version": settings.APP_VERSION, "mode": settings.RUN_MODE})
@@ -60,34 +61,20 @@ async def lifespan(app: FastAPI):
         logger.info("Starting in PAPER MODE - Virtual Trading Active")
         trading_control.resume_trading()
         
-        # A. Initialize Broker (Virtual/Backtest Broker for Paper Trading)
-        # We start with $10,000 Paper Money
-        paper_broker = BacktestBroker(initial_balance=10000.0)
-        
-        # B. Initialize AI
-        ai_service = InferenceService()
-        
-        # C. Initialize Risk Manager
-        # We increase max_position_size because Strategies now manage risk sizing dynamically.
-        # Set to 1000.0 as a sanity limit.
-        risk_engine = RiskManager(min_confidence=0.5, max_position_size=1000.0)
-        
-        # Wrap the Paper Broker with SafeBroker if we want risk checks
-        from src.core.risk import SafeBroker
-        safe_broker = SafeBroker(inner=paper_broker, risk_manager=risk_engine)
-
-        # D. Initialize Strategies (Multi-Symbol)
-        bot_strategies = {}
-        for sym in settings.KRAKEN_SYMBOLS:
-            bot_strategies[sym] = ReversePatternStrategy(
-                symbol=sym,
-                broker=safe_broker,
-                filter_bearish=True,
-                filter_bullish=True,
-                inference_service=ai_service
-            )
+        # A-D. Broker ($10,000 Paper Money) -> Risk Manager -> Strategies (Multi-Symbol)
+        # Same wiring as the portfolio backtest (src/core/paper.py)
+        # Per-symbol models (loaded lazily) if configured, else one shared model
+        ai_service = ModelRegistry() if settings.INFERENCE_MODELS else InferenceService()
+        stack = build_paper_stack(settings.KRAKEN_SYMBOLS, inference_service=ai_service)
+        paper_broker = stack.broker
+        bot_strategies = stack.strategies
+        for sym in bot_strategies:
             logger.info(f"Strategy Initialized for {sym}")
 
+        # Close all symbols' candles together at the minute boundary (+ grace for late ticks)
+        if settings.CANDLE_TIMER_ENABLED:
+            candle_scheduler = CandleScheduler(bot_strategies.values())
+
         # E. Wire Data Feed
         # Also record data while trading for analysis
         await recorder.start()
@@ -105,15 +92,20 @@ async def lifespan(app: FastAPI):
         paper_broker.set_notifier(notify_trade)
 
         telegram_service.set_broker(paper_broker)
+        telegram_service.set_inference(ai_service)
         logger.info("PAPER Trading Environment Ready. Waiting for Ticks...")
 
     await telegram_service.start()
     await kraken_ws_client.start()
+    if candle_scheduler:
+        await candle_scheduler.start()
     
     yield
     
     # Shutdown
     logger.info("Shutdown Initiated...")
+    if candle_scheduler:
+        await candle_scheduler.stop()
     await kraken_ws_client.stop()
     await telegram_service.stop()
     watchdog.stop()
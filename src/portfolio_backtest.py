@@ -0,0 +1,115 @@
+import time
+import heapq
+import asyncio
+import argparse
+import logging
+from operator import itemgetter
+from typing import Iterator, Optional, Sequence, Tuple
+import pandas as pd
+from src.config import settings
+from src.core.loader import iter_ticks
+from src.core.paper import build_paper_stack
+from src.core.scheduler import CandleScheduler
+from src.core.inference import InferenceService
+
+logger = logging.getLogger("Gaia")
+
+def merged_ticks(sources: Sequence[str], symbols: Optional[Sequence[str]] = None,
+                 chunksize: int = 200_000) -> Iterator[Tuple[int, str, float, float]]:
+    """
+    K-way merge of time-sorted tick recordings -> (epoch ns, symbol, price, volume).
+    Each source is streamed in chunks, so memory stays bounded by k chunks whatever the
+    total size. Ties keep the order of `sources`.
+    """
+    def stream(path):
+        for chunk in iter_ticks(path, symbols, chunksize):
+            names = [chunk.symbols[c] for c in chunk.symbol.tolist()]
+            yield from zip(chunk.time.tolist(), names, chunk.price.tolist(), chunk.volume.tolist())
+
+    return heapq.merge(*(stream(path) for path in sources), key=itemgetter(0))
+
+class PortfolioBacktest:
+    """
+    Replays several symbols through the PAPER trading stack (build_paper_stack): one
+    BacktestBroker behind one SafeBroker/RiskManager, a strategy per symbol on a shared
+    candle store and, like live, the candle timer closing every symbol's minute together
+    (driven by the tick clock instead of the wall clock).
+    """
+    def __init__(self, sources: Sequence[str], symbols: Optional[Sequence[str]] = None,
+                 timer: Optional[bool] = None, strategy_params: Optional[dict] = None, chunksize: int = 200_000):
+        self.sources = list(sources)
+        self.symbols = list(symbols or settings.KRAKEN_SYMBOLS)
+        self.chunksize = chunksize
+        self.stack = build_paper_stack(self.symbols, inference_service=InferenceService(),
+                                       strategy_params=strategy_params)
+        if timer is None:
+            timer = settings.CANDLE_TIMER_ENABLED
+        self.scheduler = CandleScheduler(self.stack.strategies.values()) if timer else None
+        self.ticks = 0
+        self.seconds = 0.0
+
+    async def run(self):
+        broker = self.stack.broker
+        strategies = self.stack.strategies
+        scheduler = self.scheduler
+        deadline = None
+        t0 = time.perf_counter()
+
+        for ts, symbol, price, volume in merged_ticks(self.sources, self.symbols, self.chunksize):
+            if scheduler:
+                # Minute boundary (+ grace) passed on the tick clock -> batch close
+                if deadline is None:
+                    deadline = scheduler.next_deadline(ts)
+                elif ts >= deadline:
+                    await scheduler.flush(ts)
+                    deadline = scheduler.next_deadline(ts)
+
+            # Same order as main.on_tick_processor: mark to market, then route to the strategy
+            broker.update_market_state(price, ts, symbol)
+            strategy = strategies.get(symbol)
+            if strategy:
+                await strategy.on_price(ts, price, volume)
+            self.ticks += 1
+
+        self.seconds = time.perf_counter() - t0
+        return self.summary()
+
+    def summary(self) -> pd.DataFrame:
+        """Per-symbol trades / position / PnL (realized + unrealized), plus a TOTAL row"""
+        broker = self.stack.broker
+        ledger = broker.trades
+        counts = pd.Series(ledger.symbol_ids).value_counts() if len(ledger) else pd.Series(dtype=int)
+        pnl = broker.pnl_by_symbol()
+        rows = []
+        for i, sym in enumerate(ledger.symbols):
+            rows.append({"symbol": sym, "trades": int(counts.get(i, 0)),
+                         "position": broker.get_position(sym), "pnl": pnl[sym]})
+        df = pd.DataFrame(rows, columns=["symbol", "trades", "position", "pnl"])
+        total = {"symbol": "TOTAL", "trades": len(ledger), "position": float("nan"), "pnl": broker.get_stats()["pnl"]}
+        return pd.concat([df.sort_values("pnl", ascending=False), pd.DataFrame([total])], ignore_index=True)
+
+    def report(self):
+        stats = self.stack.broker.get_stats()
+        print("\n=== Portfolio Backtest Report ===")
+        print(f"Sources: {len(self.sources)} | Symbols: {len(self.symbols)}")
+        print(f"Ticks Processed: {self.ticks} ({self.ticks / max(self.seconds, 1e-9):,.0f} ticks/sec)")
+        print(self.summary().to_string(index=False))
+        print(f"Final Equity: ${stats['equity']:.2f}")
+        print(f"Max Drawdown: {stats['max_drawdown'] * 100:.2f}%")
+        print(f"Sharpe: {stats['sharpe']:.2f}")
+        print(f"Risk Rejections: {self.stack.risk_manager.rejections}")
+        print("=================================")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gaia Portfolio Backtest (PAPER wiring, all symbols)")
+    parser.add_argument("--file", action="append", required=True,
+                        help="Tick recording (repeat per symbol file; a file may hold several symbols)")
+    parser.add_argument("--symbols", default=None, help="Comma-separated symbols (default: settings.KRAKEN_SYMBOLS)")
+    parser.add_argument("--no-timer", action="store_true", help="Close candles on the next tick instead of the candle timer")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    symbols = args.symbols.split(",") if args.symbols else None
+    bt = PortfolioBacktest(args.file, symbols, timer=False if args.no_timer else None)
+    asyncio.run(bt.run())
+    bt.report()
@@ -1,17 +1,217 @@
 from src.core.strategy import Strategy
 from src.core.logger import logger
 from src.core.broker import IBroker
+from src.core.indicators import SMA
+import asyncio
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Optional
 
+# Number of candles a signal looks at (current candle + 5 of context)
+PATTERN_WINDOW = 6
+
+def reverse_pattern_signals(opens, highs, lows, closes, ma, filter_bearish: bool = False, filter_bullish: bool = False):
+    """
+    Reverse-pattern rule definitions, shared by the live path and the vectorized scan.
+
+    Inputs are time-first candle windows with the evaluated candle last: 6 Python floats
+    for a single candle (live, cheapest) or arrays of shape (6, ...) for many (scan /
+    multi-symbol, pass transposed views). `ma` is the MA value for the evaluated
+    candle(s). Returns (bearish, bullish) as bools, or bool arrays of shape (...).
+    """
+    o0, o1, o2 = opens[-1], opens[-2], opens[-3]
+    c0, c1, c2 = closes[-1], closes[-2], closes[-3]
+    h1, l1 = highs[-2], lows[-2]
+
+    # --- BEARISH ---
+    # MA comparisons against NaN are False, same as "if not isna(ma) else False"
+    bearish_filter = (c0 > ma) if filter_bearish else True
+
+    is_bearish_pattern_1 = (c2 > o2) & (c1 < o1) & (c0 < l1) # Green, Red, Close breaks Low[1]
+    is_bearish_pattern_2 = (c1 > o1) & (c0 < o0) & (c0 < l1) # Green, Red breaking Low[1]
+
+    is_higher_high_context = (
+        (highs[-3] > highs[-5]) &
+        (highs[-2] > highs[-6]) &
+        (highs[-1] > highs[-5]) &
+        (highs[-1] > highs[-6])
+    )
+
+    bearish = (is_bearish_pattern_1 | is_bearish_pattern_2) & is_higher_high_context & bearish_filter
+
+    # --- BULLISH ---
+    bullish_filter = (c0 < ma) if filter_bullish else True
+
+    is_bullish_pattern_1 = (c2 < o2) & (c1 > o1) & (c0 > h1) # Red, Green, Close breaks High[1]
+    is_bullish_pattern_2 = (c1 < o1) & (c0 > o0) & (c0 > h1) # Red, Green breaking High[1]
+
+    is_lower_low_context = (
+        (lows[-3] < lows[-5]) &
+        (lows[-2] < lows[-6]) &
+        (lows[-1] < lows[-5]) &
+        (lows[-1] < lows[-6])
+    )
+
+    bullish = (is_bullish_pattern_1 | is_bullish_pattern_2) & is_lower_low_context & bullish_filter
+
+    # No trading at all while the MA is still warming up if any filter is on
+    if filter_bearish or filter_bullish:
+        ma_ready = ma == ma # Not NaN
+        bearish = bearish & ma_ready
+        bullish = bullish & ma_ready
+
+    return bearish, bullish
+
+def scan_signals(opens, highs, lows, closes, ma_period: int = 50, filter_bearish: bool = False, filter_bullish: bool = False):
+    """
+    Vectorized whole-history scan: full OHLC arrays in, (bearish, bullish) boolean arrays out,
+    aligned with the input candles. Gives the same signals as replaying the candles through
+    ReversePatternStrategy.execute (the MA is the same pandas rolling mean the streaming SMA
+    reproduces bit-for-bit).
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
+    bearish = np.zeros(n, dtype=bool)
+    bullish = np.zeros(n, dtype=bool)
+    if n < PATTERN_WINDOW:
+        return bearish, bullish
+
+    ma = pd.Series(closes).rolling(window=ma_period).mean().to_numpy()
+
+    def windows(x):
+        # (6, n - 5) zero-copy view, column i = candles i..i+5
+        return sliding_window_view(np.asarray(x, dtype=np.float64), PATTERN_WINDOW).T
+
+    k = PATTERN_WINDOW - 1
+    bearish[k:], bullish[k:] = reverse_pattern_signals(
+        windows(opens), windows(highs), windows(lows), windows(closes), ma[k:],
+        filter_bearish, filter_bullish
+    )
+    return bearish, bullish
+
 class ReversePatternStrategy(Strategy):
-    def __init__(self, symbol: str, broker: Optional[IBroker] = None, filter_bearish: bool = False, filter_bullish: bool = False, inference_service=None):
-        super().__init__(symbol, broker)
-        self.ma_period = 50
+    def __init__(self, symbol: str, broker: Optional[IBroker] = None, filter_bearish: bool = False, filter_bullish: bool = False, inference_service=None, timeframes=(1,), candle_store=None,
+                 ma_period: int = 50, min_ai_confidence: float = 0.5, risk_fraction: float = 0.03,
+                 sl_buffer: float = 0.001, tp1_r: float = 2.0, tp2_r: float = 3.0):
+        super().__init__(symbol, broker, timeframes=timeframes, candle_store=candle_store)
+        self.ma_period = ma_period # Registers the streaming SMA (see setter)
         self.filter_bearish = filter_bearish
         self.filter_bullish = filter_bullish
         self.inference_service = inference_service
-        self.min_ai_confidence = 0.5
+        self.score_table = None # Precomputed AI scores (backtests), see src.core.scores
+        self.min_ai_confidence = min_ai_confidence
+        # Trade management
+        self.risk_fraction = risk_fraction # Equity risked per signal
+        self.sl_buffer = sl_buffer # SL distance beyond the signal candle (fraction of price)
+        self.tp1_r = tp1_r # Targets in multiples of the risk (R)
+        self.tp2_r = tp2_r
+
+    @property
+    def ma_period(self) -> int:
+        return self._ma_period
+
+    @ma_period.setter
+    def ma_period(self, period: int):
+        # (Re-)register the trend filter MA; it is warmed up on the buffered candles
+        self._ma_period = period
+        self.register_indicator("ma", SMA(period))
+
+    def on_restore(self):
+        # Checkpoint taken with another MA period (forked run): rebuild it on the restored candles
+        ma = self.indicators.get("ma")
+        if ma is None or ma.period != self._ma_period:
+            self.ma_period = self._ma_period
+
+    def detect(self):
+        """Evaluate the pattern rules on the latest candle -> (bearish, bullish)"""
+        # Plain floats: scalar Python comparisons are much cheaper than 0-d numpy ops
+        opens, highs, lows, closes, _ = self.candles.window(PATTERN_WINDOW).T.tolist()
+        return reverse_pattern_signals(
+            opens, highs, lows, closes,
+            self.indicators["ma"].value, self.filter_bearish, self.filter_bullish
+        )
+
+    @classmethod
+    def detect_batch(cls, strategies):
+        """
+        Evaluate the pattern rules on the latest candle of many strategies at once.
+        Returns (bearish, bullish) boolean arrays aligned with `strategies`; every strategy
+        must hold at least PATTERN_WINDOW candles.
+        """
+        w = PATTERN_WINDOW
+        bearish = np.zeros(len(strategies), dtype=bool)
+        bullish = np.zeros(len(strategies), dtype=bool)
+
+        # Group by filter settings and storage (normally one group for the whole portfolio)
+        groups = {}
+        for i, s in enumerate(strategies):
+            key = (s.filter_bearish, s.filter_bullish, id(s.candle_store))
+            groups.setdefault(key, []).append(i)
+
+        for (filter_bearish, filter_bullish, _), idx in groups.items():
+            members = [strategies[i] for i in idx]
+            store = members[0].candle_store
+            if store is not None:
+                # One fancy-index gather over the shared symbols x time x OHLCV block
+                windows = store.windows([store.slots[s.symbol] for s in members], w)
+            else:
+                windows = np.stack([s.candles.window(w) for s in members])
+            ma = np.array([s.indicators["ma"].value for s in members], dtype=np.float64)
+
+            b, u = reverse_pattern_signals(
+                windows[..., 0].T, windows[..., 1].T, windows[..., 2].T, windows[..., 3].T, ma,
+                filter_bearish, filter_bullish
+            )
+            bearish[idx] = b
+            bullish[idx] = u
+        return bearish, bullish
+
+    @classmethod
+    async def execute_batch(cls, strategies):
+        """Vectorized evaluation for all symbols that closed a candle, then per-symbol order dispatch"""
+        ready = [s for s in strategies if len(s.candles) >= PATTERN_WINDOW]
+        if not ready:
+            return
+        bearish, bullish = cls.detect_batch(ready)
+        await asyncio.gather(*(
+            s.execute(signals=(b, u))
+            for s, b, u in zip(ready, bearish, bullish) if b or u
+        ))
+
+    def scan(self, opens, highs, lows, closes):
+        """Vectorized signals over a whole history with this strategy's settings"""
+        return scan_signals(opens, highs, lows, closes, self.ma_period, self.filter_bearish, self.filter_bullish)
+
+    def _ai_features(self):
+        """
+        Feature vector for the AI filter, or None if there is not enough history.
+        """
+        # Construct simplified feature vector from last 5 candles
+        # [Open, High, Low, Close, Volume] * 5 = 25 features
+        window = self.candles.window(5)
+        if len(window) < 5:
+            return None
+            
+        # Flatten OHLCV to 1D array (contiguous view, no copy)
+        return window.reshape(-1)
+
+    def _precomputed_score(self) -> float:
+        """Score of the latest candle from the score table, NaN if there is none"""
+        if self.score_table is None or not len(self.candles):
+            return float("nan")
+        return self.score_table.lookup(int(self.candles.times[-1]))
+
+    def _ai_verdict(self, score: float) -> bool:
+        # Since we don't have a real model trained for 'Bull/Bear' specifically yet,
+        # this logic is placeholder. 
+        # Real implementation would match model output node.
+        
+        # For now, if mock mode (score 0.0), we pass.
+        if score == 0.0: 
+            return True
+            
+        return score > self.min_ai_confidence
 
     async def _check_ai_signal(self) -> bool:
         """
@@ -19,212 +219,130 @@ class ReversePatternStrategy(Strategy):
         """
         if not self.inference_service:
             return True
-            
-        # Construct simplified feature vector from last 5 candles
-        # [Open, High, Low, Close, Volume] * 5 = 25 features
-        df = self.candles.df.tail(5)
-        if len(df) < 5:
+        score = self._precomputed_score()
+        if score == score:
+            return self._ai_verdict(score)
+        features = self._ai_features()
+        if features is None:
             return False
-            
-        # Flatten OHLCV to 1D array
-        features = df[['open', 'high', 'low', 'close', 'volume']].values.flatten()
         
         # Get prediction (Range -1.0 to 1.0, or 0.0 to 1.0 depending on model)
         # Assuming model outputs probability of UP move (0 to 1)
-        # But wait, InferenceService in src/core/inference.py returns float.
-        # Let's assume > 0.6 is Buy, < 0.4 is Sell?
-        # Or simple 'Confidence' score?
-        
-        # Checking src/core/inference.py logic... 
-        # (It currently returns a simple float, mock returns 0.0)
-        
         try:
-            score = await self.inference_service.predict(features)
-            
-            # Since we don't have a real model trained for 'Bull/Bear' specifically yet,
-            # this logic is placeholder. 
-            # Real implementation would match model output node.
-            
-            # For now, if mock mode (score 0.0), we pass.
-            if score == 0.0: 
-                return True
-                
-            return score > self.min_ai_confidence
-            
+            return self._ai_verdict(await self.inference_service.predict(features))
         except Exception as e:
             logger.error(f"AI Check Failed: {e}")
             return True # Fail open? or Fail safe? Fail open for now.
 
-    async def execute(self):
+    def _check_ai_signal_sync(self) -> bool:
+        """_check_ai_signal for synchronous drivers (inference inline, no executor hop)"""
+        if not self.inference_service:
+            return True
+        score = self._precomputed_score()
+        if score == score:
+            return self._ai_verdict(score)
+        features = self._ai_features()
+        if features is None:
+            return False
+        try:
+            return self._ai_verdict(self.inference_service.predict_sync(features))
+        except Exception as e:
+            logger.error(f"AI Check Failed: {e}")
+            return True
+
+    def _signals(self, signals=None):
+        """(bearish, bullish) for the latest candle; `signals` if already evaluated (batch)"""
         # Need at least 6 candles for context (High[5]/Low[5] -> Python index -6)
-        if len(self.candles.df) < 6:
-            return
+        if len(self.candles) < 6:
+            return False, False
+        return signals if signals is not None else self.detect()
 
-        df = self.candles.df
-        
-        c0 = df.iloc[-1]
-        c1 = df.iloc[-2]
-        c2 = df.iloc[-3]
-        
-        highs = df['high']
-        lows = df['low']
-        
-        ma50_series = self.candles.sma(self.ma_period)
-        ma50 = ma50_series.iloc[-1]
-        
-        if pd.isna(ma50) and (self.filter_bearish or self.filter_bullish):
-             return
-        
-        # --- BEARISH LOGIC ---
-        is_bearish_ma_condition = c0.close > ma50 if not pd.isna(ma50) else False
-        bearish_filter = is_bearish_ma_condition if self.filter_bearish else True
-
-        is_b1_m2_green = c2.close > c2.open
-        is_b1_m1_red = c1.close < c1.open
-        is_b1_c0_low_break = c0.close < c1.low
-        is_bearish_pattern_1 = is_b1_m2_green and is_b1_m1_red and is_b1_c0_low_break
-        
-        is_b2_m1_green = c1.close > c1.open
-        is_b2_c0_red = c0.close < c0.open
-        is_b2_c0_low_break = c0.close < c1.low
-        is_bearish_pattern_2 = is_b2_m1_green and is_b2_c0_red and is_b2_c0_low_break
-        
-        is_h_m2_higher_than_m4 = highs.iloc[-3] > highs.iloc[-5]
-        is_h_m1_higher_than_m5 = highs.iloc[-2] > highs.iloc[-6]
-        is_h_c0_higher_than_m4 = highs.iloc[-1] > highs.iloc[-5]
-        is_h_c0_higher_than_m5 = highs.iloc[-1] > highs.iloc[-6]
-        
-        is_higher_high_context = (
-            is_h_m2_higher_than_m4 and 
-            is_h_m1_higher_than_m5 and 
-            is_h_c0_higher_than_m4 and 
-            is_h_c0_higher_than_m5
-        )
-        
-        final_bearish = (is_bearish_pattern_1 or is_bearish_pattern_2) and is_higher_high_context and bearish_filter
+    async def execute(self, signals=None):
+        """Act on the latest candle. `signals` = (bearish, bullish) if already evaluated (batch)."""
+        final_bearish, final_bullish = self._signals(signals)
+        if not (final_bearish or final_bullish):
+            return
         
         # Get current position
-        current_pos = 0.0
-        if self.broker:
-            current_pos = self.broker.get_position(self.symbol)
+        current_pos = self.broker.get_position(self.symbol) if self.broker else 0.0
 
+        # Same decisions as execute_sync(); only the AI call and order placement await
         if final_bearish:
-            # Check AI Filter
             ai_approved = await self._check_ai_signal()
-            
-            if current_pos >= 0 and ai_approved:
-                logger.info(f"Signal: BEARISH DETECTED on {self.symbol} (Pos: {current_pos}) | AI: {ai_approved}")
-                if self.broker:
-                    # 1. Close Existing Long if any
-                    if current_pos > 0:
-                        await self.broker.place_order(self.symbol, "sell", "mkt", current_pos)
-                        logger.info(f"Closing Long {current_pos} on {self.symbol}")
-                    
-                    # 2. Calculate New Short Size based on Risk
-                    # SL = High of Signal Candle (c1, previous closed) + Buffer
-                    # User requested "Signal Candle". Since we enter on c0 breaking c1, c1 is the reference.
-                    sl_price = c1.high * 1.001
-                    entry_price = c0.close
-                    
-                    risk_per_unit = sl_price - entry_price
-                    
-                    # Get Account Equity
-                    stats = self.broker.get_stats()
-                    equity = stats.get('equity', 10000.0)
-                    risk_amount = equity * 0.03 # 3% Risk
-                    
-                    if risk_per_unit > 0:
-                        qty = risk_amount / risk_per_unit
-                    else:
-                        qty = 0.0 # Should not happen unless SL < Entry (impossible for Short)
-                    
-                    # 3. Open Short (Split into 2 TPs)
-                    if qty > 0:
-                        qty_half = qty / 2.0
-                        tp1_dist = risk_per_unit * 2.0 # risk_per_unit is positive (SL - Entry) for Shorts? 
-                        # Wait, logic above: risk_per_unit = sl_price - entry_price.
-                        # For SHORT: SL > Entry. risk_per_unit is POSITIVE.
-                        # TP Target is Entry - (2 * Risk)
-                        # So TP1 = Entry - (2 * risk_per_unit)
-                        # TP2 = Entry - (3 * risk_per_unit)
-                        
-                        tp1_price = entry_price - (risk_per_unit * 2.0)
-                        tp2_price = entry_price - (risk_per_unit * 3.0)
-                        
-                        logger.info(f"Opening Short {qty:.4f} {self.symbol} (Split TPs). Risk: ${risk_amount:.2f}")
-                        
-                        # Order A (TP1)
-                        await self.broker.place_order(self.symbol, "sell", "mkt", qty_half, params={"sl": sl_price, "tp": tp1_price})
-                        # Order B (TP2)
-                        await self.broker.place_order(self.symbol, "sell", "mkt", qty_half, params={"sl": sl_price, "tp": tp2_price})
-
-        # --- BULLISH LOGIC ---
-        is_bullish_ma_condition = c0.close < ma50 if not pd.isna(ma50) else False
-        bullish_filter = is_bullish_ma_condition if self.filter_bullish else True
-        
-        is_l1_m2_red = c2.close < c2.open
-        is_l1_m1_green = c1.close > c1.open
-        is_l1_c0_high_break = c0.close > c1.high
-        is_bullish_pattern_1 = is_l1_m2_red and is_l1_m1_green and is_l1_c0_high_break
-        
-        is_l2_m1_red = c1.close < c1.open
-        is_l2_c0_green = c0.close > c0.open
-        is_l2_c0_high_break = c0.close > c1.high
-        is_bullish_pattern_2 = is_l2_m1_red and is_l2_c0_green and is_l2_c0_high_break
+            for order in self._orders("sell", current_pos, ai_approved):
+                await self.broker.place_order(self.symbol, *order)
+                
+        if final_bullish:
+            ai_approved = await self._check_ai_signal()
+            for order in self._orders("buy", current_pos, ai_approved):
+                await self.broker.place_order(self.symbol, *order)
+
+    def execute_sync(self, signals=None):
+        """execute() for synchronous drivers (backtests): never touches the event loop"""
+        final_bearish, final_bullish = self._signals(signals)
+        if not (final_bearish or final_bullish):
+            return
         
-        is_l_m2_lower_than_m4 = lows.iloc[-3] < lows.iloc[-5]
-        is_l_m1_lower_than_m5 = lows.iloc[-2] < lows.iloc[-6]
-        is_l_c0_lower_than_m4 = lows.iloc[-1] < lows.iloc[-5]
-        is_l_c0_lower_than_m5 = lows.iloc[-1] < lows.iloc[-6]
+        current_pos = self.broker.get_position(self.symbol) if self.broker else 0.0
+
+        if final_bearish:
+            ai_approved = self._check_ai_signal_sync()
+            for order in self._orders("sell", current_pos, ai_approved):
+                self.broker.place_order_sync(self.symbol, *order)
+                
+        if final_bullish:
+            ai_approved = self._check_ai_signal_sync()
+            for order in self._orders("buy", current_pos, ai_approved):
+                self.broker.place_order_sync(self.symbol, *order)
+
+    def _orders(self, side: str, current_pos: float, ai_approved: bool):
+        """
+        Order decisions for a signal, yielded as (side, order_type, size, price, params).
+        A generator so that each order is placed before the next one is sized: the new
+        position is sized on the equity after the opposite position was closed.
+        """
+        short = side == "sell"
+        # Bearish enters from flat/long, bullish from flat/short
+        if not ai_approved or (current_pos < 0 if short else current_pos > 0):
+            return
+        logger.info(f"Signal: {'BEARISH' if short else 'BULLISH'} DETECTED on {self.symbol} (Pos: {current_pos}) | AI: {ai_approved}")
+        if not self.broker:
+            return
+
+        # 1. Close Existing Long / Short if any
+        if current_pos != 0:
+            yield side, "mkt", abs(current_pos), None, None
+            logger.info(f"Closing {'Long' if short else 'Short'} {abs(current_pos)} on {self.symbol}")
+
+        # 2. Calculate New Size based on Risk
+        # SL = High (short) / Low (long) of the Signal Candle (c1, previous closed) + Buffer
+        # Since we enter on c0 breaking c1, c1 is the reference.
+        entry_price = float(self.candles.close[-1])
+        if short:
+            sl_price = float(self.candles.high[-2]) * (1 + self.sl_buffer)
+            risk_per_unit = sl_price - entry_price # SL > Entry for a short
+        else:
+            sl_price = float(self.candles.low[-2]) * (1 - self.sl_buffer)
+            risk_per_unit = entry_price - sl_price
         
-        is_lower_low_context = (
-            is_l_m2_lower_than_m4 and 
-            is_l_m1_lower_than_m5 and 
-            is_l_c0_lower_than_m4 and 
-            is_l_c0_lower_than_m5
-        )
+        # Get Account Equity
+        stats = self.broker.get_stats()
+        equity = stats.get('equity', 10000.0)
+        risk_amount = equity * self.risk_fraction # 3% Risk by default
         
-        final_bullish = (is_bullish_pattern_1 or is_bullish_pattern_2) and is_lower_low_context and bullish_filter
+        # Should not be <= 0 unless the signal candle is inside the buffer
+        qty = risk_amount / risk_per_unit if risk_per_unit > 0 else 0.0
         
-        if final_bullish:
-             ai_approved = await self._check_ai_signal()
-             
-             if current_pos <= 0 and ai_approved:
-                logger.info(f"Signal: BULLISH DETECTED on {self.symbol} (Pos: {current_pos}) | AI: {ai_approved}")
-                if self.broker:
-                    # 1. Close Existing Short if any
-                    if current_pos < 0:
-                        await self.broker.place_order(self.symbol, "buy", "mkt", abs(current_pos))
-                        logger.info(f"Closing Short {abs(current_pos)} on {self.symbol}")
-                    
-                    # 2. Calculate New Long Size
-                    # SL = Low of Signal Candle (c1) - Buffer
-                    sl_price = c1.low * 0.999
-                    entry_price = c0.close
-                    
-                    risk_per_unit = entry_price - sl_price
-                    
-                    # Get Account Equity
-                    stats = self.broker.get_stats()
-                    equity = stats.get('equity', 10000.0)
-                    risk_amount = equity * 0.03 # 3% Risk
-                    
-                    if risk_per_unit > 0:
-                        qty = risk_amount / risk_per_unit
-                    else:
-                        qty = 0.0
-                        
-                    # 3. Open Long (Split into 2 TPs)
-                    if qty > 0:
-                        qty_half = qty / 2.0
-                        # For LONG: Risk = Entry - SL (Positive).
-                        # TP = Entry + (2 * Risk)
-                        tp1_price = entry_price + (risk_per_unit * 2.0)
-                        tp2_price = entry_price + (risk_per_unit * 3.0)
-                        
-                        logger.info(f"Opening Long {qty:.4f} {self.symbol} (Split TPs). Risk: ${risk_amount:.2f}")
-                        
-                        # Order A (TP1)
-                        await self.broker.place_order(self.symbol, "buy", "mkt", qty_half, params={"sl": sl_price, "tp": tp1_price})
-                        # Order B (TP2)
-                        await self.broker.place_order(self.symbol, "buy", "mkt", qty_half, params={"sl": sl_price, "tp": tp2_price})
+        # 3. Open Position (Split into 2 TPs)
+        if qty > 0:
+            qty_half = qty / 2.0
+            # TP = Entry -/+ (R multiple * Risk)
+            direction = -1.0 if short else 1.0
+            tp1_price = entry_price + direction * risk_per_unit * self.tp1_r
+            tp2_price = entry_price + direction * risk_per_unit * self.tp2_r
+            
+            logger.info(f"Opening {'Short' if short else 'Long'} {qty:.4f} {self.symbol} (Split TPs). Risk: ${risk_amount:.2f}")
+            
+            # Order A (TP1), Order B (TP2)
+            yield side, "mkt", qty_half, None, {"sl": sl_price, "tp": tp1_price}
+            yield side, "mkt", qty_half, None, {"sl": sl_price, "tp": tp2_price}
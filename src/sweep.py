@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import argparse
+import itertools
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from src.backtest import BacktestRunner
+from src.core.tick_cache import TickCache
+from src.core.inference import InferenceService
+from src.core.scores import ScoreTable, precompute_scores
+from src.core.logger import logger as core_logger
+
+logger = logging.getLogger("Gaia")
+# Strategy / broker log on the core JSON logger; both are quieted in workers
+QUIET_LOGGERS = (logger, core_logger)
+
+# Stats columns reported for every run
+RESULT_COLUMNS = ["pnl", "equity", "trades_count", "max_drawdown", "sharpe", "seconds"]
+# Columns where smaller is better (ranked ascending); the rest rank largest first
+LOWER_IS_BETTER = {"max_drawdown", "seconds"}
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[dict]:
+    """{"ma_period": [20, 50], "tp1_r": [1.5, 2]} -> one params dict per combination"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+def parse_param(spec: str):
+    """'ma_period=20,50,100' -> ('ma_period', [20, 50, 100]) (values parsed as JSON when possible)"""
+    name, _, values = spec.partition("=")
+    parsed = []
+    for v in values.split(","):
+        try:
+            parsed.append(json.loads(v))
+        except ValueError:
+            parsed.append(v)
+    return name.strip(), parsed
+
+# --- Worker side ---
+# Each worker maps the cached columns once; pages are shared between processes by the OS.
+
+_worker = {}
+
+def primary_timeframe(params: dict) -> int:
+    """Candle interval (minutes) the strategy built from `params` trades and scores on"""
+    return min(params.get("timeframes") or (1,))
+
+def _init_worker(filepath, symbol, bars, intrabar_rule, cache_dir, score_grids):
+    for log in QUIET_LOGGERS:
+        log.setLevel(logging.WARNING) # Per-candle logs would dominate the runtime
+    cache = TickCache(cache_dir)
+    _worker.update(
+        data=cache.load(filepath, bars=bars, symbols=[symbol]),
+        inference=InferenceService(),
+        # Scored once by run_sweep (per primary timeframe); mapped like the tick columns
+        scores={minutes: ScoreTable.from_grid(np.load(path, mmap_mode="r"), start, span)
+                for minutes, (path, start, span) in score_grids.items()},
+        args=(filepath, symbol, bars, intrabar_rule),
+    )
+
+def _run_one(params: dict) -> dict:
+    filepath, symbol, bars, intrabar_rule = _worker["args"]
+    runner = BacktestRunner(filepath, symbol, bars=bars, intrabar_rule=intrabar_rule,
+                            strategy_params=params, inference_service=_worker["inference"], verbose=False,
+                            score_table=_worker["scores"][primary_timeframe(params)])
+    t0 = time.process_time() # CPU time: comparable to a sequential run even when cores are shared
+    stats = runner.run_sync(data=_worker["data"])
+    stats["seconds"] = time.process_time() - t0
+    return {**params, **{k: stats[k] for k in RESULT_COLUMNS}}
+
+def run_sweep(filepath: str, grid: Dict[str, Sequence], symbol: str = "PI_XBTUSD", bars: bool = False,
+              workers: Optional[int] = None, intrabar_rule: Optional[str] = None, cache_dir: Optional[str] = None,
+              rank_by: str = "pnl") -> pd.DataFrame:
+    """
+    Backtest every combination of `grid` and return the results ranked by `rank_by`, best first.
+    The recording is parsed at most once (into the tick cache); workers memory-map it.
+    workers=1 runs sequentially in this process.
+    """
+    combos = expand_grid(grid)
+    # Build the cache up front so workers only ever map it
+    cache = TickCache(cache_dir)
+    data = cache.load(filepath, bars=bars, symbols=[symbol])
+
+    # AI features only depend on the primary timeframe: score every candle once per swept
+    # timeframe, here, and hand the grids to the workers as memory-mapped .npy files
+    inference = InferenceService()
+    score_grids = {}
+    workers = workers or os.cpu_count() or 1
+    try:
+        for minutes in sorted({primary_timeframe(params) for params in combos}):
+            table = precompute_scores(data, inference, bars=bars, interval_minutes=minutes)
+            fd, path = tempfile.mkstemp(prefix="scores-", suffix=".npy", dir=cache.cache_dir)
+            os.close(fd)
+            score_grids[minutes] = (path, table.start, table.span)
+            np.save(path, table.scores)
+        initargs = (filepath, symbol, bars, intrabar_rule, cache_dir, score_grids)
+
+        if workers == 1:
+            levels = [log.level for log in QUIET_LOGGERS]
+            _init_worker(*initargs)
+            try:
+                results = [_run_one(params) for params in combos]
+            finally:
+                for log, level in zip(QUIET_LOGGERS, levels):
+                    log.setLevel(level)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                results = list(pool.map(_run_one, combos))
+    finally:
+        _worker.pop("scores", None) # Drop the mappings before removing the files
+        for path, _, _ in score_grids.values():
+            os.remove(path)
+
+    df = pd.DataFrame(results)
+    return df.sort_values(rank_by, ascending=rank_by in LOWER_IS_BETTER, kind="stable").reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gaia Parameter Sweep")
+    parser.add_argument("--file", required=True, help="Path to CSV recording")
+    parser.add_argument("--symbol", default="PI_XBTUSD", help="Symbol to backtest")
+    parser.add_argument("--bars", action="store_true", help="File holds OHLCV bars (download_data.py --bars)")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                        help="Strategy parameter values, e.g. --param ma_period=20,50 --param filter_bullish=true,false")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores, 1 = sequential)")
+    parser.add_argument("--rank", default="pnl", choices=RESULT_COLUMNS, help="Ranking column")
+    parser.add_argument("--top", type=int, default=20, help="Rows to print")
+    parser.add_argument("--out", default=None, help="Save the full table as CSV")
+    args = parser.parse_args()
+
+    grid = dict(parse_param(p) for p in args.param)
+    t0 = time.perf_counter()
+    table = run_sweep(args.file, grid, args.symbol, bars=args.bars, workers=args.workers, rank_by=args.rank)
+    elapsed = time.perf_counter() - t0
+
+    print(table.head(args.top).to_string())
+    print(f"\n{len(table)} runs in {elapsed:.1f}s ({table['seconds'].sum() / elapsed:.1f}x vs running them sequentially)")
+    if args.out:
+        table.to_csv(args.out, index=False)
@@ -2,7 +2,10 @@ import pandas as pd
 import numpy as np
 import tensorflow as tf
 import os
+import time
+import argparse
 import logging
+from src.core.inference import InferenceService, NumpyMLP
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -12,9 +15,13 @@ logger = logging.getLogger("Trainer")
 DATA_FILE = "data/raw/history_synth_PI_XBTUSD_3Y.csv"
 MODEL_DIR = "models"
 MODEL_PATH = os.path.join(MODEL_DIR, "model.tflite")
+WEIGHTS_PATH = os.path.join(MODEL_DIR, "model.npz") # NumPy backend (no TFLite runtime needed)
 LOOKBACK = 5  # Number of past candles to analyze
 FUTURE_HORIZON = 5 # Number of candles into future to predict
 TARGET_PCT = 0.001 # 0.1% move required to be a "Buy"
+# Post-training quantization variants (float32 = plain conversion, written to MODEL_PATH)
+QUANTIZATIONS = ("float32", "dynamic", "float16", "int8")
+REPRESENTATIVE_SAMPLES = 500 # Training windows used to calibrate int8 ranges
 
 def load_and_prep_data(filepath):
     logger.info(f"Loading data from {filepath}...")
@@ -109,7 +116,81 @@ def create_dataset(df):
         
     return np.array(features, dtype=np.float32), np.array(labels, dtype=np.float32)
 
-def train_model():
+def export_weights(model, path=WEIGHTS_PATH):
+    """Dense layers' weights + activations as .npz for InferenceService's NumPy backend"""
+    layers = []
+    for layer in model.layers:
+        if not isinstance(layer, tf.keras.layers.Dense):
+            continue # Dropout etc. are identity at inference
+        kernel, bias = layer.get_weights()
+        layers.append((kernel, bias, layer.activation.__name__))
+    NumpyMLP(layers).save(path)
+
+def variant_path(quantization):
+    if quantization == "float32":
+        return MODEL_PATH
+    return os.path.join(MODEL_DIR, f"model_{quantization}.tflite")
+
+def convert(model, quantization="float32", representative=None):
+    """
+    TFLite flatbuffer of `model`:
+    dynamic = int8 weights, float activations; float16 = float16 weights;
+    int8 = full integer (int8 input/output too), calibrated on `representative` windows.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != "float32":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        def representative_dataset():
+            for row in representative:
+                yield [row[None, :].astype(np.float32)]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    return converter.convert()
+
+def benchmark_variant(path, X, y, latency_samples=1000):
+    """Size, single-row latency (live path), batched cost per row and accuracy of one model file"""
+    service = InferenceService(model_path=path, backend="tflite", pool_size=1, batch_window_ms=0,
+                               cache_size=0) # Time the model, not cache lookups
+    if service.mock_mode:
+        raise RuntimeError(f"Could not load {path}")
+    rows = X[:latency_samples]
+    for row in rows[:50]: # Warm up
+        service.predict_sync(row)
+    start = time.perf_counter()
+    for row in rows:
+        service.predict_sync(row)
+    latency = (time.perf_counter() - start) / len(rows)
+
+    start = time.perf_counter()
+    scores = service.predict_batch(X)
+    per_row = (time.perf_counter() - start) / len(X)
+    return {
+        "size_kb": os.path.getsize(path) / 1024,
+        "latency_us": latency * 1e6,
+        "batch_us_per_row": per_row * 1e6,
+        "accuracy": float(np.mean((scores > 0.5) == (y > 0.5))),
+        "scores": scores,
+    }
+
+def report_variants(quantizations, X_test, y_test):
+    """Latency / accuracy table of the exported variants (agreement = same decision as float32)"""
+    results = {q: benchmark_variant(variant_path(q), X_test, y_test) for q in quantizations}
+    reference = results.get("float32")
+    logger.info(f"{'variant':<8} {'size':>8} {'latency':>10} {'batch/row':>10} {'accuracy':>9} {'agree':>7}")
+    for q, r in results.items():
+        agree = float(np.mean((r["scores"] > 0.5) == (reference["scores"] > 0.5))) if reference else float("nan")
+        logger.info(f"{q:<8} {r['size_kb']:>6.1f}KB {r['latency_us']:>8.1f}us {r['batch_us_per_row']:>8.2f}us "
+                    f"{r['accuracy']:>9.4f} {agree:>7.2%}")
+    return results
+
+def train_model(quantizations=("float32",)):
     df = load_and_prep_data(DATA_FILE)
     X, y = create_dataset(df)
     
@@ -139,17 +220,28 @@ def train_model():
     loss, acc = model.evaluate(X_test, y_test)
     logger.info(f"Test Accuracy: {acc:.4f}")
     
-    # Convert to TFLite
-    logger.info("Converting to TFLite...")
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    tflite_model = converter.convert()
-    
-    # Save
-    with open(MODEL_PATH, "wb") as f:
-        f.write(tflite_model)
+    # Convert to TFLite (one file per quantization variant)
+    rng = np.random.default_rng(0)
+    representative = X_train[rng.choice(len(X_train), min(REPRESENTATIVE_SAMPLES, len(X_train)), replace=False)]
+    for quantization in quantizations:
+        logger.info(f"Converting to TFLite ({quantization})...")
+        tflite_model = convert(model, quantization, representative)
         
-    logger.info(f"Model saved to {MODEL_PATH}")
+        # Save
+        path = variant_path(quantization)
+        with open(path, "wb") as f:
+            f.write(tflite_model)
+        logger.info(f"Model saved to {path}")
+    
+    report_variants(quantizations, X_test, y_test)
+    
+    export_weights(model)
+    logger.info(f"NumPy weights saved to {WEIGHTS_PATH}")
     logger.info("You can now run backtest with real AI filtering.")
 
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train the AI filter and export it for inference")
+    parser.add_argument("--quantize", nargs="+", default=["float32"], choices=QUANTIZATIONS + ("all",),
+                        help="TFLite variants to export and compare (float32 is written to models/model.tflite)")
+    args = parser.parse_args()
+    train_model(QUANTIZATIONS if "all" in args.quantize else tuple(dict.fromkeys(args.quantize)))
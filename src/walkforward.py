@@ -0,0 +1,183 @@
+import os
+import re
+import time
+import argparse
+import logging
+from datetime import date, datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from src.backtest import BacktestRunner
+from src.core.loader import TickColumns
+from src.core.tick_cache import TickCache
+from src.core.inference import InferenceService
+from src.core.models import to_epoch_ns
+from src.sweep import expand_grid, parse_param, RESULT_COLUMNS, LOWER_IS_BETTER, QUIET_LOGGERS
+
+logger = logging.getLogger("Gaia")
+
+# DataRecorder output: one file per UTC day
+DAY_FILE = re.compile(r"ticker_(\d{4}-\d{2}-\d{2})\.csv$")
+DAY_NS = 24 * 3600 * 1_000_000_000
+
+def find_day_files(directory: str, start: Optional[date] = None, end: Optional[date] = None) -> Dict[date, str]:
+    """{day: path} of the recorder files in `directory`, start <= day <= end"""
+    files = {}
+    for name in os.listdir(directory):
+        m = DAY_FILE.match(name)
+        if not m:
+            continue
+        day = date.fromisoformat(m.group(1))
+        if (start is None or day >= start) and (end is None or day <= end):
+            files[day] = os.path.join(directory, name)
+    return dict(sorted(files.items()))
+
+def _day_ns(day: date) -> int:
+    return to_epoch_ns(datetime(day.year, day.month, day.day))
+
+# --- Worker side ---
+
+_worker = {}
+
+def _init_worker(cache_dir):
+    for log in QUIET_LOGGERS:
+        log.setLevel(logging.WARNING)
+    _worker.update(cache=TickCache(cache_dir), inference=InferenceService())
+
+def _load_days(paths: Sequence[str], symbol: str) -> TickColumns:
+    cache = _worker["cache"]
+    parts = [cache.load(p, symbols=[symbol]) for p in paths]
+    time_, price, volume = (np.concatenate([getattr(p, f) for p in parts]) for f in ("time", "price", "volume"))
+    if len(time_) and np.any(np.diff(time_) < 0):
+        order = np.argsort(time_, kind="stable") # Recorder writes in arrival order
+        time_, price, volume = time_[order], price[order], volume[order]
+    return TickColumns(time_, np.zeros(len(time_), dtype=np.int16), price, volume, (symbol,))
+
+def run_segment(job: dict) -> dict:
+    """
+    Backtest [start, end) of the given day files with fresh account and strategy state.
+    The strategy is first warmed up (candles, indicators, no trading) on the ticks of the
+    `warmup_minutes` before start, taken from the same / preceding files.
+    """
+    data = _load_days(job["paths"], job["symbol"])
+    start_ns, end_ns = job["start_ns"], job["end_ns"]
+    i0, i1, i2 = np.searchsorted(data.time, [start_ns - job["warmup_minutes"] * 60_000_000_000, start_ns, end_ns])
+
+    runner = BacktestRunner(job["paths"][-1], job["symbol"], strategy_params=job["params"],
+                            inference_service=_worker["inference"], verbose=False)
+    runner.strategy.warm_up(data.time[i0:i1].tolist(), data.price[i0:i1].tolist(), data.volume[i0:i1].tolist())
+
+    segment = TickColumns(*(col[i1:i2] for col in data[:-1]), data.symbols)
+    t0 = time.process_time()
+    stats = runner.run_sync(data=segment)
+    stats["seconds"] = time.process_time() - t0
+    return {"segment": job["label"], **job["params"], "ticks": int(i2 - i1),
+            "warmup_ticks": int(i1 - i0), **{k: stats[k] for k in RESULT_COLUMNS}}
+
+def _map(jobs: List[dict], workers: Optional[int], cache_dir: Optional[str]) -> List[dict]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        levels = [log.level for log in QUIET_LOGGERS]
+        _init_worker(cache_dir)
+        try:
+            return [run_segment(job) for job in jobs]
+        finally:
+            for log, level in zip(QUIET_LOGGERS, levels):
+                log.setLevel(level)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_dir,)) as pool:
+        return list(pool.map(run_segment, jobs))
+
+def _job(files: Dict[date, str], symbol, first: date, last: date, warmup_minutes, params, label):
+    """Segment covering days first..last (inclusive) + the files its warm-up reaches into"""
+    warm_from = first - timedelta(days=-(-warmup_minutes // (24 * 60)))
+    paths = [p for d, p in files.items() if warm_from <= d <= last]
+    return {"paths": paths, "symbol": symbol, "start_ns": _day_ns(first), "end_ns": _day_ns(last) + DAY_NS,
+            "warmup_minutes": warmup_minutes, "params": params, "label": label}
+
+def run_days(files: Dict[date, str], symbol: str, grid: Optional[dict] = None, segment_days: int = 1,
+             warmup_minutes: int = 300, workers: Optional[int] = None, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """Every `segment_days` block of days x every parameter combination, in parallel. One row per run."""
+    days = list(files)
+    jobs = []
+    for params in expand_grid(grid or {}):
+        for k in range(0, len(days), segment_days):
+            block = days[k:k + segment_days]
+            jobs.append(_job(files, symbol, block[0], block[-1], warmup_minutes, params, block[0].isoformat()))
+    return pd.DataFrame(_map(jobs, workers, cache_dir))
+
+def best_index(scores: Sequence[float], rank_by: str) -> int:
+    """Position of the best score for `rank_by`; NaN (e.g. Sharpe without trades) ranks last"""
+    worst = np.inf if rank_by in LOWER_IS_BETTER else -np.inf
+    values = np.where(np.isnan(scores), worst, scores)
+    return int(np.argmin(values) if rank_by in LOWER_IS_BETTER else np.argmax(values))
+
+def run_walk_forward(files: Dict[date, str], symbol: str, grid: dict, train_days: int, test_days: int,
+                     rank_by: str = "pnl", warmup_minutes: int = 300, workers: Optional[int] = None,
+                     cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Rolling windows: every combination is backtested on `train_days`, the best one (by
+    `rank_by`) is then run out-of-sample on the following `test_days`; windows step by
+    `test_days`. Both phases run on the pool. One row per window (test results).
+    """
+    days = list(files)
+    combos = expand_grid(grid)
+    windows = []
+    for k in range(0, len(days) - train_days - test_days + 1, test_days):
+        windows.append((days[k:k + train_days], days[k + train_days:k + train_days + test_days]))
+
+    train_jobs = [
+        _job(files, symbol, train[0], train[-1], warmup_minutes, params, f"train {train[0]}")
+        for train, _ in windows for params in combos
+    ]
+    train_results = _map(train_jobs, workers, cache_dir)
+
+    test_jobs = []
+    for w, (train, test) in enumerate(windows):
+        scored = train_results[w * len(combos):(w + 1) * len(combos)]
+        best = best_index(np.array([r[rank_by] for r in scored], dtype=np.float64), rank_by)
+        job = _job(files, symbol, test[0], test[-1], warmup_minutes, combos[best], f"test {test[0]}")
+        job["train_score"] = scored[best][rank_by]
+        test_jobs.append(job)
+    test_results = _map(test_jobs, workers, cache_dir)
+
+    for job, result in zip(test_jobs, test_results):
+        result[f"train_{rank_by}"] = job["train_score"]
+    return pd.DataFrame(test_results)
+
+def report(table: pd.DataFrame, title: str):
+    print(f"\n=== {title} ===")
+    print(table.drop(columns=["seconds"]).to_string(index=False))
+    print(f"\nSegments: {len(table)} | Ticks: {table['ticks'].sum()}")
+    print(f"Total PnL: ${table['pnl'].sum():.2f} | Trades: {table['trades_count'].sum()}")
+    print(f"Worst Segment Drawdown: {table['max_drawdown'].max() * 100:.2f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gaia per-day / walk-forward backtests over recorder output")
+    parser.add_argument("--dir", default="data/raw", help="Directory with ticker_YYYY-MM-DD.csv files")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--symbol", default="PI_XBTUSD", help="Symbol to backtest")
+    parser.add_argument("--segment-days", type=int, default=1, help="Days per independent segment")
+    parser.add_argument("--warmup-minutes", type=int, default=300, help="History replayed (no trading) before each segment")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2", help="Strategy parameter values")
+    parser.add_argument("--train-days", type=int, default=None, help="Walk-forward: training window (enables walk-forward)")
+    parser.add_argument("--test-days", type=int, default=1, help="Walk-forward: out-of-sample window / step")
+    parser.add_argument("--rank", default="pnl", choices=RESULT_COLUMNS, help="Walk-forward selection metric")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    args = parser.parse_args()
+
+    files = find_day_files(args.dir, args.start, args.end)
+    if not files:
+        raise SystemExit(f"No recorder files in {args.dir} for the requested range")
+    grid = dict(parse_param(p) for p in args.param)
+
+    t0 = time.perf_counter()
+    if args.train_days:
+        table = run_walk_forward(files, args.symbol, grid, args.train_days, args.test_days, args.rank,
+                                 args.warmup_minutes, args.workers)
+        report(table, "Walk-Forward (out-of-sample)")
+    else:
+        table = run_days(files, args.symbol, grid, args.segment_days, args.warmup_minutes, args.workers)
+        report(table, "Per-Segment Backtest")
+    print(f"Wall time: {time.perf_counter() - t0:.1f}s")
@@ -1,7 +1,10 @@
 import pytest
 import os
 import csv
+import numpy as np
+from datetime import datetime, timedelta
 from src.backtest import BacktestRunner
+from src.core.broker import BacktestBroker
 
 @pytest.mark.asyncio
 async def test_runner_execution(tmp_path):
@@ -15,4 +18,114 @@ async def test_runner_execution(tmp_path):
     await runner.run()
     
     # Should run without error and process 1 tick
-    assert runner.broker.current_price == 100.0
+    assert runner.broker.last_prices["TEST"] == 100.0
+
+def write_history(tmp_path, n=800, seed=1):
+    """Same bars as a bar file and as download_data's 4 synthetic ticks per bar"""
+    rng = np.random.default_rng(seed)
+    t0 = datetime(2025, 1, 1)
+    closes = np.round(100 + np.cumsum(rng.normal(0, 0.5, n)), 2)
+    opens = np.concatenate([[100.0], closes[:-1]])
+    highs = np.round(np.maximum(opens, closes) + rng.uniform(0, 0.5, n), 2)
+    lows = np.round(np.minimum(opens, closes) - rng.uniform(0, 0.5, n), 2)
+    
+    bars, ticks = tmp_path / "bars.csv", tmp_path / "ticks.csv"
+    with open(bars, "w", newline="") as fb, open(ticks, "w", newline="") as ft:
+        wb, wt = csv.writer(fb), csv.writer(ft)
+        wb.writerow(["timestamp", "symbol", "open", "high", "low", "close", "volume"])
+        wt.writerow(["timestamp", "symbol", "price", "volume"])
+        for i in range(n):
+            dt = t0 + timedelta(minutes=i)
+            wb.writerow([dt.isoformat(), "TEST", opens[i], highs[i], lows[i], closes[i], 4.0])
+            for sec, price in ((0, opens[i]), (15, highs[i]), (30, lows[i]), (59, closes[i])):
+                wt.writerow([(dt + timedelta(seconds=sec)).isoformat(), "TEST", price, 1.0])
+    return str(bars), str(ticks)
+
+@pytest.mark.asyncio
+async def test_bar_mode_matches_tick_replay(tmp_path):
+    bars, ticks = write_history(tmp_path)
+    tick_runner = BacktestRunner(ticks, "TEST")
+    bar_runner = BacktestRunner(bars, "TEST", bars=True, intrabar_rule="ohlc")
+    await tick_runner.run()
+    await bar_runner.run()
+    
+    a, b = tick_runner.broker.trades, bar_runner.broker.trades
+    assert len(a) > 0
+    np.testing.assert_array_equal(a.side, b.side)
+    np.testing.assert_array_equal(a.qty, b.qty)
+    np.testing.assert_array_equal(a.price, b.price)
+    assert tick_runner.broker.get_stats()["equity"] == pytest.approx(bar_runner.broker.get_stats()["equity"])
+
+@pytest.mark.parametrize("timeframes", [(5,), (1, 5)])
+def test_bar_mode_rejects_other_timeframes(tmp_path, timeframes):
+    bars, _ = write_history(tmp_path, n=10)
+    with pytest.raises(ValueError, match="Bar mode replays 1m bars"):
+        BacktestRunner(bars, "TEST", bars=True, strategy_params={"timeframes": timeframes})
+
+@pytest.mark.parametrize("rule,position,expected", [
+    ("ohlc", 1.0, (100, 110, 90, 101)),
+    ("stop_first", 1.0, (100, 90, 110, 101)), # Long: stop below hit first
+    ("stop_first", -1.0, (100, 110, 90, 101)),
+    ("limit_first", 1.0, (100, 110, 90, 101)),
+    ("stop_first", 0.0, (100, 110, 90, 101)), # Flat -> ohlc
+    ("nearest", 0.0, (100, 110, 90, 101)),
+])
+def test_intrabar_rules(rule, position, expected):
+    broker = BacktestBroker()
+    broker.positions["X"] = position
+    assert broker.bar_path("X", 100, 110, 90, 101, rule) == expected
+
+def test_process_bar_resolves_brackets_from_high_low():
+    broker = BacktestBroker()
+    broker.update_market_state(100.0, 0, "X")
+    broker.trigger_book.add({"symbol": "X", "side": "sell", "size": 1.0, "price": 95.0, "type": "stop", "bracket_id": "b"})
+    broker.trigger_book.add({"symbol": "X", "side": "sell", "size": 1.0, "price": 105.0, "type": "limit", "bracket_id": "b"})
+    broker.positions["X"] = 1.0
+    
+    # Both legs touched inside the bar: pessimistic rule takes the stop
+    broker.process_bar("X", 100, 106, 94, 100, 1, rule="stop_first")
+    assert broker.trades.record(0)["type"] == "stop"
+    assert len(broker.active_orders) == 0
+
+@pytest.mark.asyncio
+async def test_sync_replay_matches_async_contract(tmp_path):
+    _, ticks = write_history(tmp_path)
+    sync_runner = BacktestRunner(ticks, "TEST")
+    sync_runner.run_sync()
+    
+    # Live contract: awaited on_price -> execute -> place_order
+    async_runner = BacktestRunner(ticks, "TEST")
+    data = async_runner.load()
+    for ts, price, volume in zip(data.time.tolist(), data.price.tolist(), data.volume.tolist()):
+        async_runner.broker.update_market_state(price, ts, "TEST")
+        await async_runner.strategy.on_price(ts, price, volume)
+    
+    a, b = sync_runner.broker.trades, async_runner.broker.trades
+    assert len(a) > 0
+    np.testing.assert_array_equal(a.side, b.side)
+    np.testing.assert_array_equal(a.qty, b.qty)
+    np.testing.assert_array_equal(a.price, b.price)
+    np.testing.assert_array_equal(a.time, b.time)
+
+def test_report_skips_ingest_rate_for_preloaded_data(tmp_path, capsys):
+    _, ticks = write_history(tmp_path, n=50)
+    runner = BacktestRunner(ticks, "TEST")
+    runner.run_sync()
+    assert "Ingest:" in capsys.readouterr().out
+    
+    forked = BacktestRunner(ticks, "TEST")
+    forked.run_sync(data=runner.load())
+    out = capsys.readouterr().out
+    assert "Replay:" in out and "Ingest:" not in out
+
+def test_report_rates_count_only_replayed_rows_on_resume(tmp_path, capsys):
+    _, ticks = write_history(tmp_path, n=50) # 200 ticks
+    cp = str(tmp_path / "run.ckpt")
+    BacktestRunner(ticks, "TEST", verbose=False, checkpoint_path=cp, checkpoint_every=150).run_sync()
+
+    resumed = BacktestRunner(ticks, "TEST")
+    resumed.run_sync(resume_from=cp)
+    out = capsys.readouterr().out
+    assert "Ticks Processed: 50 (resumed at row 150)" in out
+    rate = float(out.split("Replay: ")[1].split(" ")[0].replace(",", ""))
+    assert rate == pytest.approx(50 / resumed.replay_seconds, rel=0.01)
@@ -0,0 +1,31 @@
+import numpy as np
+from src.benchmark import synthetic_ticks, synthetic_candles, run_benchmarks, compare, save_baseline, load_baseline
+
+def test_synthetic_data_is_deterministic():
+    a, b = synthetic_ticks(3, 20, seed=1), synthetic_ticks(3, 20, seed=1)
+    np.testing.assert_array_equal(a.price, b.price)
+    assert len(a.time) == 3 * 20 * 4
+    assert np.all(np.diff(a.time) >= 0)
+    # Every symbol closes a candle at each minute but the first one
+    assert a.closes.sum() == 3 * 19
+    assert len(synthetic_candles(a)) == 19
+
+def test_run_and_compare_against_baseline(tmp_path):
+    ticks = synthetic_ticks(symbols=3, minutes=30)
+    report = run_benchmarks(ticks)
+    assert set(report["results"]) == {"aggregator", "candle_buffer", "signals", "safe_broker", "broker", "pipeline"}
+    pipeline = report["results"]["pipeline"]
+    assert pipeline["events"] == len(ticks.time)
+    assert pipeline["closes"] == 3 * 29
+    assert pipeline["per_sec"] > 0 and pipeline["peak_mb"] > 0
+
+    path = str(tmp_path / "baseline.json")
+    save_baseline(report, path)
+    baseline = load_baseline(path)
+    assert compare(report, baseline) == []
+
+    slower = {"results": {"pipeline": {**pipeline, "per_sec": pipeline["per_sec"] * 0.5}}}
+    assert compare(slower, baseline, threshold=0.1) == [
+        f"pipeline.per_sec: {pipeline['per_sec']} -> {pipeline['per_sec'] * 0.5} (-50.0%)"
+    ]
+    assert compare(slower, baseline, threshold=0.6) == []
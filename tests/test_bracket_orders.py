@@ -1,11 +1,13 @@
 import pytest
 import asyncio
+import random
+from src.core import broker as broker_module
 from src.core.broker import BacktestBroker
 
 @pytest.mark.asyncio
 async def test_bracket_take_profit():
     broker = BacktestBroker()
-    broker.update_market_state(100.0, "t1")
+    broker.update_market_state(100.0, "t1", "TEST")
     
     # Buy @ 100, SL 90, TP 110
     params = {"sl": 90.0, "tp": 110.0}
@@ -13,28 +15,110 @@ async def test_bracket_take_profit():
     
     # Check Active Orders
     assert len(broker.active_orders) == 2
-    assert broker.position == 1.0
+    assert broker.get_position("TEST") == 1.0
     
     # Move Price UP to 105 (Nothing happens)
-    broker.update_market_state(105.0, "t2")
-    assert broker.position == 1.0
+    broker.update_market_state(105.0, "t2", "TEST")
+    assert broker.get_position("TEST") == 1.0
     
     # Move Price UP to 110 (TP Hit)
-    broker.update_market_state(110.0, "t3")
-    assert broker.position == 0.0 # Sold
+    broker.update_market_state(110.0, "t3", "TEST")
+    assert broker.get_position("TEST") == 0.0 # Sold
     assert len(broker.active_orders) == 0 # OCO: SL cancelled
 
 @pytest.mark.asyncio
 async def test_bracket_stop_loss():
     broker = BacktestBroker()
-    broker.update_market_state(100.0, "t1")
+    broker.update_market_state(100.0, "t1", "TEST")
     
     # Buy @ 100, SL 90, TP 110
     params = {"sl": 90.0, "tp": 110.0}
     await broker.place_order("TEST", "buy", "mkt", 1.0, params=params)
     
     # Move Price DOWN to 90 (SL Hit)
-    broker.update_market_state(90.0, "t2")
+    broker.update_market_state(90.0, "t2", "TEST")
     
-    assert broker.position == 0.0
+    assert broker.get_position("TEST") == 0.0
     assert len(broker.active_orders) == 0
+
+def naive_fills(orders, symbol, price):
+    """Reference: the original scan over every open order"""
+    fired, brackets = [], []
+    for order in orders[:]:
+        if order['symbol'] != symbol:
+            continue
+        if order['side'] == 'sell':
+            hit = price <= order['price'] if order['type'] == 'stop' else price >= order['price']
+        else:
+            hit = price >= order['price'] if order['type'] == 'stop' else price <= order['price']
+        if hit:
+            fired.append(order)
+            orders.remove(order)
+            brackets.append(order['bracket_id'])
+    orders[:] = [o for o in orders if o['bracket_id'] not in brackets]
+    return fired
+
+@pytest.mark.asyncio
+async def test_trigger_book_matches_linear_scan():
+    rng = random.Random(11)
+    broker = BacktestBroker(initial_balance=1e9)
+    reference = []
+    prices = {"A": 100.0, "B": 50.0}
+    
+    for step in range(3000):
+        symbol = rng.choice("AB")
+        prices[symbol] = max(1.0, prices[symbol] + rng.gauss(0, 1))
+        price = round(prices[symbol], 1)
+        
+        before = len(broker.trades)
+        broker.update_market_state(price, step, symbol)
+        expected = naive_fills(reference, symbol, price)
+        fills = [broker.trades.record(i) for i in range(before, len(broker.trades))]
+        assert [(t['side'], t['qty']) for t in fills] == [(o['side'], o['size']) for o in expected]
+        assert broker.active_orders == reference
+        
+        if rng.random() < 0.3:
+            side = rng.choice(["buy", "sell"])
+            size = rng.randint(1, 5)
+            sl = price - 2 if side == "buy" else price + 2
+            tp = price + 2 if side == "buy" else price - 2
+            await broker.place_order(symbol, side, "mkt", size, params={"sl": sl, "tp": tp})
+            reference.extend(broker.active_orders[len(reference):])
+            
+    # Lazily-cancelled OCO legs get compacted away
+    assert broker.trigger_book._stale <= len(reference) + 64
+
+@pytest.mark.asyncio
+async def test_fill_notifications_are_kept_until_sent(monkeypatch):
+    errors = []
+    monkeypatch.setattr(broker_module.logger, "error", errors.append)
+    broker = BacktestBroker()
+    sent = []
+    async def notify(msg):
+        await asyncio.sleep(0)
+        if "SELL" in msg:
+            raise RuntimeError("chat unreachable")
+        sent.append(msg)
+    broker.set_notifier(notify)
+    broker.update_market_state(100.0, "t1", "TEST")
+    await broker.place_order("TEST", "buy", "mkt", 1.0, params={"sl": 90.0, "tp": 110.0})
+    broker.update_market_state(110.0, "t2", "TEST") # TP fills
+    assert len(broker._notify_tasks) == 2 # Entry + TP, held until they finish
+
+    await asyncio.gather(*broker._notify_tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert not broker._notify_tasks and len(sent) == 1
+    assert errors == ["Notification failed: chat unreachable"]
+
+def test_fills_without_event_loop_skip_the_notifier(monkeypatch):
+    errors = []
+    monkeypatch.setattr(broker_module.logger, "error", errors.append)
+    broker = BacktestBroker()
+    calls = []
+    broker.set_notifier(lambda msg: calls.append(msg))
+    broker.update_market_state(100.0, "t1", "TEST")
+    broker.place_order_sync("TEST", "buy", "mkt", 1.0, params={"sl": 90.0, "tp": 110.0})
+    broker.update_market_state(90.0, "t2", "TEST") # SL fills
+    assert broker.get_position("TEST") == 0.0
+    assert calls == [] and not broker._notify_tasks
+    assert errors == []
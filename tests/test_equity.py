@@ -0,0 +1,47 @@
+import math
+import random
+import numpy as np
+import pytest
+from src.core.broker import BacktestBroker
+from src.core.equity import EquityCurve
+
+SEC = 1_000_000_000
+
+def test_equity_curve_sampling_drawdown_and_sharpe():
+    curve = EquityCurve(interval_ns=60 * SEC)
+    values = [100, 110, 99, 120, 90, 95]
+    for i, v in enumerate(values):
+        curve.update(i * 30 * SEC, v) # Two updates per sample interval
+        
+    times, samples = curve.series()
+    np.testing.assert_array_equal(times, [0, 60 * SEC, 120 * SEC])
+    np.testing.assert_array_equal(samples, [100, 99, 90])
+    
+    # Drawdown is tracked on every update, not only on samples
+    assert curve.max_drawdown == pytest.approx((120 - 90) / 120)
+    np.testing.assert_allclose(curve.drawdowns(), [0, 0.01, 0.1])
+    
+    returns = np.diff(samples) / samples[:-1]
+    expected = returns.mean() / returns.std(ddof=1) * math.sqrt(365 * 24 * 60)
+    assert curve.sharpe == pytest.approx(expected)
+
+@pytest.mark.asyncio
+async def test_incremental_equity_matches_full_mark():
+    rng = random.Random(5)
+    broker = BacktestBroker(equity_sample_seconds=1)
+    prices = {"A": 100.0, "B": 20.0}
+    
+    for step in range(2000):
+        symbol = rng.choice("AB")
+        prices[symbol] *= 1 + rng.gauss(0, 0.002)
+        broker.update_market_state(prices[symbol], step * SEC, symbol)
+        if rng.random() < 0.05:
+            side = rng.choice(["buy", "sell"])
+            p = prices[symbol]
+            params = {"sl": p * 0.99, "tp": p * 1.02} if side == "buy" else {"sl": p * 1.01, "tp": p * 0.98}
+            await broker.place_order(symbol, side, "mkt", rng.uniform(0.1, 2), params=params)
+            
+    assert len(broker.trades) > 50
+    assert broker.get_stats()["equity"] == pytest.approx(broker.mark_equity(), rel=1e-9)
+    assert len(broker.equity_curve) == 2000
+    assert broker.get_stats()["max_drawdown"] == pytest.approx(broker.equity_curve.drawdowns().max(), abs=0.01)
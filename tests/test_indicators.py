@@ -0,0 +1,71 @@
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from src.core.models import OHLCV
+from src.core.strategy import CandleBuffer
+from src.core.indicators import SMA, EMA, RSI
+
+def make_candle(i, close):
+    return OHLCV(symbol="X", time=datetime(2025, 1, 1) + timedelta(minutes=i),
+                 open=close, high=close, low=close, close=close, volume=1, interval=1)
+
+def random_closes(n, seed=42):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    # Rounded prices and flat stretches exercise the constant-window / zero-delta paths
+    closes[n // 6:n // 4] = closes[n // 6]
+    return np.round(closes, 2)
+
+def test_streaming_indicators_match_pandas_bit_for_bit():
+    closes = random_closes(300)
+    buf = CandleBuffer(max_size=1000)
+    sma = buf.register_indicator("sma", SMA(50, history=300))
+    ema = buf.register_indicator("ema", EMA(20, history=300))
+    rsi = buf.register_indicator("rsi", RSI(14, history=300))
+
+    for i, c in enumerate(closes):
+        buf.add_candle(make_candle(i, c))
+        # Latest value equals the pandas value on every candle (exact, not approx)
+        np.testing.assert_array_equal(sma.value, buf.sma(50).iloc[-1])
+
+    np.testing.assert_array_equal(sma.history, buf.sma(50).values)
+    np.testing.assert_array_equal(ema.history, buf.ema(20).values)
+    np.testing.assert_array_equal(rsi.history, buf.rsi(14).values)
+
+def test_register_warms_up_and_replace_keeps_last():
+    closes = random_closes(40, seed=7)
+    buf = CandleBuffer(max_size=100)
+    for i, c in enumerate(closes[:30]):
+        buf.add_candle(make_candle(i, c))
+
+    # Late registration replays the buffered candles
+    ema = buf.register_indicator("ema", EMA(10))
+    assert ema.value == buf.ema(10).iloc[-1]
+
+    # Same candle twice -> the indicator reflects the last version only
+    buf.add_candle(make_candle(30, 1.0))
+    buf.add_candle(make_candle(30, closes[30]))
+    assert len(buf) == 31
+    assert ema.value == buf.ema(10).iloc[-1]
+
+def test_streaming_indicators_keep_full_history_past_buffer_wraparound():
+    closes = random_closes(350, seed=3)
+    buf = CandleBuffer(max_size=100) # Wraps 2.5 times
+    sma = buf.register_indicator("sma", SMA(50))
+    ema = buf.register_indicator("ema", EMA(20))
+    rsi = buf.register_indicator("rsi", RSI(14))
+    for i, c in enumerate(closes):
+        buf.add_candle(make_candle(i, c))
+    assert len(buf) == 100
+
+    # What execute() reads: the indicators over every candle seen, not just the buffered ones
+    full = CandleBuffer(max_size=len(closes))
+    for i, c in enumerate(closes):
+        full.add_candle(make_candle(i, c))
+    assert sma.value == full.sma(50).iloc[-1]
+    assert ema.value == full.ema(20).iloc[-1]
+    assert rsi.value == full.rsi(14).iloc[-1]
+
+    # The pandas methods restart at the oldest buffered candle: recursive ones drift from the stream
+    assert buf.sma(50).iloc[-1] == pytest.approx(sma.value, rel=1e-12)
+    assert buf.ema(20).iloc[-1] != ema.value
@@ -1,6 +1,8 @@
 import pytest
 import asyncio
-from src.core.inference import InferenceService
+import threading
+import numpy as np
+from src.core.inference import InferenceService, NumpyMLP
 
 @pytest.mark.asyncio
 async def test_inference_initialization_mock():
@@ -19,3 +21,213 @@ async def test_inference_prediction_mock():
     assert isinstance(score, float)
     assert score == 0.95 # Mock value
 
+
+class FakeInterpreter:
+    """
+    Dense-like stand-in: score = sum(features) / 100, input buffer exposed like TFLite's.
+    With dtype=np.int8 input and output are quantized with (scale, zero_point) pairs.
+    """
+    def __init__(self, dtype=np.float32, input_quant=(0.0, 0), output_quant=(0.0, 0)):
+        self.shape = [1, 25]
+        self.dtype = dtype
+        self.input_quant, self.output_quant = input_quant, output_quant
+        self.invokes = 0
+        self.threads = set()
+        self.allocate_tensors()
+
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array(self.shape), "dtype": self.dtype, "quantization": self.input_quant}]
+
+    def get_output_details(self):
+        return [{"index": 1, "dtype": self.dtype, "quantization": self.output_quant}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = list(shape)
+
+    def allocate_tensors(self):
+        self.buffer = np.zeros(self.shape, dtype=self.dtype)
+
+    def tensor(self, index):
+        return lambda: self.buffer
+
+    def invoke(self):
+        self.invokes += 1
+        self.threads.add(threading.get_ident())
+        if self.dtype == np.float32:
+            self.output = self.buffer.sum(axis=1, keepdims=True) / 100
+            return
+        (in_scale, in_zero), (out_scale, out_zero) = self.input_quant, self.output_quant
+        scores = ((self.buffer.astype(np.float64) - in_zero) * in_scale).sum(axis=1, keepdims=True) / 100
+        self.output = np.clip(np.rint(scores / out_scale + out_zero), -128, 127).astype(np.int8)
+
+    def get_tensor(self, index):
+        return self.output
+
+def fake_service(pool=1, **kwargs):
+    service = InferenceService(model_path="non_existent_model.tflite", **kwargs)
+    service.use_interpreters([FakeInterpreter() for _ in range(pool)])
+    return service
+
+@pytest.mark.asyncio
+async def test_concurrent_predicts_share_one_invoke():
+    service = fake_service(batch_window_ms=2.0)
+    features = [np.full(25, i, dtype=np.float64) for i in range(13)]
+    
+    scores = await asyncio.gather(*(service.predict(f) for f in features))
+    
+    assert service.interpreter.invokes == 1
+    assert scores == pytest.approx([i * 25 / 100 for i in range(13)])
+    stats = service.stats()
+    assert (stats["batches"], stats["requests"], stats["max_batch"]) == (1, 13, 13)
+
+@pytest.mark.asyncio
+async def test_micro_batch_flushes_at_max_batch_and_can_be_disabled():
+    # Identical features: cache off so every request reaches the interpreter
+    service = fake_service(batch_window_ms=50.0, max_batch=4, cache_size=0)
+    await asyncio.gather(*(service.predict(np.ones(25)) for _ in range(10)))
+    assert service.stats()["batch_sizes"] == {2: 1, 4: 2}
+    
+    unbatched = fake_service(batch_window_ms=0, cache_size=0)
+    scores = await asyncio.gather(*(unbatched.predict(np.ones(25)) for _ in range(3)))
+    assert unbatched.interpreter.invokes == 3
+    assert scores == pytest.approx([0.25] * 3)
+    assert unbatched.stats()["batches"] == 0
+
+def test_predict_batch_chunks():
+    service = fake_service()
+    x = np.arange(10 * 25, dtype=np.float64).reshape(10, 25)
+    scores = service.predict_batch(x, batch_size=4)
+    np.testing.assert_allclose(scores, x.astype(np.float32).sum(axis=1) / 100, rtol=1e-6)
+    assert service.interpreter.invokes == 3
+
+@pytest.mark.asyncio
+async def test_pool_spreads_requests_over_interpreters():
+    service = fake_service(pool=2, batch_window_ms=0)
+    buffers = [m.interpreter.buffer for m in service.pool]
+    scores = await asyncio.gather(*(service.predict([float(i)] * 25) for i in range(4)))
+    
+    assert scores == pytest.approx([i * 0.25 for i in range(4)])
+    assert service.stats()["invokes"] == [2, 2]
+    # Each interpreter runs on its own thread, writing into its preallocated input
+    threads = [m.interpreter.threads for m in service.pool]
+    assert len(threads[0]) == len(threads[1]) == 1 and threads[0] != threads[1]
+    assert all(m.interpreter.buffer is b for m, b in zip(service.pool, buffers))
+
+def test_int8_model_is_quantized_and_dequantized():
+    service = fake_service()
+    service.use_interpreters([FakeInterpreter(np.int8, input_quant=(0.05, -10), output_quant=(0.01, -128))])
+    x = np.random.default_rng(3).uniform(-3, 3, size=(40, 25))
+    x[0, 0] = 100.0 # Out of range: saturates instead of wrapping around
+    
+    scores = service.predict_batch(x)
+    
+    q = np.clip(np.rint(x.astype(np.float32) / 0.05 - 10), -128, 127)
+    expected = np.clip(np.rint(((q + 10) * 0.05).sum(axis=1) / 100 / 0.01 - 128), -128, 127)
+    np.testing.assert_allclose(scores, (expected + 128) * 0.01, atol=1e-9)
+    assert service.predict_sync(list(x[5])) == pytest.approx(scores[5])
+    # Within one quantization step or so of the float result (where not clipped at 0)
+    reference = np.maximum(x.sum(axis=1) / 100, 0)
+    assert np.abs(scores - reference)[1:].max() < 0.03
+
+def random_mlp(seed=0, n_features=25):
+    rng = np.random.default_rng(seed)
+    sizes = [n_features, 64, 32, 1]
+    acts = ["relu", "relu", "sigmoid"]
+    return NumpyMLP([(rng.normal(0, 0.3, (a, b)), rng.normal(0, 0.1, b), act)
+                     for a, b, act in zip(sizes[:-1], sizes[1:], acts)])
+
+@pytest.mark.asyncio
+async def test_numpy_backend_replaces_missing_runtime(tmp_path):
+    # No TFLite runtime here: the .npz next to the model path is picked up instead of MOCK
+    model = random_mlp()
+    model.save(str(tmp_path / "model.npz"))
+    service = InferenceService(model_path=str(tmp_path / "model.tflite"), backend="auto")
+    if service.backend == "tflite":
+        pytest.skip("TFLite runtime installed")
+    assert (service.backend, service.mock_mode) == ("numpy", False)
+    
+    x = np.random.default_rng(1).normal(size=(50, 25))
+    expected = model.forward(x.astype(np.float32))[:, 0]
+    np.testing.assert_allclose(service.predict_batch(x, batch_size=16), expected, rtol=1e-6)
+    assert service.predict_sync(list(x[3])) == pytest.approx(float(expected[3]), rel=1e-6)
+    scores = await asyncio.gather(*(service.predict(row) for row in x[:5]))
+    assert scores == pytest.approx(expected[:5].tolist(), rel=1e-6)
+
+def test_numpy_backend_matches_tflite(tmp_path):
+    tf = pytest.importorskip("tensorflow")
+    from src.train_ai import export_weights
+    
+    model = tf.keras.Sequential([
+        tf.keras.layers.Dense(64, activation='relu', input_shape=(25,)),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.Dense(32, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid'),
+    ])
+    tflite_path = tmp_path / "model.tflite"
+    tflite_path.write_bytes(tf.lite.TFLiteConverter.from_keras_model(model).convert())
+    export_weights(model, str(tmp_path / "model.npz"))
+    
+    x = np.random.default_rng(2).normal(size=(200, 25))
+    tflite = InferenceService(model_path=str(tflite_path), backend="tflite", pool_size=1)
+    numpy = InferenceService(model_path=str(tflite_path), backend="numpy")
+    assert (tflite.backend, numpy.backend) == ("tflite", "numpy")
+    np.testing.assert_allclose(numpy.predict_batch(x), tflite.predict_batch(x), atol=1e-5)
+
+def test_quantized_exports_load_and_track_float32(tmp_path):
+    tf = pytest.importorskip("tensorflow")
+    from src.train_ai import convert
+    
+    model = tf.keras.Sequential([
+        tf.keras.layers.Dense(64, activation='relu', input_shape=(25,)),
+        tf.keras.layers.Dense(32, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid'),
+    ])
+    x = np.random.default_rng(4).normal(size=(300, 25)).astype(np.float32)
+    reference = model.predict(x, verbose=0)[:, 0]
+    for quantization in ("dynamic", "float16", "int8"):
+        path = tmp_path / f"model_{quantization}.tflite"
+        path.write_bytes(convert(model, quantization, representative=x[:100]))
+        service = InferenceService(model_path=str(path), backend="tflite", pool_size=1)
+        np.testing.assert_allclose(service.predict_batch(x), reference, atol=0.05)
+
+@pytest.mark.asyncio
+async def test_feature_cache_skips_repeated_windows():
+    service = fake_service(batch_window_ms=0, cache_size=2)
+    a, b, c = (np.full(25, v) for v in (1.0, 2.0, 3.0))
+    
+    assert await service.predict(a) == pytest.approx(0.25)
+    assert await service.predict(a.copy()) == pytest.approx(0.25) # Same bytes, other array
+    assert service.predict_sync(list(a)) == pytest.approx(0.25)
+    assert service.interpreter.invokes == 1
+    
+    service.predict_sync(b)
+    service.predict_sync(c) # Evicts a (least recently used)
+    service.predict_sync(a)
+    assert service.interpreter.invokes == 4
+    stats = service.stats()
+    assert (stats["cache_hits"], stats["cache_misses"], stats["cache_size"]) == (2, 4, 2)
+
+def test_feature_cache_is_per_model():
+    service = fake_service(cache_size=16)
+    x = np.random.default_rng(5).normal(size=(6, 25))
+    first = service.predict_batch(x[:4])
+    # Only the two new rows reach the interpreter
+    np.testing.assert_allclose(service.predict_batch(x), np.r_[first, service.predict_batch(x[4:])])
+    assert service.interpreter.invokes == 2
+    
+    # Another model never sees the first one's scores
+    service.use_interpreters([FakeInterpreter()])
+    service.predict_batch(x)
+    assert service.interpreter.invokes == 1
+
+@pytest.mark.asyncio
+async def test_varying_batch_sizes_reuse_one_allocation():
+    service = fake_service(pool=2, batch_window_ms=50.0, max_batch=4, cache_size=0)
+    x = np.random.default_rng(6).normal(size=(11, 25))
+    scores = await asyncio.gather(*(service.predict(row) for row in x)) # Batches of 4, 4, 3
+    scores.append(service.predict_sync(x[0]))
+    
+    np.testing.assert_allclose(scores, np.r_[x, x[:1]].astype(np.float32).sum(axis=1) / 100, rtol=1e-5)
+    assert service.stats()["batch_sizes"] == {3: 1, 4: 2}
+    assert [m.allocations for m in service.pool] == [1, 1]
+    assert all(m.interpreter.shape == [4, 25] for m in service.pool)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from datetime import datetime
+from src.core.ledger import TradeLedger
+from src.core.broker import BacktestBroker
+
+def test_ledger_grows_and_exposes_views():
+    ledger = TradeLedger(capacity=2)
+    for i in range(5):
+        ledger.append("A" if i % 2 else "B", "buy" if i < 3 else "sell", 1.0 + i, 100.0 + i, i, "limit")
+        
+    assert len(ledger) == 5 and ledger.capacity == 8
+    assert ledger.symbols == ["B", "A"]
+    np.testing.assert_array_equal(ledger.qty, [1, 2, 3, 4, 5])
+    np.testing.assert_array_equal(ledger.time, np.arange(5))
+    np.testing.assert_array_equal(ledger.net_qty(), [1 + 3 - 5, 2 - 4])
+    assert ledger.summary() == {"trades_count": 5, "buys": 3, "sells": 2,
+                                "turnover": float(np.sum(ledger.qty * ledger.price))}
+    
+    # Views, not copies
+    assert np.shares_memory(ledger.to_frame()["price"].values, ledger.price)
+    assert ledger.record(4) == {"id": 4, "symbol": "B", "side": "sell", "qty": 5.0,
+                                "price": 104.0, "time": 4, "type": "limit"}
+
+def test_ledger_npz_roundtrip(tmp_path):
+    ledger = TradeLedger()
+    ledger.append("A", "buy", 0.5, 10.0, datetime(2025, 1, 1))
+    ledger.append("B", "sell", 0.25, 20.0, datetime(2025, 1, 2), "stop")
+    
+    path = tmp_path / "fills.npz"
+    ledger.save(path)
+    loaded = TradeLedger.load(path)
+    
+    assert ledger.to_frame().equals(loaded.to_frame())
+    assert loaded.symbols == ["A", "B"]
+    assert loaded.summary() == ledger.summary()
+
+@pytest.mark.asyncio
+async def test_broker_records_fills_in_ledger():
+    broker = BacktestBroker()
+    broker.update_market_state(100.0, datetime(2025, 1, 1), "TEST")
+    await broker.place_order("TEST", "buy", "mkt", 2.0, params={"tp": 110.0})
+    broker.update_market_state(110.0, datetime(2025, 1, 1, 0, 1), "TEST")
+    
+    assert [broker.trades.record(i)["type"] for i in range(len(broker.trades))] == ["market", "limit"]
+    stats = broker.get_stats()
+    assert stats["trades_count"] == 2 and stats["turnover"] == 2 * 100.0 + 2 * 110.0
@@ -0,0 +1,59 @@
+import numpy as np
+from datetime import datetime, timezone
+from src.core.loader import load_ticks, load_bars
+from src.core.models import to_epoch_ns
+
+def write(path, lines):
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+def test_load_ticks_filters_symbols_across_chunks(tmp_path):
+    lines = ["time,symbol,price,volume"]
+    expected = []
+    for i in range(50):
+        sym = ("A", "B", "C")[i % 3]
+        ts = datetime(2025, 1, 1, 0, i, tzinfo=timezone.utc)
+        # Mixed naive / offset timestamps, both are UTC
+        stamp = ts.replace(tzinfo=None).isoformat() if i % 2 else ts.isoformat()
+        lines.append(f"{stamp},{sym},{100 + i},{i / 10}")
+        if sym in ("C", "A"):
+            expected.append((to_epoch_ns(ts), sym, 100.0 + i, i / 10))
+    lines.insert(10, "garbage,A,1") # Malformed rows are dropped
+    lines.insert(20, "not-a-date,A,1,1")
+    path = write(tmp_path / "ticks.csv", lines)
+    
+    for chunksize in (7, 1000):
+        data = load_ticks(path, symbols=["C", "A"], chunksize=chunksize)
+        assert data.time.dtype == np.int64 and data.price.dtype == np.float64
+        assert set(data.symbols) == {"A", "C"}
+        got = list(zip(data.time.tolist(), [data.symbols[c] for c in data.symbol], data.price.tolist(), data.volume.tolist()))
+        assert got == expected
+
+def test_load_bars_and_unknown_symbol(tmp_path):
+    path = write(tmp_path / "bars.csv", [
+        "timestamp,symbol,open,high,low,close,volume",
+        "2025-01-01T00:00:00+00:00,X,1,3,0.5,2,10",
+        "2025-01-01T00:01:00+00:00,X,2,4,1.5,3,11",
+    ])
+    bars = load_bars(path, symbols=["X"])
+    np.testing.assert_array_equal(bars.high, [3, 4])
+    assert bars.time[1] - bars.time[0] == 60_000_000_000
+    
+    empty = load_bars(path, symbols=["Y"])
+    assert len(empty.time) == 0 and empty.symbols == ()
+
+def test_truncated_rows_are_dropped(tmp_path):
+    path = write(tmp_path / "ticks.csv", [
+        "time,symbol,price,volume",
+        "2025-01-01T00:00:00,A,100,1",
+        "2025-01-01T00:00:01,A,101", # Recorder killed mid-write: no volume
+        "2025-01-01T00:00:02,A", # No price either
+        "2025-01-01T00:00:03,A,,2", # Empty price
+        "2025-01-01T00:00:04",
+        "2025-01-01T00:00:05,A,102,3",
+    ])
+    for chunksize in (2, 1000):
+        data = load_ticks(path, chunksize=chunksize)
+        assert data.price.tolist() == [100.0, 102.0]
+        assert data.volume.tolist() == [1.0, 3.0]
+        assert data.symbols == ("A",)
@@ -0,0 +1,63 @@
+import pytest
+import numpy as np
+from src.core.inference import NumpyMLP
+from src.core.model_registry import ModelRegistry, SymbolModel
+from src.core.paper import build_paper_stack
+
+def write_model(path, scale):
+    # Single linear layer: score = scale * sum(features)
+    NumpyMLP([(np.full((25, 1), scale), np.zeros(1), "linear")]).save(str(path))
+
+def make_registry(tmp_path, models, budget_models=10.0):
+    for name, scale in (("a", 0.01), ("b", 0.02), ("c", 0.03), ("default", 0.04)):
+        write_model(tmp_path / f"{name}.npz", scale)
+    model_bytes = 25 * 4 + 4
+    return ModelRegistry(models={k: str(tmp_path / v) for k, v in models.items()},
+                         default_path=str(tmp_path / "default.tflite"),
+                         memory_budget_mb=budget_models * model_bytes / 1024 / 1024,
+                         backend="numpy", batch_window_ms=0)
+
+@pytest.mark.asyncio
+async def test_models_load_lazily_per_symbol_and_timeframe(tmp_path):
+    registry = make_registry(tmp_path, {"XBT": "a.tflite", "XBT:5": "b.tflite", "ETH": "a.tflite"})
+    stack = build_paper_stack(["XBT", "SOL"], inference_service=registry)
+    ai = stack.strategies["XBT"].inference_service
+    assert isinstance(ai, SymbolModel) and (ai.symbol, ai.timeframe) == ("XBT", 1)
+    assert registry.stats()["loads"] == 0 # Nothing loaded before the first prediction
+
+    x = np.ones(25)
+    assert await registry.for_symbol("XBT").predict(x) == pytest.approx(0.25)
+    assert registry.predict_sync("XBT", x, timeframe=5) == pytest.approx(0.5)
+    assert registry.predict_sync("ETH", x) == pytest.approx(0.25) # Same file as XBT: shared
+    assert await stack.strategies["SOL"].inference_service.predict(x) == pytest.approx(1.0) # Default
+
+    stats = registry.stats()
+    assert (stats["loads"], stats["hits"], stats["evictions"]) == (3, 1, 0)
+    assert stats["memory_bytes"] == 3 * (25 * 4 + 4)
+
+def test_least_recently_used_model_is_evicted_over_budget(tmp_path):
+    registry = make_registry(tmp_path, {"A": "a.tflite", "B": "b.tflite", "C": "c.tflite"}, budget_models=2.5)
+    x = np.ones(25)
+    registry.predict_sync("A", x)
+    registry.predict_sync("B", x)
+    registry.predict_sync("A", x) # A is now the most recently used
+    registry.predict_sync("C", x)
+
+    stats = registry.stats()
+    assert stats["loaded"] == [str(tmp_path / "a.tflite"), str(tmp_path / "c.tflite")]
+    assert (stats["loads"], stats["evictions"]) == (3, 1)
+    assert stats["memory_bytes"] <= stats["budget_bytes"]
+
+    # An evicted model is simply loaded again
+    assert registry.predict_sync("B", x) == pytest.approx(0.5)
+    assert (registry.stats()["loads"], registry.stats()["evictions"]) == (4, 2)
+
+def test_mock_mode_check_does_not_load(tmp_path):
+    registry = make_registry(tmp_path, {"A": "a.tflite", "X": "missing.tflite"})
+    assert registry.for_symbol("A").mock_mode is False # a.npz exists
+    assert registry.for_symbol("X").mock_mode is True
+    assert registry.stats()["loads"] == 0
+    
+    registry.predict_sync("X", np.ones(25))
+    assert registry.for_symbol("X").mock_mode is True # Now answered by the loaded service
+    assert registry.stats()["loads"] == 1
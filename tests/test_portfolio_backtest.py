@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from src.portfolio_backtest import merged_ticks, PortfolioBacktest
+
+def write_symbol(path, symbol, n, seed, step_seconds):
+    rng = np.random.default_rng(seed)
+    prices = np.round(100 + np.cumsum(rng.normal(0, 0.4, n)), 2)
+    t0 = datetime(2025, 1, 1)
+    lines = ["time,symbol,price,volume"]
+    for i, p in enumerate(prices):
+        lines.append(f"{(t0 + timedelta(seconds=i * step_seconds)).isoformat()},{symbol},{p},1")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+def test_merged_ticks_is_time_ordered_and_complete(tmp_path):
+    a = write_symbol(tmp_path / "a.csv", "A", 500, 1, 7)
+    b = write_symbol(tmp_path / "b.csv", "B", 300, 2, 11)
+    ticks = list(merged_ticks([a, b], chunksize=64))
+    
+    assert len(ticks) == 800
+    times = [t[0] for t in ticks]
+    assert times == sorted(times)
+    assert sum(1 for t in ticks if t[1] == "A") == 500
+    assert len(list(merged_ticks([a, b], symbols=["B"]))) == 300
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("timer", [True, False])
+async def test_portfolio_runs_all_symbols_through_one_broker(tmp_path, timer):
+    files = [write_symbol(tmp_path / f"{s}.csv", s, 3000, i, 5) for i, s in enumerate("ABC")]
+    bt = PortfolioBacktest(files, symbols=["A", "B", "C"], timer=timer, strategy_params={"filter_bearish": False, "filter_bullish": False})
+    summary = await bt.run()
+    
+    assert bt.ticks == 9000
+    per_symbol = summary[summary.symbol != "TOTAL"]
+    assert set(per_symbol.symbol) <= {"A", "B", "C"} and len(per_symbol) > 1
+    total = summary[summary.symbol == "TOTAL"].iloc[0]
+    assert total.trades == per_symbol.trades.sum()
+    assert total.pnl == pytest.approx(per_symbol.pnl.sum())
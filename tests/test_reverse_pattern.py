@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from src.core.models import OHLCV
 from src.strategies.reverse_pattern import ReversePatternStrategy
 import pandas as pd
+import numpy as np
 
 def candle(offset_mins, open, high, low, close):
     return OHLCV(
@@ -77,3 +78,54 @@ async def test_bullish_signal_detection():
         mock_logger.info.assert_called()
         args, _ = mock_logger.info.call_args
         assert "BULLISH DETECTED" in args[0]
+
+def random_candles(n, seed=3):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    opens = np.roll(closes, 1) + rng.normal(0, 0.3, n)
+    highs = np.maximum(opens, closes) + rng.exponential(0.5, n)
+    lows = np.minimum(opens, closes) - rng.exponential(0.5, n)
+    return opens, highs, lows, closes
+
+@pytest.mark.parametrize("filters", [(False, False), (True, True), (True, False)])
+def test_vectorized_scan_matches_live_path(filters):
+    opens, highs, lows, closes = random_candles(600)
+    strat = ReversePatternStrategy("TEST", filter_bearish=filters[0], filter_bullish=filters[1])
+    strat.ma_period = 20
+    
+    bearish, bullish = strat.scan(opens, highs, lows, closes)
+    assert bearish.any() and bullish.any()
+    
+    # Replay candle by candle through the live rule evaluation
+    for i in range(len(closes)):
+        strat.candles.add_candle(candle(i, opens[i], highs[i], lows[i], closes[i]))
+        if len(strat.candles) < 6:
+            assert not bearish[i] and not bullish[i]
+            continue
+        live_bearish, live_bullish = strat.detect()
+        assert live_bearish == bearish[i]
+        assert live_bullish == bullish[i]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shared_store", [True, False])
+async def test_batched_detection_matches_per_symbol(shared_store):
+    from src.core.strategy import CandleStore
+    symbols = [f"S{i}" for i in range(8)]
+    store = CandleStore(symbols, max_size=50) if shared_store else None
+    strategies = [
+        ReversePatternStrategy(sym, filter_bearish=True, filter_bullish=True, candle_store=store)
+        for sym in symbols
+    ]
+    rng = np.random.default_rng(3)
+    
+    for i in range(120): # Wraps the rings
+        for s in strategies:
+            o, c = rng.integers(95, 106, 2)
+            h, l = max(o, c) + rng.integers(0, 3), min(o, c) - rng.integers(0, 3)
+            s.candles.add_candle(candle(i, o, h, l, c))
+        if i < 5:
+            continue # Needs a full pattern window
+            
+        bearish, bullish = ReversePatternStrategy.detect_batch(strategies)
+        expected = [s.detect() for s in strategies]
+        assert [(bool(b), bool(u)) for b, u in zip(bearish, bullish)] == [(bool(b), bool(u)) for b, u in expected]
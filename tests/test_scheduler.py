@@ -0,0 +1,92 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from src.core.models import MarketTick, to_epoch_ns
+from src.core.strategy import Strategy, TickAggregator
+from src.core.scheduler import CandleScheduler
+
+T0 = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+SEC = 1_000_000_000
+
+def tick(symbol, seconds, price):
+    return MarketTick(symbol=symbol, price=price, volume=1, timestamp=T0 + timedelta(seconds=seconds))
+
+def test_timer_driven_aggregator_grace_and_late_ticks():
+    agg = TickAggregator()
+    agg.timer_driven = True
+    
+    assert agg.on_tick(tick("X", 10, 100)) is None
+    assert agg.on_tick(tick("X", 61, 101)) is None # Next bucket: no close on tick
+    assert agg.on_tick(tick("X", 30, 102)) is None # Late tick for 12:00, within grace
+    
+    # Boundary 12:01 + 2s grace
+    t_close = to_epoch_ns(T0) + 62 * SEC
+    assert agg.close_due(t_close - 1, grace=2 * SEC) == []
+    closed = agg.close_due(t_close, grace=2 * SEC)
+    assert len(closed) == 1
+    assert closed[0].time == T0 and closed[0].close == 102 and closed[0].volume == 2
+    
+    # Too late for 12:00 now
+    agg.on_tick(tick("X", 40, 103))
+    assert agg.late_ticks == 1
+    
+    # Quiet symbol: 12:01 closes on the timer even though no 12:02 tick ever arrives
+    closed = agg.close_due(to_epoch_ns(T0) + 122 * SEC, grace=2 * SEC)
+    assert [(c.time.minute, c.close) for c in closed] == [(1, 101)]
+
+@pytest.mark.asyncio
+async def test_scheduler_closes_all_symbols_as_one_batch():
+    class Recorder(Strategy):
+        async def execute(self):
+            received.append((self.symbol, self.candles.close[-1]))
+            
+    received = []
+    strategies = [Recorder("A"), Recorder("B"), Recorder("C")]
+    scheduler = CandleScheduler(strategies, grace_seconds=2.0)
+    
+    await strategies[0].on_tick(tick("A", 5, 10))
+    await strategies[1].on_tick(tick("B", 50, 20))
+    await strategies[2].on_tick(tick("C", 59, 30))
+    assert received == [] # Ticks never close candles in timer mode
+    
+    boundary = to_epoch_ns(T0) + 60 * SEC
+    assert scheduler.next_deadline(boundary - SEC) == boundary + 2 * SEC
+    
+    assert await scheduler.flush(boundary + SEC) == 0 # Still in grace
+    assert await scheduler.flush(boundary + 2 * SEC) == 3
+    assert sorted(received) == [("A", 10), ("B", 20), ("C", 30)]
+    assert scheduler.batches == 1
+
+@pytest.mark.asyncio
+async def test_scheduler_evaluates_each_strategy_type_once_per_batch():
+    class Batched(Strategy):
+        calls = []
+        @classmethod
+        async def execute_batch(cls, strategies):
+            cls.calls.append(sorted(s.symbol for s in strategies))
+            
+    strategies = [Batched("A"), Batched("B")]
+    scheduler = CandleScheduler(strategies, grace_seconds=0)
+    await strategies[0].on_tick(tick("A", 5, 10))
+    await strategies[1].on_tick(tick("B", 6, 20))
+    
+    assert await scheduler.flush(to_epoch_ns(T0) + 60 * SEC) == 2
+    assert Batched.calls == [["A", "B"]]
+
+@pytest.mark.asyncio
+async def test_scheduler_evaluates_every_candle_closed_by_a_late_timer_run():
+    class Recorder(Strategy):
+        async def execute(self):
+            received.append((self.symbol, len(self.candles), self.candles.close[-1]))
+            
+    received = []
+    strategies = [Recorder("A"), Recorder("B")]
+    scheduler = CandleScheduler(strategies, grace_seconds=0)
+    # A trades through three minutes without a timer run, B only in the last one
+    for seconds, price in ((5, 10), (65, 11), (125, 12)):
+        await strategies[0].on_tick(tick("A", seconds, price))
+    await strategies[1].on_tick(tick("B", 130, 20))
+    
+    assert await scheduler.flush(to_epoch_ns(T0) + 180 * SEC) == 4
+    # One execute per closed candle, oldest first; same-minute closes still share a batch
+    assert received == [("A", 1, 10), ("A", 2, 11), ("A", 3, 12), ("B", 1, 20)]
+    assert scheduler.batches == 1
@@ -0,0 +1,94 @@
+import math
+import numpy as np
+from src.backtest import BacktestRunner
+from src.core.strategy import CandleBuffer, TickAggregator
+from src.core.scores import candles_from_ticks, feature_windows, ScoreTable
+from tests.test_backtest_runner import write_history
+
+class HashModel:
+    """Deterministic stand-in for a model: score from the float32 features, counts calls"""
+    def __init__(self):
+        self.single_calls = 0
+
+    def predict_batch(self, features, batch_size=4096):
+        x = np.asarray(features, dtype=np.float32)
+        return (np.abs(x).sum(axis=1, dtype=np.float64) * 7.3) % 1.0
+
+    def predict_sync(self, features):
+        self.single_calls += 1
+        return float(self.predict_batch(np.asarray(features)[None])[0])
+
+def random_ticks(n=3000, seed=2):
+    rng = np.random.default_rng(seed)
+    # Irregular spacing incl. empty minutes
+    time = 1_735_689_600 * 10**9 + np.cumsum(rng.integers(1, 40, n)) * 10**9
+    price = np.round(100 + np.cumsum(rng.normal(0, 0.1, n)), 2)
+    volume = np.round(rng.uniform(0.001, 3.0, n), 3)
+    return time, price, volume
+
+def test_vectorized_candles_match_aggregator():
+    time, price, volume = random_ticks()
+    times, ohlcv = candles_from_ticks(time, price, volume)
+
+    agg = TickAggregator()
+    agg.symbol = "X"
+    buf = CandleBuffer(max_size=10_000)
+    for ts, p, v in zip(time.tolist(), price.tolist(), volume.tolist()):
+        for c in agg.update(ts, p, v):
+            buf.add_candle(c)
+    buf.add_candle(agg.current_candle) # Last bucket is still open
+
+    np.testing.assert_array_equal(times, buf.times)
+    np.testing.assert_array_equal(ohlcv, buf.ohlcv)
+
+    # Row j = window passed to predict() once candle j + 4 closed
+    windows = feature_windows(ohlcv)
+    np.testing.assert_array_equal(windows[-1], buf.window(5).reshape(-1))
+    assert len(windows) == len(ohlcv) - 4
+
+def test_score_table_lookup():
+    minute = 60 * 10**9
+    table = ScoreTable(np.array([0, minute, 3 * minute]), np.array([0.1, 0.2, 0.4]))
+    assert table.lookup(minute) == 0.2
+    assert table.lookup(3 * minute) == 0.4
+    assert math.isnan(table.lookup(2 * minute)) # Gap
+    assert math.isnan(table.lookup(minute + 1)) # Not a candle open
+    assert math.isnan(table.lookup(10 * minute))
+    assert (table.hits, table.misses) == (2, 3)
+
+def test_precomputed_backtest_matches_per_signal_inference(tmp_path):
+    _, ticks = write_history(tmp_path, n=600)
+    live = BacktestRunner(ticks, "TEST", verbose=False, inference_service=HashModel())
+    live.run_sync()
+
+    model = HashModel()
+    batch = BacktestRunner(ticks, "TEST", verbose=False, inference_service=model, precompute_ai=True)
+    batch.run_sync()
+
+    assert live.inference.single_calls > 0
+    assert model.single_calls == 0
+    assert batch.strategy.score_table.misses == 0
+    a, b = live.broker.trades, batch.broker.trades
+    assert len(a) > 0
+    np.testing.assert_array_equal(a.price, b.price)
+    np.testing.assert_array_equal(a.qty, b.qty)
+
+def test_precomputed_scores_follow_the_primary_timeframe(tmp_path):
+    _, ticks = write_history(tmp_path, n=3000)
+    params = {"timeframes": (5,)}
+    live = BacktestRunner(ticks, "TEST", verbose=False, inference_service=HashModel(), strategy_params=params)
+    live.run_sync()
+    
+    model = HashModel()
+    batch = BacktestRunner(ticks, "TEST", verbose=False, inference_service=model, strategy_params=params,
+                           precompute_ai=True)
+    batch.run_sync()
+    table = batch.strategy.score_table
+    assert table.span == 5 * 60 * 10**9 and table.hits > 0
+    assert model.single_calls == 0
+    np.testing.assert_array_equal(live.broker.trades.price, batch.broker.trades.price)
+    
+    # A 1m table handed to a 5m strategy would match every 5m candle time with the wrong window
+    mismatched = BacktestRunner(ticks, "TEST", verbose=False, inference_service=HashModel(), strategy_params=params,
+                                score_table=ScoreTable(np.array([0]), np.array([0.5])))
+    assert mismatched.strategy.score_table is None
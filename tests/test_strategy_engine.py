@@ -1,7 +1,9 @@
 import pytest
 from datetime import datetime, timedelta
 from src.core.models import MarketTick, OHLCV
-from src.core.strategy import TickAggregator, CandleBuffer
+from src.core.strategy import TickAggregator, CandleBuffer, Strategy, TIMEFRAMES, to_epoch_ns
+import numpy as np
+import pandas as pd
 
 def test_tick_aggregator():
     agg = TickAggregator()
@@ -47,3 +49,99 @@ def test_candle_buffer_indicators():
     # RSI Test (Linear Up Trend -> RSI 100)
     rsi = buf.rsi(period=14)
     assert rsi.iloc[-1] > 99.0
+
+def test_candle_buffer_ring_wraparound():
+    buf = CandleBuffer(max_size=4)
+    base_time = datetime(2025, 1, 1)
+    
+    # 6 candles into a 4-slot ring -> keeps the last 4 (closes 2..5)
+    for i in range(6):
+        c = OHLCV(symbol="X", time=base_time+timedelta(minutes=i),
+                  open=i, high=i+1, low=i-1, close=i, volume=10, interval=1)
+        buf.add_candle(c)
+        
+    assert len(buf) == 4
+    assert list(buf.close) == [2.0, 3.0, 4.0, 5.0]
+    assert buf.ohlcv.flags["C_CONTIGUOUS"]
+    assert list(buf.window(2)[:, 3]) == [4.0, 5.0]
+    
+    # Views are zero-copy slices of the preallocated block
+    assert np.shares_memory(buf.close, buf._data)
+    
+    # DataFrame is only built on demand
+    df = buf.df
+    assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+    assert df.index[-1] == base_time + timedelta(minutes=5)
+    
+    # Same candle time again -> replaces the last row
+    buf.add_candle(OHLCV(symbol="X", time=base_time+timedelta(minutes=5),
+                         open=5, high=9, low=4, close=8, volume=10, interval=1))
+    assert len(buf) == 4
+    assert buf.close[-1] == 8.0
+
+def test_tick_aggregator_multi_timeframe_matches_resample():
+    agg = TickAggregator(timeframes=TIMEFRAMES)
+    rng = np.random.default_rng(1)
+    start = datetime(2025, 1, 1)
+    
+    # ~10h of ticks every 20s
+    times = [start + timedelta(seconds=20 * i) for i in range(1800)]
+    prices = 100 + np.cumsum(rng.normal(0, 0.1, len(times)))
+    
+    closed = {tf: [] for tf in TIMEFRAMES}
+    for t, p in zip(times, prices):
+        for c in agg.on_tick_all(MarketTick(symbol="X", price=p, volume=1, timestamp=t)):
+            closed[c.interval].append(c)
+            
+    ticks = pd.DataFrame({"price": prices, "volume": 1.0}, index=pd.DatetimeIndex(times))
+    for tf in TIMEFRAMES:
+        ref = ticks["price"].resample(f"{tf}min").ohlc()
+        ref["volume"] = ticks["volume"].resample(f"{tf}min").sum()
+        # The last bucket is still open
+        ref = ref.iloc[:len(closed[tf])]
+        assert len(closed[tf]) == len(ticks.resample(f"{tf}min")) - 1
+        got = pd.DataFrame([c.model_dump() for c in closed[tf]]).set_index("time")
+        np.testing.assert_allclose(got[["open", "high", "low", "close", "volume"]].values, ref.values)
+        assert list(got.index) == list(ref.index)
+        
+    # 09:00 1h candle is still open (its 09:59 1m candle has not closed yet)
+    assert closed[60][-1].time == datetime(2025, 1, 1, 8, 0)
+
+def test_tick_aggregator_rollup_closes_on_gap():
+    agg = TickAggregator(timeframes=(1, 5))
+    t = datetime(2025, 1, 1, 12, 0, 10)
+    agg.on_tick(MarketTick(symbol="X", price=100, volume=1, timestamp=t))
+    agg.on_tick(MarketTick(symbol="X", price=101, volume=1, timestamp=t + timedelta(minutes=1)))
+    
+    # Quiet until 12:07 -> 12:01 1m closes, then 12:00 5m is incomplete but superseded
+    closed = agg.on_tick_all(MarketTick(symbol="X", price=99, volume=1, timestamp=t + timedelta(minutes=7)))
+    assert [c.interval for c in closed] == [1]
+    closed = agg.on_tick_all(MarketTick(symbol="X", price=98, volume=1, timestamp=t + timedelta(minutes=8)))
+    assert [(c.interval, c.time.minute) for c in closed] == [(1, 7), (5, 0)]
+    assert closed[1].open == 100 and closed[1].close == 101 and closed[1].volume == 2
+
+def test_gap_closes_higher_timeframe_bars_in_time_order():
+    strat = Strategy("X", timeframes=(1, 5))
+    start = datetime(2025, 1, 1)
+    for minute in (1, 14, 15):
+        strat.on_price_sync(to_epoch_ns(start + timedelta(minutes=minute)), 100.0 + minute, 1.0)
+    
+    # The 00:15 tick closes both the superseded 00:00 5m bar and the complete 00:10 one, oldest first
+    assert list(strat.timeframe_candles[5].times) == [to_epoch_ns(start), to_epoch_ns(start + timedelta(minutes=10))]
+    assert list(strat.timeframe_candles[5].close) == [101.0, 114.0]
+
+@pytest.mark.asyncio
+async def test_strategy_timeframe_subscription():
+    class Recorder(Strategy):
+        async def execute(self):
+            self.seen.append((len(self.candles), len(self.timeframe_candles[5])))
+            
+    strat = Recorder("X", timeframes=(1, 5))
+    strat.seen = []
+    start = datetime(2025, 1, 1)
+    for i in range(11 * 60 // 20):
+        await strat.on_tick(MarketTick(symbol="X", price=100 + i, volume=1, timestamp=start + timedelta(seconds=20 * i)))
+        
+    # 10 closed 1m candles; the 5m candle closing with the 12:04 1m one is visible to execute()
+    assert strat.seen[4] == (5, 1)
+    assert strat.seen[-1] == (10, 2)
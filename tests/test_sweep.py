@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+from src.sweep import expand_grid, parse_param, run_sweep
+import src.sweep as sweep
+from tests.test_backtest_runner import write_history
+
+def test_expand_grid_and_parse():
+    assert parse_param("ma_period=20,50") == ("ma_period", [20, 50])
+    assert parse_param("filter_bullish=true,false") == ("filter_bullish", [True, False])
+    assert expand_grid({"a": [1, 2], "b": [0.5]}) == [{"a": 1, "b": 0.5}, {"a": 2, "b": 0.5}]
+
+def test_parallel_sweep_matches_sequential(tmp_path):
+    _, ticks = write_history(tmp_path, n=300)
+    grid = {"ma_period": [10, 50], "tp1_r": [1.5, 2.0], "filter_bullish": [False, True]}
+    cache_dir = str(tmp_path / "cache")
+    
+    parallel = run_sweep(ticks, grid, symbol="TEST", workers=2, cache_dir=cache_dir)
+    sequential = run_sweep(ticks, grid, symbol="TEST", workers=1, cache_dir=cache_dir)
+    
+    assert len(parallel) == 8
+    assert parallel["pnl"].is_monotonic_decreasing
+    cols = ["ma_period", "tp1_r", "filter_bullish", "pnl", "trades_count"]
+    pd.testing.assert_frame_equal(parallel[cols], sequential[cols])
+
+def test_lower_is_better_metrics_rank_ascending(tmp_path):
+    _, ticks = write_history(tmp_path, n=300)
+    grid = {"ma_period": [10, 50], "tp1_r": [1.5, 3.0]}
+    
+    table = run_sweep(ticks, grid, symbol="TEST", workers=1, cache_dir=str(tmp_path / "cache"), rank_by="max_drawdown")
+    assert table["max_drawdown"].is_monotonic_increasing # Safest parameter set first
+
+def test_scores_are_precomputed_once_for_all_workers(tmp_path, monkeypatch):
+    _, ticks = write_history(tmp_path, n=300)
+    log = tmp_path / "precompute.log"
+    precompute = sweep.precompute_scores
+    def logged(*args, **kwargs):
+        with open(log, "a") as f: # Visible across (forked) worker processes
+            f.write(f"{os.getpid()}\n")
+        return precompute(*args, **kwargs)
+    monkeypatch.setattr(sweep, "precompute_scores", logged)
+    cache_dir = tmp_path / "cache"
+    
+    run_sweep(ticks, {"ma_period": [10, 50]}, symbol="TEST", workers=2, cache_dir=str(cache_dir))
+    assert log.read_text().split() == [str(os.getpid())] # Once, in the parent
+    assert not [f for f in os.listdir(cache_dir) if f.startswith("scores-")] # Shared grid cleaned up
+
+def test_one_score_table_per_primary_timeframe(tmp_path, monkeypatch):
+    _, ticks = write_history(tmp_path, n=300)
+    intervals = []
+    precompute = sweep.precompute_scores
+    def logged(*args, interval_minutes=1, **kwargs):
+        intervals.append(interval_minutes)
+        return precompute(*args, interval_minutes=interval_minutes, **kwargs)
+    monkeypatch.setattr(sweep, "precompute_scores", logged)
+    
+    grid = {"timeframes": [[1], [5], [1, 5]], "ma_period": [10, 50]}
+    table = run_sweep(ticks, grid, symbol="TEST", workers=1, cache_dir=str(tmp_path / "cache"))
+    assert sorted(intervals) == [1, 5]
+    assert len(table) == 6
@@ -0,0 +1,40 @@
+import os
+import numpy as np
+from src.core.loader import load_ticks
+from src.core.tick_cache import TickCache
+
+def write_ticks(path, n, offset=0):
+    lines = ["time,symbol,price,volume"]
+    for i in range(n):
+        lines.append(f"2025-01-01T00:{i // 60:02d}:{i % 60:02d},{'AB'[i % 2]},{100 + i + offset},1")
+    path.write_text("\n".join(lines) + "\n")
+
+def test_cache_cold_warm_and_invalidation(tmp_path):
+    src = tmp_path / "ticks.csv"
+    write_ticks(src, 100)
+    cache = TickCache(str(tmp_path / "cache"))
+    
+    cold = cache.load(str(src))
+    assert not cache.last_hit
+    warm = cache.load(str(src))
+    assert cache.last_hit
+    assert isinstance(warm.price, np.memmap)
+    
+    reference = load_ticks(str(src))
+    for name in ("time", "symbol", "price", "volume"):
+        np.testing.assert_array_equal(getattr(warm, name), getattr(reference, name))
+    assert warm.symbols == reference.symbols == cold.symbols
+    
+    # Symbol subset matches the CSV loader's filter
+    only_b = cache.load(str(src), symbols=["B"])
+    expected = load_ticks(str(src), symbols=["B"])
+    np.testing.assert_array_equal(only_b.price, expected.price)
+    assert only_b.symbols == ("B",) and set(only_b.symbol.tolist()) == {0}
+    
+    # Source changes -> rebuilt, old entry removed
+    write_ticks(src, 120, offset=1)
+    os.utime(src, ns=(os.stat(src).st_atime_ns, os.stat(src).st_mtime_ns + 1))
+    fresh = cache.load(str(src))
+    assert not cache.last_hit
+    assert len(fresh.price) == 120 and fresh.price[0] == 101
+    assert len(os.listdir(tmp_path / "cache")) == 1
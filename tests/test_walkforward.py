@@ -0,0 +1,77 @@
+import csv
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from src.walkforward import find_day_files, run_days, run_walk_forward, best_index, _init_worker, _job, run_segment
+
+def write_days(tmp_path, days=4, seed=3):
+    """DataRecorder layout: one ticker_YYYY-MM-DD.csv per day, 4 ticks per minute"""
+    rng = np.random.default_rng(seed)
+    price = 100.0
+    for d in range(days):
+        day = datetime(2025, 3, 1) + timedelta(days=d)
+        with open(tmp_path / f"ticker_{day.date()}.csv", "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["time", "symbol", "price", "volume"])
+            for m in range(24 * 60):
+                dt = day + timedelta(minutes=m)
+                for sec in (0, 15, 30, 59):
+                    price = round(price + rng.normal(0, 0.2), 2)
+                    w.writerow([(dt + timedelta(seconds=sec)).isoformat(), "TEST", price, 1.0])
+    (tmp_path / "notes.csv").write_text("not a recording\n")
+    return str(tmp_path)
+
+def test_find_day_files(tmp_path):
+    directory = write_days(tmp_path, days=4)
+    files = find_day_files(directory, start=date(2025, 3, 2), end=date(2025, 3, 3))
+    assert list(files) == [date(2025, 3, 2), date(2025, 3, 3)]
+    assert len(find_day_files(directory)) == 4
+
+def test_segment_is_warmed_from_previous_day(tmp_path):
+    files = find_day_files(write_days(tmp_path, days=2))
+    _init_worker(str(tmp_path / "cache"))
+    job = _job(files, "TEST", date(2025, 3, 2), date(2025, 3, 2), 120, {}, "2025-03-02")
+
+    assert len(job["paths"]) == 2 # Warm-up reaches into the previous file
+    result = run_segment(job)
+    assert result["warmup_ticks"] == 120 * 4
+    assert result["ticks"] == 24 * 60 * 4
+
+def test_parallel_days_match_sequential(tmp_path):
+    files = find_day_files(write_days(tmp_path, days=3))
+    grid = {"ma_period": [10, 50]}
+    cache_dir = str(tmp_path / "cache")
+
+    parallel = run_days(files, "TEST", grid, warmup_minutes=60, workers=2, cache_dir=cache_dir)
+    sequential = run_days(files, "TEST", grid, warmup_minutes=60, workers=1, cache_dir=cache_dir)
+
+    assert len(parallel) == 6
+    cols = ["segment", "ma_period", "ticks", "pnl", "trades_count"]
+    pd.testing.assert_frame_equal(parallel[cols], sequential[cols])
+
+@pytest.mark.parametrize("rank_by, pick", [("pnl", max), ("max_drawdown", min)])
+def test_walk_forward_picks_best_train_params(tmp_path, rank_by, pick):
+    files = find_day_files(write_days(tmp_path, days=4))
+    grid = {"tp1_r": [1.5, 3.0]}
+    cache_dir = str(tmp_path / "cache")
+
+    wf = run_walk_forward(files, "TEST", grid, train_days=2, test_days=1, rank_by=rank_by, warmup_minutes=60,
+                          workers=1, cache_dir=cache_dir)
+    assert list(wf["segment"]) == ["test 2025-03-03", "test 2025-03-04"]
+
+    # Same train segments run standalone -> the winner per window must match
+    _init_worker(cache_dir)
+    for row, first in zip(wf.itertuples(), (date(2025, 3, 1), date(2025, 3, 2))):
+        last = first + timedelta(days=1)
+        train = [run_segment(_job(files, "TEST", first, last, 60, params, "train")) for params in ({"tp1_r": 1.5}, {"tp1_r": 3.0})]
+        best = pick(train, key=lambda r: r[rank_by])
+        assert row.tp1_r == best["tp1_r"]
+        assert getattr(row, f"train_{rank_by}") == best[rank_by]
+
+def test_best_index_ranks_nan_last():
+    nan = float("nan")
+    assert best_index(np.array([nan, 0.5, 1.2, nan]), "sharpe") == 2
+    assert best_index(np.array([0.3, nan, 0.1]), "max_drawdown") == 2
+    assert best_index(np.array([nan, -4.0]), "pnl") == 1
+    assert best_index(np.array([nan, 0.2]), "max_drawdown") == 1